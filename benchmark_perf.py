@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Performance regression benchmarks for chunking, embedding and search.
+
+Measures startup time (tokenizer, encoder), chunks/sec through
+SimpleChunker, embeddings/sec through the sentence encoder, and
+queries/sec through a FAISS flat index, on a fixed, seeded synthetic
+corpus. Each measurement is repeated and the median kept. Results are
+compared against a committed baseline; a metric that is worse by more
+than the noise threshold is flagged and the command exits non-zero, as
+it does when the baseline has no metrics yet.
+
+    python benchmark_perf.py                      # run and compare with the baseline
+    python benchmark_perf.py --update-baseline    # record a new baseline
+    python benchmark_perf.py --compare results.json --threshold 0.15
+
+Baselines are only meaningful on the machine that recorded them. The
+committed reports/perf_baseline.json is an empty placeholder until it is
+recorded on the reference machine with --update-baseline.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+from typing import Any, Callable, Dict, List, Optional
+sys.path.append('.')
+
+from generate_corpus import SYMPTOMS, CorpusProfile, generate_sections
+
+DEFAULT_BASELINE = "reports/perf_baseline.json"
+DEFAULT_ENCODER = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+
+# Fixed corpus shape so runs are comparable
+CORPUS_SEED = 1234
+CORPUS_SECTIONS = 200
+QUERY_COUNT = 200
+
+
+def synthetic_sections(count: int = CORPUS_SECTIONS, seed: int = CORPUS_SEED) -> List[Dict[str, Any]]:
+    """Deterministic section dicts from the corpus generator's default profile."""
+    return list(generate_sections(count, CorpusProfile(), seed))
+
+
+def synthetic_queries(count: int = QUERY_COUNT, seed: int = CORPUS_SEED) -> List[str]:
+    rng = random.Random(seed + 1)
+    return [" and ".join(rng.sample(SYMPTOMS, 2)) for _ in range(count)]
+
+
+def timed(func: Callable[[], Any]) -> float:
+    start_time = time.perf_counter()
+    func()
+    return time.perf_counter() - start_time
+
+
+def median_time(func: Callable[[], Any], repeats: int) -> float:
+    return statistics.median(timed(func) for _ in range(repeats))
+
+
+def metric(value: float, unit: str, higher_is_better: bool) -> Dict[str, Any]:
+    return {"value": round(value, 4), "unit": unit, "higher_is_better": higher_is_better}
+
+
+def run_benchmarks(repeats: int = 3, encoder_name: str = DEFAULT_ENCODER,
+                   sections_data: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    import numpy as np
+    import faiss
+    from sentence_transformers import SentenceTransformer
+    from rag.schemas import Section
+    from simple_chunker import SimpleChunker
+
+    metrics: Dict[str, Dict[str, Any]] = {}
+    sections_data = sections_data or synthetic_sections()
+    sections = [Section(**data) for data in sections_data]
+    queries = synthetic_queries()
+
+    # Startup: first load includes reading model files from the local cache
+    metrics["chunker_startup_s"] = metric(median_time(lambda: SimpleChunker(target_tokens=300), repeats),
+                                          "s", False)
+    metrics["encoder_startup_s"] = metric(median_time(lambda: SentenceTransformer(encoder_name), repeats),
+                                          "s", False)
+
+    chunker = SimpleChunker(target_tokens=300)
+    chunks = chunker.create_chunks(sections)
+    seconds = median_time(lambda: chunker.create_chunks(sections), repeats)
+    metrics["chunks_per_s"] = metric(len(chunks) / seconds, "chunks/s", True)
+
+    encoder = SentenceTransformer(encoder_name)
+    texts = [chunk.text for chunk in chunks]
+
+    def encode():
+        return encoder.encode(texts, batch_size=64, normalize_embeddings=True)
+    seconds = median_time(encode, repeats)
+    metrics["embeddings_per_s"] = metric(len(texts) / seconds, "embeddings/s", True)
+
+    vectors = np.asarray(encode(), dtype="float32")
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+    query_vectors = np.asarray(encoder.encode(queries, normalize_embeddings=True), dtype="float32")
+
+    seconds = median_time(lambda: [index.search(query_vectors[i:i + 1], 8) for i in range(len(queries))], repeats)
+    metrics["search_queries_per_s"] = metric(len(queries) / seconds, "queries/s", True)
+
+    def end_to_end():
+        for query in queries:
+            index.search(np.asarray(encoder.encode([query], normalize_embeddings=True), dtype="float32"), 8)
+    seconds = median_time(end_to_end, repeats)
+    metrics["encode_and_search_queries_per_s"] = metric(len(queries) / seconds, "queries/s", True)
+
+    return {
+        "metrics": metrics,
+        "corpus": {"sections": len(sections), "chunks": len(chunks), "queries": len(queries),
+                   "seed": CORPUS_SEED},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "encoder": encoder_name,
+            "faiss": getattr(faiss, "__version__", "unknown"),
+        },
+        "repeats": repeats,
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Per-metric change vs baseline; ``regression`` when worse by more than ``threshold``."""
+    rows = []
+    for name, base in baseline.get("metrics", {}).items():
+        now = current.get("metrics", {}).get(name)
+        if now is None or not base["value"]:
+            continue
+        change = (now["value"] - base["value"]) / base["value"]
+        worse_by = -change if base["higher_is_better"] else change
+        rows.append({
+            "metric": name,
+            "baseline": base["value"],
+            "current": now["value"],
+            "unit": base["unit"],
+            "change": round(change, 4),
+            "regression": worse_by > threshold,
+        })
+    return rows
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    """The baseline to compare against; exits with status 2 if it has no metrics."""
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+    if not baseline.get("metrics"):
+        print(f"No baseline metrics in {path}; record them on the reference machine with --update-baseline")
+        sys.exit(2)
+    return baseline
+
+
+def print_comparison(rows: List[Dict[str, Any]], threshold: float) -> None:
+    print(f"\n{'metric':<34} {'baseline':>12} {'current':>12} {'change':>9}")
+    for row in rows:
+        flag = "  ❌ regression" if row["regression"] else ""
+        print(f"{row['metric']:<34} {row['baseline']:>12} {row['current']:>12} {row['change']:>+9.1%}{flag}")
+    print(f"(noise threshold ±{threshold:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunking/embedding/search performance baselines")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--compare", help="Compare an existing results file instead of running")
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change treated as noise")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--encoder", default=DEFAULT_ENCODER)
+    args = parser.parse_args()
+
+    # Fail before spending minutes on the benchmarks if there is nothing to compare against
+    baseline = None if args.update_baseline else load_baseline(args.baseline)
+
+    if args.compare:
+        with open(args.compare) as f:
+            results = json.load(f)
+    else:
+        results = run_benchmarks(args.repeats, args.encoder)
+        for name, value in results["metrics"].items():
+            print(f"{name:<34} {value['value']:>12} {value['unit']}")
+
+    for path in filter(None, [args.output, args.baseline if args.update_baseline else None]):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {path}")
+    if args.update_baseline:
+        return
+
+    rows = compare(results, baseline, args.threshold)
+    print_comparison(rows, args.threshold)
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Retrieval quality-vs-latency sweep with a Pareto table and plot.
+
+Builds indexes from data/processed/chunks.jsonl for every combination of
+encoder, index type, top_k, hybrid (dense + TF-IDF rank fusion) and
+cross-encoder reranking, runs the eval cases through each, and records
+Hit@k, Precision@k, Recall@k and per-query latency. Configurations that no
+other configuration beats on both quality and p95 latency form the Pareto
+front.
+
+    python benchmark_retrieval.py --cases eval/cases/retrieval.jsonl \\
+        --encoders BAAI/bge-small-en-v1.5,BAAI/bge-base-en-v1.5 --index-types flat,hnsw,ivf
+
+Cases are JSONL (or a JSON list) of {"query": ..., "relevant_chunk_ids": [...]}
+or {"query": ..., "relevant_sections": [...]}.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence
+sys.path.append('.')
+
+import numpy as np
+
+from simple_usage import percentile
+
+DEFAULT_ENCODER = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+DEFAULT_RERANKER = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+
+# Candidates fused (hybrid) or re-scored (reranker) before cutting to top_k
+CANDIDATE_POOL = 50
+RRF_K = 60
+
+
+@dataclass
+class BenchmarkConfig:
+    encoder: str
+    index_type: str
+    top_k: int
+    hybrid: bool
+    reranker: bool
+
+    @property
+    def label(self) -> str:
+        flags = "+".join(name for name, on in (("hybrid", self.hybrid), ("rerank", self.reranker)) if on)
+        return f"{self.encoder.split('/')[-1]}/{self.index_type}/k={self.top_k}" + (f"/{flags}" if flags else "")
+
+
+@dataclass
+class BenchmarkResult:
+    config: BenchmarkConfig
+    hit_at_k: float
+    precision_at_k: float
+    recall_at_k: float
+    latency_mean_ms: float
+    latency_p95_ms: float
+    pareto: bool = False
+
+    def row(self) -> Dict[str, Any]:
+        row = asdict(self.config)
+        row.update({key: value for key, value in asdict(self).items() if key != "config"})
+        row["label"] = self.config.label
+        return row
+
+
+def load_chunks(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_cases(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        if path.endswith(".json"):
+            cases = json.load(f)
+        else:
+            cases = [json.loads(line) for line in f if line.strip()]
+    usable = [c for c in cases if c.get("relevant_chunk_ids") or c.get("relevant_sections")]
+    if len(usable) < len(cases):
+        print(f"⚠️ Skipping {len(cases) - len(usable)} cases without relevance labels")
+    return usable
+
+
+def is_relevant(chunk: Dict[str, Any], case: Dict[str, Any]) -> bool:
+    # chunks.jsonl holds Chunk.model_dump() records, keyed by "id"
+    if (chunk.get("chunk_id") or chunk.get("id")) in set(case.get("relevant_chunk_ids", [])):
+        return True
+    section = (chunk.get("metadata") or {}).get("section")
+    return section is not None and section in set(case.get("relevant_sections", []))
+
+
+def relevant_total(chunks: List[Dict[str, Any]], case: Dict[str, Any]) -> int:
+    if case.get("relevant_chunk_ids"):
+        return len(set(case["relevant_chunk_ids"]))
+    return sum(1 for chunk in chunks if is_relevant(chunk, case))
+
+
+def build_index(index_type: str, vectors: np.ndarray):
+    """FAISS inner-product index over normalized vectors."""
+    import faiss
+
+    dim = vectors.shape[1]
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efSearch = 64
+    elif index_type == "ivf":
+        nlist = max(1, int(np.sqrt(len(vectors))))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.nprobe = max(1, nlist // 8)
+    else:
+        raise ValueError(f"Unknown index type '{index_type}'")
+    index.add(vectors)
+    return index
+
+
+class RetrievalBench:
+    """Encoders, indexes and the TF-IDF matrix, built once and shared across configs."""
+
+    def __init__(self, chunks: List[Dict[str, Any]], reranker_model: str = DEFAULT_RERANKER):
+        self.chunks = chunks
+        self.texts = [chunk.get("text", "") for chunk in chunks]
+        self.reranker_model = reranker_model
+        self.encoders: Dict[str, Any] = {}
+        self.embeddings: Dict[str, np.ndarray] = {}
+        self.indexes: Dict[tuple, Any] = {}
+        self.tfidf = None
+        self.tfidf_matrix = None
+        self.cross_encoder = None
+
+    def encoder(self, name: str):
+        if name not in self.encoders:
+            from sentence_transformers import SentenceTransformer
+            print(f"Loading encoder {name}...")
+            self.encoders[name] = SentenceTransformer(name)
+        return self.encoders[name]
+
+    def index(self, encoder: str, index_type: str):
+        if encoder not in self.embeddings:
+            print(f"Encoding {len(self.texts)} chunks with {encoder}...")
+            self.embeddings[encoder] = np.asarray(
+                self.encoder(encoder).encode(self.texts, batch_size=64, normalize_embeddings=True),
+                dtype="float32",
+            )
+        key = (encoder, index_type)
+        if key not in self.indexes:
+            self.indexes[key] = build_index(index_type, self.embeddings[encoder])
+        return self.indexes[key]
+
+    def lexical_ranking(self, query: str, limit: int) -> List[int]:
+        if self.tfidf is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self.tfidf = TfidfVectorizer(stop_words="english", sublinear_tf=True)
+            self.tfidf_matrix = self.tfidf.fit_transform(self.texts)
+        scores = (self.tfidf_matrix @ self.tfidf.transform([query]).T).toarray().ravel()
+        return [int(i) for i in np.argsort(-scores)[:limit]]
+
+    def rerank(self, query: str, candidates: List[int]) -> List[int]:
+        if self.cross_encoder is None:
+            from sentence_transformers import CrossEncoder
+            self.cross_encoder = CrossEncoder(self.reranker_model)
+        scores = self.cross_encoder.predict([(query, self.texts[i]) for i in candidates])
+        return [candidates[i] for i in np.argsort(-np.asarray(scores))]
+
+    def search(self, config: BenchmarkConfig, query: str) -> List[int]:
+        """Chunk indices for one query under one configuration."""
+        pool = max(CANDIDATE_POOL, config.top_k) if (config.hybrid or config.reranker) else config.top_k
+        vector = np.asarray(
+            self.encoder(config.encoder).encode([query], normalize_embeddings=True), dtype="float32"
+        )
+        _, ids = self.index(config.encoder, config.index_type).search(vector, pool)
+        ranking = [int(i) for i in ids[0] if i >= 0]
+
+        if config.hybrid:
+            # Reciprocal rank fusion of the dense and TF-IDF rankings
+            fused: Dict[int, float] = {}
+            for ranked in (ranking, self.lexical_ranking(query, pool)):
+                for rank, chunk_index in enumerate(ranked):
+                    fused[chunk_index] = fused.get(chunk_index, 0.0) + 1.0 / (RRF_K + rank + 1)
+            ranking = sorted(fused, key=fused.get, reverse=True)[:pool]
+
+        if config.reranker:
+            ranking = self.rerank(query, ranking)
+        return ranking[:config.top_k]
+
+    def evaluate(self, config: BenchmarkConfig, cases: List[Dict[str, Any]]) -> BenchmarkResult:
+        # Build indexes and load models outside the timed section
+        self.index(config.encoder, config.index_type)
+        self.search(config, cases[0]["query"])
+
+        hits, precisions, recalls, latencies = [], [], [], []
+        for case in cases:
+            start_time = time.perf_counter()
+            ranking = self.search(config, case["query"])
+            latencies.append(time.perf_counter() - start_time)
+
+            found = sum(1 for i in ranking if is_relevant(self.chunks[i], case))
+            total = relevant_total(self.chunks, case)
+            hits.append(1.0 if found else 0.0)
+            precisions.append(found / config.top_k)
+            recalls.append(min(1.0, found / total) if total else 0.0)
+
+        return BenchmarkResult(
+            config=config,
+            hit_at_k=round(float(np.mean(hits)), 4),
+            precision_at_k=round(float(np.mean(precisions)), 4),
+            recall_at_k=round(float(np.mean(recalls)), 4),
+            latency_mean_ms=round(float(np.mean(latencies)) * 1000, 2),
+            latency_p95_ms=round(percentile(latencies, 0.95) * 1000, 2),
+        )
+
+
+def mark_pareto(results: List[BenchmarkResult], quality: str) -> None:
+    """Flag results not dominated on (higher quality, lower p95 latency)."""
+    for result in results:
+        value = getattr(result, quality)
+        result.pareto = not any(
+            getattr(other, quality) >= value and other.latency_p95_ms <= result.latency_p95_ms
+            and (getattr(other, quality) > value or other.latency_p95_ms < result.latency_p95_ms)
+            for other in results
+        )
+
+
+def plot_pareto(results: List[BenchmarkResult], quality: str, path: str) -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(9, 6))
+    others = [r for r in results if not r.pareto]
+    front = sorted((r for r in results if r.pareto), key=lambda r: r.latency_p95_ms)
+    ax.scatter([r.latency_p95_ms for r in others], [getattr(r, quality) for r in others],
+               color="lightgray", label="dominated")
+    ax.plot([r.latency_p95_ms for r in front], [getattr(r, quality) for r in front],
+            marker="o", color="tab:blue", label="Pareto front")
+    for r in front:
+        ax.annotate(r.config.label, (r.latency_p95_ms, getattr(r, quality)), fontsize=7,
+                    textcoords="offset points", xytext=(4, 4))
+    ax.set_xlabel("p95 latency (ms)")
+    ax.set_ylabel(quality.replace("_at_k", "@k"))
+    ax.set_title("Retrieval quality vs latency")
+    ax.legend()
+    fig.tight_layout()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fig.savefig(path, dpi=150)
+    plt.close(fig)
+
+
+def parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_switch(value: str) -> List[bool]:
+    return [item == "on" for item in parse_list(value)]
+
+
+def sweep(encoders: Sequence[str], index_types: Sequence[str], top_ks: Sequence[int],
+          hybrids: Sequence[bool], rerankers: Sequence[bool]) -> List[BenchmarkConfig]:
+    return [
+        BenchmarkConfig(encoder, index_type, top_k, hybrid, reranker)
+        for encoder, index_type, top_k, hybrid, reranker
+        in itertools.product(encoders, index_types, top_ks, hybrids, rerankers)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep retrieval configurations and report the Pareto front")
+    parser.add_argument("--chunks", default="data/processed/chunks.jsonl")
+    parser.add_argument("--cases", default="eval/cases/retrieval.jsonl")
+    parser.add_argument("--encoders", default=DEFAULT_ENCODER)
+    parser.add_argument("--index-types", default="flat,hnsw,ivf")
+    parser.add_argument("--top-k", default="4,8,16")
+    parser.add_argument("--hybrid", default="off,on")
+    parser.add_argument("--reranker", default="off,on")
+    parser.add_argument("--reranker-model", default=DEFAULT_RERANKER)
+    parser.add_argument("--quality", default="recall_at_k",
+                        choices=["hit_at_k", "precision_at_k", "recall_at_k"])
+    parser.add_argument("--output", default="reports/retrieval_pareto.json")
+    parser.add_argument("--plot", default="reports/figures/retrieval_pareto.png")
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.chunks)
+    cases = load_cases(args.cases)
+    if not cases:
+        print("❌ No labelled cases to evaluate")
+        sys.exit(1)
+
+    bench = RetrievalBench(chunks, args.reranker_model)
+    configs = sweep(parse_list(args.encoders), parse_list(args.index_types),
+                    [int(k) for k in parse_list(args.top_k)], parse_switch(args.hybrid),
+                    parse_switch(args.reranker))
+
+    results = []
+    for i, config in enumerate(configs, 1):
+        result = bench.evaluate(config, cases)
+        print(f"[{i}/{len(configs)}] {config.label}: recall@k={result.recall_at_k} "
+              f"hit@k={result.hit_at_k} p95={result.latency_p95_ms}ms")
+        results.append(result)
+
+    mark_pareto(results, args.quality)
+    results.sort(key=lambda r: r.latency_p95_ms)
+
+    print(f"\n{'configuration':<48} {'hit@k':>7} {'prec@k':>7} {'rec@k':>7} {'mean ms':>8} {'p95 ms':>8}")
+    for r in results:
+        marker = " *" if r.pareto else ""
+        print(f"{r.config.label:<48} {r.hit_at_k:>7} {r.precision_at_k:>7} {r.recall_at_k:>7} "
+              f"{r.latency_mean_ms:>8} {r.latency_p95_ms:>8}{marker}")
+    print("* = Pareto-optimal")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"quality": args.quality, "cases": len(cases), "chunks": len(chunks),
+                   "results": [r.row() for r in results]}, f, indent=2)
+    plot_pareto(results, args.quality, args.plot)
+    print(f"Results written to {args.output}, plot to {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,17 @@ Example script demonstrating the LLM-as-Judge implementation
 without requiring the full Streamlit UI.
 """
 
-import requests
-import json
-import time
+from doctor_bot_client import APIError, DoctorBotClient
 
 API_BASE_URL = "http://127.0.0.1:8000"
 
 def demo_triage_process():
     """Demonstrate the complete triage process with judge evaluation."""
+    with DoctorBotClient(API_BASE_URL, timeout_s=60) as client:
+        run_demo(client)
+
+def run_demo(client: DoctorBotClient):
+    """Run both /triage steps over one pooled client and print the results."""
     
     print("🏥 Doctor Bot LLM-as-Judge Demo")
     print("=" * 50)
@@ -22,27 +25,22 @@ def demo_triage_process():
     
     # Call API for follow-up questions
     print("\n🔍 Step 1: Generating follow-up questions...")
-    response = requests.post(f"{API_BASE_URL}/triage", json={
-        "query": patient_query,
-        "top_k": 8
-    })
-    
-    if response.status_code != 200:
-        print(f"❌ API Error: {response.status_code}")
-        print(response.text)
+    try:
+        data = client.triage(patient_query, top_k=8)
+    except APIError as e:
+        print(f"❌ API Error: {e.status_code}")
+        print(e.detail)
         return
     
-    data = response.json()
-    
-    if data.get("next_action") != "ask_followups":
+    if data.next_action != "ask_followups":
         print("❌ Unexpected response")
         return
     
-    questions = data.get("followup_questions", [])
+    questions = data.followup_questions
     print(f"✅ Generated {len(questions)} follow-up questions:")
     
     for i, q in enumerate(questions, 1):
-        print(f"  {i}. {q.get('text', 'N/A')}")
+        print(f"  {i}. {q.text or 'N/A'}")
     
     # Simulate answers
     print("\n📋 Step 2: Simulating patient answers...")
@@ -61,20 +59,15 @@ def demo_triage_process():
     
     # Call API with answers
     print("\n🔬 Step 3: Generating triage note with judge evaluation...")
-    triage_response = requests.post(f"{API_BASE_URL}/triage", json={
-        "query": patient_query,
-        "followup_answers": answers,
-        "top_k": 8
-    })
-    
-    if triage_response.status_code != 200:
-        print(f"❌ API Error: {triage_response.status_code}")
-        print(triage_response.text)
+    try:
+        triage_data = client.triage(patient_query, followup_answers=answers, top_k=8,
+                                    session_id=data.session_id)
+    except APIError as e:
+        print(f"❌ API Error: {e.status_code}")
+        print(e.detail)
         return
     
-    triage_data = triage_response.json()
-    
-    if triage_data.get("next_action") != "return_triage":
+    if triage_data.next_action != "return_triage":
         print("❌ Unexpected response")
         return
     
@@ -83,7 +76,7 @@ def demo_triage_process():
     print("=" * 30)
     
     # Triage note
-    triage_note = triage_data.get("triage_note", {})
+    triage_note = triage_data.triage_note or {}
     print(f"\n📋 Triage Note Generated")
     print(f"Patient Query: {triage_note.get('patient_query', 'N/A')}")
     
@@ -110,7 +103,7 @@ def demo_triage_process():
             print(f"  Red Flags: {', '.join(red_flags)}")
     
     # Judge verdict
-    verdict = triage_data.get("judge_verdict", {})
+    verdict = triage_data.judge_verdict or {}
     if verdict:
         print(f"\n⚖️ Judge Evaluation:")
         decision = verdict.get("decision", "unknown")
@@ -0,0 +1,33 @@
+"""Python client for the Doctor Bot API.
+
+    from doctor_bot_client import DoctorBotClient
+
+    with DoctorBotClient("http://127.0.0.1:8000") as client:
+        step_one = client.triage("fever 3 days, chills, cough")
+        hits = client.retrieve_many(["chest pain", "headache"], top_k=4)
+"""
+
+from .client import (
+    DEFAULT_BASE_URL,
+    APIConnectionError,
+    APIError,
+    AsyncDoctorBotClient,
+    DoctorBotClient,
+    DoctorBotError,
+    StreamingUnavailable,
+)
+from .models import FollowupQuestion, HealthResponse, OrchestratorResponse, RetrieveResponse
+
+__all__ = [
+    "DEFAULT_BASE_URL",
+    "APIConnectionError",
+    "APIError",
+    "AsyncDoctorBotClient",
+    "DoctorBotClient",
+    "DoctorBotError",
+    "FollowupQuestion",
+    "HealthResponse",
+    "OrchestratorResponse",
+    "RetrieveResponse",
+    "StreamingUnavailable",
+]
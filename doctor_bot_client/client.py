@@ -0,0 +1,320 @@
+"""Sync and async Doctor Bot API clients on one pooled httpx connection pool.
+
+Idempotent calls (health, /retrieve) are retried with exponential backoff on
+transport errors and retryable status codes. /triage runs LLM calls and
+creates server-side sessions, so it is only retried when the connection
+failed before the request was sent. ``retrieve_many``/``triage_many`` run
+many calls concurrently over the same pool.
+"""
+
+import os
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+import httpx
+
+from .models import HealthResponse, OrchestratorResponse, RetrieveResponse
+
+DEFAULT_BASE_URL = os.getenv("DOCTOR_BOT_API_URL", "http://127.0.0.1:8000")
+STREAM_PATH = "/triage/stream"
+
+# Status codes worth retrying for idempotent calls
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# Transport errors raised before any bytes reached the server
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class DoctorBotError(Exception):
+    """Base class for client errors."""
+
+
+class APIConnectionError(DoctorBotError):
+    """The API could not be reached."""
+
+
+class APIError(DoctorBotError):
+    """The API answered with an error status."""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(f"HTTP {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class StreamingUnavailable(DoctorBotError):
+    """The API has no streaming triage endpoint; use triage() instead."""
+
+
+def api_error(response: httpx.Response) -> APIError:
+    try:
+        detail = response.json().get("detail", response.text)
+    except (ValueError, AttributeError):
+        detail = response.text
+    return APIError(response.status_code, detail)
+
+
+def json_body(response: httpx.Response) -> Any:
+    """Decoded body of a successful response; a non-JSON body is an APIError."""
+    try:
+        return response.json()
+    except ValueError:
+        raise APIError(response.status_code, f"Expected a JSON body, got: {response.text[:200]!r}") from None
+
+
+def triage_payload(query: str, followup_answers: Optional[Dict[str, str]] = None, top_k: int = 8,
+                   session_id: Optional[str] = None) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {"query": query, "top_k": top_k}
+    if followup_answers:
+        payload["followup_answers"] = followup_answers
+    if session_id:
+        payload["session_id"] = session_id
+    return payload
+
+
+class BaseClient:
+    """Configuration and retry policy shared by the sync and async clients."""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, timeout_s: float = 30.0,
+                 max_connections: int = 20, max_retries: int = 3, backoff_s: float = 0.25,
+                 stream_path: str = STREAM_PATH):
+        self.base_url = base_url.rstrip("/")
+        self.stream_path = stream_path
+        self.timeout = httpx.Timeout(timeout_s, connect=5.0)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+
+    def should_retry(self, attempt: int, idempotent: bool, response: Optional[httpx.Response] = None,
+                     error: Optional[Exception] = None) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if error is not None:
+            return idempotent or isinstance(error, NOT_SENT_ERRORS)
+        return idempotent and response.status_code in RETRYABLE_STATUS
+
+    def retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Exponential backoff, or the server's Retry-After when it asks for longer."""
+        delay = self.backoff_s * 2 ** attempt
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+
+class DoctorBotClient(BaseClient):
+    """Blocking client; safe to share between threads."""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, http_client: Optional[httpx.Client] = None, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.http_client = http_client or httpx.Client(timeout=self.timeout, limits=self.limits)
+
+    def __enter__(self) -> "DoctorBotClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.http_client.close()
+
+    def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None,
+                idempotent: bool = True) -> Any:
+        """Send a request with retries and return the decoded JSON body."""
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = self.http_client.request(method, f"{self.base_url}{path}", json=payload)
+            except httpx.TransportError as e:
+                if not self.should_retry(attempt, idempotent, error=e):
+                    raise APIConnectionError(str(e)) from e
+            else:
+                if response.is_success:
+                    return json_body(response)
+                if not self.should_retry(attempt, idempotent, response):
+                    raise api_error(response)
+            time.sleep(self.retry_delay(attempt, response))
+            attempt += 1
+
+    def health(self) -> HealthResponse:
+        return HealthResponse.model_validate(self.request("GET", "/health"))
+
+    def routes(self) -> Set[str]:
+        """Paths the API serves, from its OpenAPI schema."""
+        return set(self.request("GET", "/openapi.json").get("paths", {}))
+
+    def supports_streaming(self) -> bool:
+        """Whether the API serves the streaming triage endpoint."""
+        return self.stream_path in self.routes()
+
+    def retrieve(self, query: str, top_k: int = 8) -> RetrieveResponse:
+        return RetrieveResponse.model_validate(self.request("POST", "/retrieve", {"query": query, "top_k": top_k}))
+
+    def triage(self, query: str, followup_answers: Optional[Dict[str, str]] = None, top_k: int = 8,
+               session_id: Optional[str] = None) -> OrchestratorResponse:
+        payload = triage_payload(query, followup_answers, top_k, session_id)
+        return OrchestratorResponse.model_validate(self.request("POST", "/triage", payload, idempotent=False))
+
+    def stream_triage(self, query: str, followup_answers: Optional[Dict[str, str]] = None, top_k: int = 8,
+                      session_id: Optional[str] = None, timeout_s: float = 120.0) -> Iterator[Dict[str, Any]]:
+        """Yield NDJSON events from the streaming triage endpoint as they arrive.
+
+        Events: ``stage_start``/``stage_end``, ``field``, ``result`` (the
+        /triage response body), then ``done`` or ``error``.
+        """
+        payload = triage_payload(query, followup_answers, top_k, session_id)
+        timeout = httpx.Timeout(timeout_s, connect=5.0)
+        try:
+            with self.http_client.stream("POST", f"{self.base_url}{self.stream_path}", json=payload,
+                                         timeout=timeout) as response:
+                if response.status_code in (404, 405):
+                    raise StreamingUnavailable(f"{self.stream_path} returned {response.status_code}")
+                if not response.is_success:
+                    response.read()
+                    raise api_error(response)
+                for line in response.iter_lines():
+                    if line.strip():
+                        yield json.loads(line)
+        except httpx.TransportError as e:
+            raise APIConnectionError(str(e)) from e
+
+    def run_concurrently(self, func, items: List[Any], concurrency: int, return_exceptions: bool) -> List[Any]:
+        def call(item: Any) -> Any:
+            try:
+                return func(item)
+            except DoctorBotError as e:
+                if return_exceptions:
+                    return e
+                raise
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            return list(pool.map(call, items))
+
+    def retrieve_many(self, queries: Iterable[str], top_k: int = 8, concurrency: int = 8,
+                      return_exceptions: bool = False) -> List[Union[RetrieveResponse, DoctorBotError]]:
+        """Retrieve for every query concurrently; results are in input order."""
+        return self.run_concurrently(lambda query: self.retrieve(query, top_k), list(queries),
+                                     concurrency, return_exceptions)
+
+    def triage_many(self, requests: Iterable[Dict[str, Any]], concurrency: int = 4,
+                    return_exceptions: bool = False) -> List[Union[OrchestratorResponse, DoctorBotError]]:
+        """Run ``triage(**request)`` for every request concurrently."""
+        return self.run_concurrently(lambda request: self.triage(**request), list(requests),
+                                     concurrency, return_exceptions)
+
+
+class AsyncDoctorBotClient(BaseClient):
+    """asyncio client; one instance per event loop."""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, http_client: Optional[httpx.AsyncClient] = None,
+                 **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.http_client = http_client or httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+
+    async def __aenter__(self) -> "AsyncDoctorBotClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.http_client.aclose()
+
+    async def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None,
+                      idempotent: bool = True) -> Any:
+        """Send a request with retries and return the decoded JSON body."""
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = await self.http_client.request(method, f"{self.base_url}{path}", json=payload)
+            except httpx.TransportError as e:
+                if not self.should_retry(attempt, idempotent, error=e):
+                    raise APIConnectionError(str(e)) from e
+            else:
+                if response.is_success:
+                    return json_body(response)
+                if not self.should_retry(attempt, idempotent, response):
+                    raise api_error(response)
+            await asyncio.sleep(self.retry_delay(attempt, response))
+            attempt += 1
+
+    async def health(self) -> HealthResponse:
+        return HealthResponse.model_validate(await self.request("GET", "/health"))
+
+    async def routes(self) -> Set[str]:
+        """Paths the API serves, from its OpenAPI schema."""
+        return set((await self.request("GET", "/openapi.json")).get("paths", {}))
+
+    async def supports_streaming(self) -> bool:
+        """Whether the API serves the streaming triage endpoint."""
+        return self.stream_path in await self.routes()
+
+    async def retrieve(self, query: str, top_k: int = 8) -> RetrieveResponse:
+        data = await self.request("POST", "/retrieve", {"query": query, "top_k": top_k})
+        return RetrieveResponse.model_validate(data)
+
+    async def triage(self, query: str, followup_answers: Optional[Dict[str, str]] = None, top_k: int = 8,
+                     session_id: Optional[str] = None) -> OrchestratorResponse:
+        payload = triage_payload(query, followup_answers, top_k, session_id)
+        return OrchestratorResponse.model_validate(await self.request("POST", "/triage", payload, idempotent=False))
+
+    async def stream_triage(self, query: str, followup_answers: Optional[Dict[str, str]] = None, top_k: int = 8,
+                            session_id: Optional[str] = None,
+                            timeout_s: float = 120.0) -> AsyncIterator[Dict[str, Any]]:
+        """Async version of DoctorBotClient.stream_triage."""
+        payload = triage_payload(query, followup_answers, top_k, session_id)
+        timeout = httpx.Timeout(timeout_s, connect=5.0)
+        try:
+            async with self.http_client.stream("POST", f"{self.base_url}{self.stream_path}", json=payload,
+                                               timeout=timeout) as response:
+                if response.status_code in (404, 405):
+                    raise StreamingUnavailable(f"{self.stream_path} returned {response.status_code}")
+                if not response.is_success:
+                    await response.aread()
+                    raise api_error(response)
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        yield json.loads(line)
+        except httpx.TransportError as e:
+            raise APIConnectionError(str(e)) from e
+
+    async def gather(self, func, items: List[Any], concurrency: int, return_exceptions: bool) -> List[Any]:
+        """``func(item)`` for every item, in order, with at most ``concurrency`` in flight.
+
+        Each coroutine is only created once its slot is free, so a failing
+        call leaves no never-awaited coroutines behind.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(item: Any) -> Any:
+            async with semaphore:
+                try:
+                    return await func(item)
+                except DoctorBotError as e:
+                    if return_exceptions:
+                        return e
+                    raise
+
+        tasks = [asyncio.create_task(run(item)) for item in items]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            # On the first error, stop the calls still queued or in flight
+            for task in tasks:
+                task.cancel()
+
+    async def retrieve_many(self, queries: Iterable[str], top_k: int = 8, concurrency: int = 16,
+                            return_exceptions: bool = False) -> List[Union[RetrieveResponse, DoctorBotError]]:
+        """Retrieve for every query with at most ``concurrency`` in flight; results are in input order."""
+        return await self.gather(lambda query: self.retrieve(query, top_k), list(queries),
+                                 concurrency, return_exceptions)
+
+    async def triage_many(self, requests: Iterable[Dict[str, Any]], concurrency: int = 4,
+                          return_exceptions: bool = False) -> List[Union[OrchestratorResponse, DoctorBotError]]:
+        """Run ``triage(**request)`` for every request with at most ``concurrency`` in flight."""
+        return await self.gather(lambda request: self.triage(**request), list(requests),
+                                 concurrency, return_exceptions)
@@ -0,0 +1,44 @@
+"""Typed response models mirroring the Doctor Bot API.
+
+Unknown fields are kept (``extra="allow"``) so a newer server does not
+break an older client.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class APIModel(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+
+class RetrieveResponse(APIModel):
+    """Body of POST /retrieve."""
+
+    query: str
+    hits: List[Dict[str, Any]]
+    total_hits: int
+
+
+class FollowupQuestion(APIModel):
+    id: Optional[str] = None
+    text: str = ""
+
+
+class OrchestratorResponse(APIModel):
+    """Body of POST /triage: follow-up questions first, then the triage note."""
+
+    next_action: str
+    followup_questions: List[FollowupQuestion] = []
+    triage_note: Optional[Dict[str, Any]] = None
+    judge_verdict: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
+
+
+class HealthResponse(APIModel):
+    """Body of GET /health."""
+
+    status: str = "unknown"
+    version: Optional[str] = None
+    retriever_loaded: Optional[bool] = None
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Concurrent, resumable evaluation runner.
+
+Runs eval cases concurrently, appends each finished case to a JSONL
+checkpoint, and on restart skips cases already in the checkpoint, so a
+crash loses at most the cases in flight. Cases are fingerprinted: an
+edited case is run again, and ``--rerun-failed`` retries cases whose last
+attempt failed. ``--rate-limit`` caps requests to the API; in-process
+evaluators can wrap LLM providers with per-provider rate limits so
+concurrency does not trip provider quotas. The summary ends with the API's
+per-agent LLM usage table.
+
+    python eval_runner.py --cases eval/cases/triage.jsonl --concurrency 8 \\
+        --checkpoint reports/eval_checkpoint.jsonl --rate-limit api=4
+    python eval_runner.py --cases eval/cases/triage.jsonl --rerun-failed
+
+The default evaluator drives the two-step /triage flow of a running API;
+in-process evaluators can call ``EvalRunner.run`` with their own coroutine.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+sys.path.append('.')
+
+from simple_usage import format_usage_report
+
+Evaluator = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class TokenBucket:
+    """Async rate limiter: ``rate`` requests per second with bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class RateLimitedProvider:
+    """Wraps an async provider so every generation call waits for its bucket."""
+
+    def __init__(self, provider: Any, bucket: TokenBucket):
+        self.provider = provider
+        self.bucket = bucket
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.provider, name)
+
+    async def generate_response(self, *args, **kwargs) -> Any:
+        await self.bucket.acquire()
+        return await self.provider.generate_response(*args, **kwargs)
+
+    async def generate_structured(self, *args, **kwargs) -> Any:
+        await self.bucket.acquire()
+        return await self.provider.generate_structured(*args, **kwargs)
+
+    async def generate_structured_stream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        await self.bucket.acquire()
+        async for event in self.provider.generate_structured_stream(*args, **kwargs):
+            yield event
+
+
+def parse_rate_limits(value: Optional[str]) -> Dict[str, float]:
+    """Parse "gemini=2,ollama=5" into requests per second per provider."""
+    limits = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            limits[name.strip()] = float(rate)
+    return limits
+
+
+def rate_limit_providers(manager: Any, limits: Dict[str, float]) -> Any:
+    """Wrap the providers of an AsyncLLMManager or ProviderRouter in place."""
+    def wrap(provider: Any) -> Any:
+        rate = limits.get(getattr(provider, "provider_name", ""))
+        return RateLimitedProvider(provider, TokenBucket(rate)) if rate else provider
+
+    if hasattr(manager, "routes"):
+        for route in manager.routes:
+            route.provider = wrap(route.provider)
+    else:
+        manager.primary = wrap(manager.primary)
+        if getattr(manager, "fallback", None) is not None:
+            manager.fallback = wrap(manager.fallback)
+    return manager
+
+
+def case_id(case: Dict[str, Any], index: int) -> str:
+    return str(case.get("id") or case.get("case_id") or f"case_{index:04d}")
+
+
+def case_fingerprint(case: Dict[str, Any]) -> str:
+    """Hash of the case content, so edited cases are detected."""
+    payload = json.dumps(case, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def load_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    """Latest record per case ID; a truncated last line from a crash is ignored."""
+    records: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return records
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["case_id"]] = record
+    return records
+
+
+def select_cases(cases: List[Dict[str, Any]], checkpoint: Dict[str, Dict[str, Any]],
+                 rerun_failed: bool = False) -> List[Tuple[int, Dict[str, Any]]]:
+    """Cases still to run: new, changed, or (with rerun_failed) previously failed."""
+    pending = []
+    for index, case in enumerate(cases):
+        record = checkpoint.get(case_id(case, index))
+        if record is None or record.get("fingerprint") != case_fingerprint(case):
+            pending.append((index, case))
+        elif record.get("status") != "ok" and rerun_failed:
+            pending.append((index, case))
+    return pending
+
+
+class EvalRunner:
+    """Runs cases concurrently and checkpoints each result as it finishes."""
+
+    def __init__(self, checkpoint_path: str, concurrency: int = 8):
+        self.checkpoint_path = checkpoint_path
+        self.concurrency = concurrency
+        self.write_lock = asyncio.Lock()
+
+    def terminate_last_line(self) -> None:
+        """End a line truncated by a crash, so the next record starts on its own line."""
+        if not os.path.exists(self.checkpoint_path) or not os.path.getsize(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    async def write(self, record: Dict[str, Any]) -> None:
+        async with self.write_lock:
+            with open(self.checkpoint_path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    async def run(self, cases: List[Dict[str, Any]], evaluate: Evaluator,
+                  rerun_failed: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Evaluate pending cases; returns the checkpoint records of ``cases``."""
+        os.makedirs(os.path.dirname(self.checkpoint_path) or ".", exist_ok=True)
+        checkpoint = load_checkpoint(self.checkpoint_path)
+        self.terminate_last_line()
+        pending = select_cases(cases, checkpoint, rerun_failed)
+        print(f"{len(cases) - len(pending)} cases already done, {len(pending)} to run")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = 0
+
+        async def run_case(index: int, case: Dict[str, Any]) -> None:
+            nonlocal done
+            async with semaphore:
+                start_time = time.perf_counter()
+                record = {"case_id": case_id(case, index), "fingerprint": case_fingerprint(case)}
+                try:
+                    record.update(status="ok", result=await evaluate(case))
+                except Exception as e:
+                    record.update(status="failed", error=f"{type(e).__name__}: {e}")
+                record.update(duration_s=round(time.perf_counter() - start_time, 3), finished_at=time.time())
+            await self.write(record)
+            checkpoint[record["case_id"]] = record
+            done += 1
+            mark = "✅" if record["status"] == "ok" else "❌"
+            print(f"{mark} [{done}/{len(pending)}] {record['case_id']} ({record['duration_s']}s)")
+
+        await asyncio.gather(*(run_case(index, case) for index, case in pending))
+        # Records of cases removed from the cases file stay in the checkpoint but are not reported
+        current = {case_id(case, index) for index, case in enumerate(cases)}
+        return {name: record for name, record in checkpoint.items() if name in current}
+
+
+def load_cases(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def api_evaluator(api_url: str, limiter: Optional[TokenBucket], timeout_s: float):
+    """Evaluator running a case through both /triage steps of a running API."""
+    import httpx
+
+    client = httpx.AsyncClient(base_url=api_url, timeout=timeout_s)
+
+    async def post(payload: Dict[str, Any]) -> Dict[str, Any]:
+        if limiter is not None:
+            await limiter.acquire()
+        response = await client.post("/triage", json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def evaluate(case: Dict[str, Any]) -> Dict[str, Any]:
+        query = case.get("query") or case["patient_query"]
+        top_k = case.get("top_k", 8)
+        step_one = await post({"query": query, "top_k": top_k})
+        payload = {"query": query, "followup_answers": case.get("followup_answers", {}), "top_k": top_k}
+        if step_one.get("session_id"):
+            payload["session_id"] = step_one["session_id"]
+        step_two = await post(payload)
+        return {
+            "followup_questions": step_one.get("followup_questions", []),
+            "triage_note": step_two.get("triage_note"),
+            "judge_verdict": step_two.get("judge_verdict"),
+        }
+
+    return evaluate, client
+
+
+async def fetch_usage(client: Any) -> Optional[Dict[str, Any]]:
+    """Per-agent LLM usage summary from the API's /llm/usage, or None if unavailable."""
+    try:
+        response = await client.get("/llm/usage")
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print(f"⚠️ Could not fetch LLM usage: {e}")
+        return None
+
+
+async def main_async(args: argparse.Namespace,
+                     limits: Dict[str, float]) -> Tuple[Dict[str, Dict[str, Any]], Optional[Dict[str, Any]]]:
+    limiter = TokenBucket(limits["api"]) if "api" in limits else None
+    evaluate, client = api_evaluator(args.api_url, limiter, args.timeout)
+    async with client:
+        runner = EvalRunner(args.checkpoint, args.concurrency)
+        records = await runner.run(load_cases(args.cases), evaluate, rerun_failed=args.rerun_failed)
+        return records, await fetch_usage(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run eval cases concurrently with a resumable checkpoint")
+    parser.add_argument("--cases", required=True, help="JSONL (or JSON list) of eval cases")
+    parser.add_argument("--checkpoint", default="reports/eval_checkpoint.jsonl")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate-limit", help='Requests per second, e.g. "api=4"')
+    parser.add_argument("--rerun-failed", action="store_true", help="Retry cases whose last run failed")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    limits = parse_rate_limits(args.rate_limit)
+    providers = sorted(set(limits) - {"api"})
+    if providers:
+        # The API evaluator never sees the providers; their limits apply in-process only
+        parser.error(f"--rate-limit only accepts api=<rate> here, got {', '.join(providers)}; "
+                     "wrap in-process providers with rate_limit_providers() instead")
+
+    records, usage = asyncio.run(main_async(args, limits))
+    failed = [record["case_id"] for record in records.values() if record.get("status") != "ok"]
+    print(f"\n📊 {len(records) - len(failed)} ok, {len(failed)} failed (checkpoint: {args.checkpoint})")
+    if failed:
+        print(f"Failed: {', '.join(failed[:20])}{' ...' if len(failed) > 20 else ''}")
+    if usage is not None:
+        print("\n🤖 LLM usage per agent (API process):")
+        print(format_usage_report(usage))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Synthetic medical corpus generator for scale testing.
+
+Writes ``sections.jsonl`` records matching the Section schema (chapter,
+title, content, page_start, page_end) at a chosen multiple of the real
+corpus size. Section lengths, sentence lengths, pages per section and
+sections per chapter are resampled from a reference sections.jsonl when
+one is available (so chunk counts and token distributions stay realistic),
+otherwise drawn from log-normal defaults. Text is assembled from medical
+templates and vocabulary, never copied from the reference. Output is
+deterministic for a given seed and streamed, so 1000x corpora do not need
+to fit in memory.
+
+    python generate_corpus.py --scale 10 --output data/synthetic/sections_10x.jsonl
+    python generate_corpus.py --sections 5000 --seed 7 --output /tmp/sections.jsonl
+"""
+
+import os
+import re
+import json
+import random
+import argparse
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+REFERENCE_PATH = "data/interim/sections.jsonl"
+
+# Sections in the reference textbook when it is not available to count
+DEFAULT_BASE_SECTIONS = 1500
+
+CONDITIONS = [
+    "pneumonia", "asthma", "chronic obstructive pulmonary disease", "heart failure", "atrial fibrillation",
+    "hypertension", "type 2 diabetes", "hypothyroidism", "iron deficiency anemia", "urinary tract infection",
+    "acute kidney injury", "cirrhosis", "gastroenteritis", "peptic ulcer disease", "migraine",
+    "meningitis", "cellulitis", "gout", "rheumatoid arthritis", "deep vein thrombosis",
+    "pulmonary embolism", "sepsis", "influenza", "tuberculosis", "appendicitis",
+]
+SYMPTOMS = [
+    "fever", "cough", "dyspnea", "chest pain", "headache", "nausea", "vomiting", "fatigue",
+    "abdominal pain", "dysuria", "palpitations", "edema", "rash", "joint swelling", "weight loss",
+    "night sweats", "dizziness", "confusion", "neck stiffness", "hemoptysis",
+]
+TESTS = [
+    "complete blood count", "basic metabolic panel", "chest radiograph", "electrocardiogram",
+    "urinalysis", "blood cultures", "liver function tests", "thyroid-stimulating hormone",
+    "D-dimer", "troponin", "hemoglobin A1c", "lumbar puncture", "abdominal ultrasound", "CT scan",
+]
+TREATMENTS = [
+    "supportive care", "oral hydration", "empiric antibiotics", "inhaled bronchodilators",
+    "anticoagulation", "beta-blockers", "loop diuretics", "insulin therapy", "corticosteroids",
+    "analgesics", "antipyretics", "lifestyle modification", "surgical consultation",
+]
+TEMPLATES = [
+    "Patients with {condition} commonly present with {symptom} and {symptom2}.",
+    "The differential diagnosis of {symptom} includes {condition} and {condition2}.",
+    "A {test} is recommended when {condition} is suspected.",
+    "Initial management of {condition} consists of {treatment} and close monitoring.",
+    "{symptom} with {symptom2} should prompt evaluation with a {test}.",
+    "Risk factors for {condition} include advanced age, smoking and prior {condition2}.",
+    "In severe {condition}, {treatment} may be required alongside {treatment2}.",
+    "Persistent {symptom} despite {treatment} warrants referral and a repeat {test}.",
+    "Complications of untreated {condition} include {condition2} and progressive {symptom}.",
+    "Most patients with uncomplicated {condition} recover within days to weeks with {treatment}.",
+]
+# Clauses appended to reach longer sampled sentence lengths
+CLAUSES = [
+    ", particularly in patients with {symptom}",
+    ", and a {test} should be repeated if symptoms persist",
+    ", although {treatment} is often sufficient",
+    ", especially in older adults and those with {symptom}",
+]
+SECTION_KINDS = ["Overview", "Clinical Features", "Diagnosis", "Management", "Complications", "Prognosis"]
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class CorpusProfile:
+    """Empirical distributions that generated sections are sampled from."""
+
+    section_words: List[int] = field(default_factory=list)
+    sentence_words: List[int] = field(default_factory=list)
+    section_pages: List[int] = field(default_factory=list)
+    chapter_sections: List[int] = field(default_factory=list)
+    base_sections: int = DEFAULT_BASE_SECTIONS
+
+    def sample(self, rng: random.Random, values: List[int], mu: float, sigma: float, minimum: int = 1) -> int:
+        """Resample an observed value, or draw from a log-normal when none were observed."""
+        if values:
+            return max(minimum, rng.choice(values))
+        return max(minimum, int(rng.lognormvariate(mu, sigma)))
+
+
+def fit_profile(path: str) -> CorpusProfile:
+    """Collect length distributions from an existing sections.jsonl."""
+    profile = CorpusProfile()
+    chapters: Dict[str, int] = {}
+    count = 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            section = json.loads(line)
+            content = section.get("content") or ""
+            if not content.strip():
+                continue
+            count += 1
+            profile.section_words.append(len(content.split()))
+            profile.sentence_words.extend(
+                len(sentence.split()) for sentence in SENTENCE_SPLIT.split(content) if sentence.strip()
+            )
+            profile.section_pages.append(max(1, (section.get("page_end") or 0) - (section.get("page_start") or 0) + 1))
+            chapter = section.get("chapter") or ""
+            chapters[chapter] = chapters.get(chapter, 0) + 1
+    profile.chapter_sections = list(chapters.values())
+    profile.base_sections = count or DEFAULT_BASE_SECTIONS
+    return profile
+
+
+def make_sentence(rng: random.Random, target_words: int) -> str:
+    """A template sentence, extended with clauses until it is roughly ``target_words`` long."""
+    conditions = rng.sample(CONDITIONS, 2)
+    symptoms = rng.sample(SYMPTOMS, 2)
+    treatments = rng.sample(TREATMENTS, 2)
+    sentence = rng.choice(TEMPLATES).format(
+        condition=conditions[0], condition2=conditions[1],
+        symptom=symptoms[0], symptom2=symptoms[1],
+        test=rng.choice(TESTS), treatment=treatments[0], treatment2=treatments[1],
+    )
+    sentence = sentence.rstrip(".")
+    while len(sentence.split()) < target_words:
+        sentence += rng.choice(CLAUSES).format(
+            symptom=rng.choice(SYMPTOMS), test=rng.choice(TESTS), treatment=rng.choice(TREATMENTS)
+        )
+    return sentence[0].upper() + sentence[1:] + "."
+
+
+def generate_sections(count: int, profile: CorpusProfile, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield ``count`` section dicts in chapter order with increasing pages."""
+    rng = random.Random(seed)
+    page = 1
+    chapter = 0
+    left_in_chapter = 0
+    for _ in range(count):
+        if left_in_chapter == 0:
+            chapter += 1
+            chapter_condition = rng.choice(CONDITIONS).title()
+            left_in_chapter = profile.sample(rng, profile.chapter_sections, mu=2.5, sigma=0.5)
+        left_in_chapter -= 1
+
+        target = profile.sample(rng, profile.section_words, mu=6.0, sigma=0.8, minimum=20)
+        sentences = []
+        words = 0
+        while words < target:
+            length = profile.sample(rng, profile.sentence_words, mu=2.9, sigma=0.4, minimum=6)
+            sentence = make_sentence(rng, min(length, 80))
+            sentences.append(sentence)
+            words += len(sentence.split())
+
+        pages = profile.sample(rng, profile.section_pages, mu=0.3, sigma=0.6)
+        yield {
+            "chapter": f"Chapter {chapter}: {chapter_condition}",
+            "title": f"{rng.choice(CONDITIONS).title()}: {rng.choice(SECTION_KINDS)}",
+            "content": " ".join(sentences),
+            "page_start": page,
+            "page_end": page + pages - 1,
+        }
+        page += pages
+
+
+def write_sections(path: str, sections: Iterator[Dict[str, Any]]) -> int:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    written = 0
+    with open(path, "w") as f:
+        for section in sections:
+            f.write(json.dumps(section, ensure_ascii=False) + "\n")
+            written += 1
+            if written % 100000 == 0:
+                print(f"Wrote {written} sections...")
+    return written
+
+
+def load_profile(reference: Optional[str]) -> CorpusProfile:
+    if reference and os.path.exists(reference):
+        profile = fit_profile(reference)
+        print(f"Fitted length distributions from {reference} ({profile.base_sections} sections)")
+        return profile
+    print("No reference corpus found; using default length distributions")
+    return CorpusProfile()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic sections.jsonl for scale testing")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiple of the reference corpus size")
+    parser.add_argument("--sections", type=int, help="Exact number of sections (overrides --scale)")
+    parser.add_argument("--reference", default=REFERENCE_PATH, help="sections.jsonl to fit lengths from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="data/synthetic/sections.jsonl")
+    args = parser.parse_args()
+
+    profile = load_profile(args.reference)
+    count = args.sections or max(1, int(profile.base_sections * args.scale))
+    written = write_sections(args.output, generate_sections(count, profile, args.seed))
+    print(f"✅ Wrote {written} sections to {args.output} (seed {args.seed})")
+
+
+if __name__ == "__main__":
+    main()
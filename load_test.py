@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Offline load test for the API with stubbed LLM providers.
+
+Replays a workload of patient queries against /retrieve and both /triage
+steps and reports throughput and p50/p95/p99 latency per endpoint. Gemini
+and Ollama are replaced by stub_llm_server (started on a local port), so no
+API key is needed. By default the API runs in-process over httpx's ASGI
+transport; --url targets an already running server instead (start it with
+GEMINI_BASE_URL/OLLAMA_BASE_URL pointing at stub_llm_server to keep it offline).
+
+The in-process app is simple_api, which only serves /retrieve: /triage is
+reported as not served and the stub LLM is never called. LLM latency is only
+measured with --url against a server that exposes /triage. The in-process run
+disables the retrieval cache (RETRIEVE_CACHE_SIZE=0) so repeated workload
+queries measure retrieval, not cache hits; pass --retrieve-cache to keep it.
+
+    python load_test.py --workload data/eval/workload.jsonl --concurrency 16 --iterations 5
+    python load_test.py --url http://127.0.0.1:8000 --concurrency 32
+
+Workload files are JSONL with one object per line:
+{"query": "...", "followup_answers": {"question": "answer"}, "top_k": 8}
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import threading
+from typing import Any, Dict, List, Optional
+sys.path.append('.')
+
+import httpx
+
+from simple_usage import percentile
+from stub_llm_server import StubProfile, create_stub_app
+
+DEFAULT_WORKLOAD = [
+    {"query": "fever 3 days, chills, cough, poor appetite",
+     "followup_answers": {"How long have you had these symptoms?": "3 days",
+                          "Do you have any shortness of breath?": "No"}},
+    {"query": "chest pain radiating to left arm",
+     "followup_answers": {"When did the pain start?": "30 minutes ago",
+                          "Are you sweating or nauseous?": "Yes"}},
+    {"query": "headache and stiff neck with fever",
+     "followup_answers": {"Is light bothering your eyes?": "Yes"}},
+    {"query": "burning during urination and frequent urge",
+     "followup_answers": {"Do you have a fever?": "No", "Any back pain?": "No"}},
+    {"query": "itchy rash on both arms after hiking",
+     "followup_answers": {"Is the rash spreading?": "Slowly"}},
+]
+
+ENDPOINTS = ("retrieve", "triage_step1", "triage_step2")
+
+
+def load_workload(path: Optional[str]) -> List[Dict[str, Any]]:
+    if not path:
+        return list(DEFAULT_WORKLOAD)
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub_server(gemini: StubProfile, ollama: StubProfile, seed: Optional[int]) -> str:
+    """Serve the stub providers on a background thread and return their base URL."""
+    import uvicorn
+
+    port = free_port()
+    config = uvicorn.Config(create_stub_app(gemini, ollama, seed=seed), host="127.0.0.1",
+                            port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 10
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError("Stub LLM server did not start")
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def point_providers_at(stub_url: str) -> None:
+    """Route both providers to the stub; must run before the API is imported."""
+    os.environ["GEMINI_BASE_URL"] = stub_url
+    os.environ["OLLAMA_BASE_URL"] = stub_url
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    os.environ.setdefault("USE_OLLAMA_FALLBACK", "true")
+
+
+async def in_process_client(timeout_s: float, retrieve_cache: bool = False) -> httpx.AsyncClient:
+    """Client for the API app over the ASGI transport, after its startup work."""
+    if not retrieve_cache:
+        # The workload repeats every iteration; cache hits would hide retrieval latency
+        os.environ["RETRIEVE_CACHE_SIZE"] = "0"
+    import simple_api
+
+    # The ASGI transport does not send lifespan events, so warm up explicitly
+    await simple_api.warm_up()
+    if not simple_api.is_ready():
+        print(f"⚠️ API not ready: {simple_api.components}")
+    transport = httpx.ASGITransport(app=simple_api.app)
+    return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout_s)
+
+
+class LoadStats:
+    """Latencies and status codes per endpoint."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+        self.statuses: Dict[str, Dict[str, int]] = {name: {} for name in ENDPOINTS}
+
+    def record(self, endpoint: str, status: Any, seconds: float) -> None:
+        self.statuses[endpoint][str(status)] = self.statuses[endpoint].get(str(status), 0) + 1
+        if status == 200:
+            self.latencies[endpoint].append(seconds)
+
+    def report(self, wall_s: float) -> Dict[str, Any]:
+        report = {"wall_s": round(wall_s, 3), "endpoints": {}}
+        for endpoint in ENDPOINTS:
+            latencies = self.latencies[endpoint]
+            requests = sum(self.statuses[endpoint].values())
+            if not requests:
+                continue
+            report["endpoints"][endpoint] = {
+                "requests": requests,
+                "ok": len(latencies),
+                "statuses": self.statuses[endpoint],
+                "throughput_rps": round(len(latencies) / wall_s, 2) if wall_s else 0.0,
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            }
+        return report
+
+
+async def timed_post(client: httpx.AsyncClient, stats: LoadStats, endpoint: str, path: str,
+                     payload: Dict[str, Any]) -> Optional[httpx.Response]:
+    start_time = time.perf_counter()
+    try:
+        response = await client.post(path, json=payload)
+    except httpx.HTTPError as e:
+        stats.record(endpoint, type(e).__name__, time.perf_counter() - start_time)
+        return None
+    stats.record(endpoint, response.status_code, time.perf_counter() - start_time)
+    return response
+
+
+async def run_item(client: httpx.AsyncClient, stats: LoadStats, item: Dict[str, Any],
+                   triage_enabled: List[bool]) -> None:
+    """One simulated user: retrieval, then both triage steps."""
+    query = item["query"]
+    top_k = item.get("top_k", 8)
+    await timed_post(client, stats, "retrieve", "/retrieve", {"query": query, "top_k": top_k})
+    if not triage_enabled[0]:
+        return
+
+    step_one = await timed_post(client, stats, "triage_step1", "/triage", {"query": query, "top_k": top_k})
+    if step_one is None or step_one.status_code != 200:
+        if step_one is not None and step_one.status_code == 404 and triage_enabled[0]:
+            print("⚠️ /triage not served by this API; measuring /retrieve only")
+            triage_enabled[0] = False
+        return
+
+    payload = {"query": query, "followup_answers": item.get("followup_answers", {}), "top_k": top_k}
+    session_id = step_one.json().get("session_id")
+    if session_id:
+        payload["session_id"] = session_id
+    await timed_post(client, stats, "triage_step2", "/triage", payload)
+
+
+async def run_load(client: httpx.AsyncClient, workload: List[Dict[str, Any]], concurrency: int,
+                   iterations: int) -> Dict[str, Any]:
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(iterations):
+        for item in workload:
+            queue.put_nowait(item)
+
+    stats = LoadStats()
+    triage_enabled = [True]
+
+    async def worker():
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await run_item(client, stats, item, triage_enabled)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats.report(time.perf_counter() - start_time)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n📊 Load test finished in {report['wall_s']}s")
+    print(f"{'endpoint':<14} {'reqs':>6} {'ok':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, row in report["endpoints"].items():
+        print(f"{endpoint:<14} {row['requests']:>6} {row['ok']:>6} {row['throughput_rps']:>8} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+        errors = {status: count for status, count in row["statuses"].items() if status != "200"}
+        if errors:
+            print(f"{'':<14} non-200: {errors}")
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        stub_url = start_stub_server(
+            StubProfile(args.gemini_latency_ms, args.sigma, args.gemini_error_rate),
+            StubProfile(args.ollama_latency_ms, args.sigma, args.ollama_error_rate),
+            args.seed,
+        )
+        print(f"🧪 Stub LLM providers at {stub_url}")
+        point_providers_at(stub_url)
+        client = await in_process_client(args.timeout, args.retrieve_cache)
+
+    async with client:
+        report = await run_load(client, load_workload(args.workload), args.concurrency, args.iterations)
+    report["config"] = {key: value for key, value in vars(args).items()}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /retrieve and /triage with stubbed LLMs")
+    parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--workload", help="JSONL workload file (defaults to built-in queries)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=3, help="Passes over the workload")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--retrieve-cache", action="store_true",
+                        help="Keep the in-process retrieval cache enabled (measures cache hits on repeats)")
+    parser.add_argument("--gemini-latency-ms", type=float, default=800.0)
+    parser.add_argument("--ollama-latency-ms", type=float, default=1500.0)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--ollama-error-rate", type=float, default=0.0)
+    parser.add_argument("--sigma", type=float, default=0.5, help="Log-normal latency spread")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
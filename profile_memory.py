@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Memory profile of index load, chunking and serving.
+
+Loads each component in turn and attributes memory to it with a
+tracemalloc snapshot diff (Python allocations, with the top allocating
+lines) and RSS sampled on a background thread (which also sees native
+allocations such as the FAISS index and model weights). Phases:
+
+  tokenizer, embedding_model, faiss_index, mapping, chunk_objects,
+  chunking, retriever, requests (per-request allocations in retrieve_documents)
+
+    python profile_memory.py --top 15 --requests 50 --output reports/memory_profile.json
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+sys.path.append('.')
+
+INDEX_PATH = "data/processed/faiss.index"
+MAPPING_PATH = "data/processed/mapping.json"
+CHUNKS_PATH = "data/processed/chunks.jsonl"
+SECTIONS_PATH = "data/interim/sections.jsonl"
+DEFAULT_ENCODER = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+
+MB = 1024 * 1024
+
+
+def current_rss() -> int:
+    """Resident set size in bytes."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RSSSampler:
+    """Samples RSS on a background thread to catch peaks inside a phase."""
+
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.peak = 0
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "RSSSampler":
+        self.peak = current_rss()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self) -> None:
+        while self.running:
+            self.peak = max(self.peak, current_rss())
+            time.sleep(self.interval_s)
+
+    def __exit__(self, *exc) -> None:
+        self.running = False
+        self.thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def top_allocators(stats: List[tracemalloc.StatisticDiff], top: int) -> List[Dict[str, Any]]:
+    """Lines that grew the most between two snapshots."""
+    return [
+        {"location": str(stat.traceback[0]), "size_mb": round(stat.size_diff / MB, 3), "count": stat.count_diff}
+        for stat in sorted(stats, key=lambda stat: stat.size_diff, reverse=True)[:top]
+        if stat.size_diff > 0
+    ]
+
+
+class MemoryProfiler:
+    """Runs phases and records RSS and tracemalloc deltas for each."""
+
+    def __init__(self, top: int = 10):
+        self.top = top
+        self.phases: List[Dict[str, Any]] = []
+        self.keep: Dict[str, Any] = {}
+        tracemalloc.start(25)
+        gc.collect()
+        self.snapshot = tracemalloc.take_snapshot()
+        self.rss = current_rss()
+        self.rss_start = self.rss
+
+    def phase(self, name: str, func: Callable[[], Any]) -> Any:
+        """Run ``func`` and attribute the memory it retains to ``name``."""
+        print(f"▶ {name}...")
+        start_time = time.perf_counter()
+        try:
+            with RSSSampler() as sampler:
+                result = func()
+        except Exception as e:
+            print(f"  skipped: {e}")
+            self.phases.append({"phase": name, "skipped": str(e)})
+            return None
+        # Keep the result alive so later snapshots still count it
+        self.keep[name] = result
+        duration = time.perf_counter() - start_time
+        gc.collect()
+
+        snapshot = tracemalloc.take_snapshot()
+        stats = snapshot.compare_to(self.snapshot, "lineno")
+        rss = current_rss()
+        record = {
+            "phase": name,
+            "duration_s": round(duration, 3),
+            "rss_delta_mb": round((rss - self.rss) / MB, 2),
+            "rss_peak_delta_mb": round((max(sampler.peak, rss) - self.rss) / MB, 2),
+            "traced_delta_mb": round(sum(stat.size_diff for stat in stats) / MB, 2),
+            "top_allocators": top_allocators(stats, self.top),
+        }
+        self.phases.append(record)
+        self.snapshot, self.rss = snapshot, rss
+        print(f"  RSS {record['rss_delta_mb']:+.1f} MB (peak {record['rss_peak_delta_mb']:+.1f}), "
+              f"Python {record['traced_delta_mb']:+.1f} MB")
+        return result
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "rss_start_mb": round(self.rss_start / MB, 2),
+            "rss_end_mb": round(current_rss() / MB, 2),
+            "phases": self.phases,
+        }
+
+
+def load_sections(path: str, limit: int) -> List[Any]:
+    from rag.schemas import Section
+
+    if os.path.exists(path):
+        with open(path) as f:
+            return [Section(**json.loads(line)) for _, line in zip(range(limit), f) if line.strip()]
+    from benchmark_perf import synthetic_sections
+    return [Section(**data) for data in synthetic_sections()]
+
+
+def load_chunk_objects(path: str) -> List[Any]:
+    from rag.schemas import Chunk
+
+    with open(path) as f:
+        return [Chunk(**json.loads(line)) for line in f if line.strip()]
+
+
+def profile_requests(profiler: MemoryProfiler, count: int) -> Optional[Dict[str, Any]]:
+    """Average Python allocations retained and peaked per /retrieve call."""
+    import simple_api
+
+    simple_api.retriever = profiler.keep.get("retriever")
+    if simple_api.retriever is None:
+        print("▶ requests... skipped: retriever not loaded")
+        return None
+    from benchmark_perf import synthetic_queries
+
+    queries = synthetic_queries(count)
+    print(f"▶ requests ({count})...")
+
+    async def run() -> List[int]:
+        peaks = []
+        for query in queries:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            # Distinct queries, so the retrieval cache never short-circuits
+            await simple_api.retrieve_documents(simple_api.RetrieveRequest(query=f"{query} #{len(peaks)}"))
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        return peaks
+
+    snapshot = tracemalloc.take_snapshot()
+    peaks = asyncio.run(run())
+    gc.collect()
+    stats = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+    retained = sum(stat.size_diff for stat in stats)
+    record = {
+        "phase": "requests",
+        "requests": count,
+        "peak_per_request_kb": round(sum(peaks) / len(peaks) / 1024, 1),
+        "retained_per_request_kb": round(retained / count / 1024, 1),
+        "top_allocators": top_allocators(stats, profiler.top),
+    }
+    profiler.phases.append(record)
+    print(f"  peak {record['peak_per_request_kb']} KB/request, "
+          f"retained {record['retained_per_request_kb']} KB/request (includes cache entries)")
+    return record
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n🧠 RSS {report['rss_start_mb']} MB → {report['rss_end_mb']} MB")
+    print(f"{'phase':<18} {'RSS Δ MB':>10} {'peak Δ MB':>10} {'Python Δ MB':>12}")
+    for phase in report["phases"]:
+        if "rss_delta_mb" in phase:
+            print(f"{phase['phase']:<18} {phase['rss_delta_mb']:>10} {phase['rss_peak_delta_mb']:>10} "
+                  f"{phase['traced_delta_mb']:>12}")
+    for phase in report["phases"]:
+        if phase.get("top_allocators"):
+            print(f"\nTop allocators: {phase['phase']}")
+            for item in phase["top_allocators"][:5]:
+                print(f"  {item['size_mb']:>9.3f} MB  {item['location']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Attribute memory to index, models, chunking and requests")
+    parser.add_argument("--encoder", default=DEFAULT_ENCODER)
+    parser.add_argument("--sections", default=SECTIONS_PATH)
+    parser.add_argument("--max-sections", type=int, default=500, help="Sections to chunk in the chunking phase")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--top", type=int, default=10, help="Top allocating lines kept per phase")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    profiler = MemoryProfiler(top=args.top)
+
+    def load_tokenizer():
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(args.encoder)
+
+    def load_encoder():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(args.encoder)
+
+    def load_index():
+        import faiss
+        return faiss.read_index(INDEX_PATH)
+
+    def load_mapping():
+        with open(MAPPING_PATH) as f:
+            return json.load(f)
+
+    def chunk_sections():
+        from simple_chunker import SimpleChunker
+        return SimpleChunker(target_tokens=300).create_chunks(load_sections(args.sections, args.max_sections))
+
+    def load_retriever():
+        from rag.retriever import create_retriever
+        return create_retriever(index_path=INDEX_PATH, mapping_path=MAPPING_PATH)
+
+    profiler.phase("tokenizer", load_tokenizer)
+    profiler.phase("embedding_model", load_encoder)
+    profiler.phase("faiss_index", load_index)
+    profiler.phase("mapping", load_mapping)
+    profiler.phase("chunk_objects", lambda: load_chunk_objects(CHUNKS_PATH))
+    profiler.phase("chunking", chunk_sections)
+    # The retriever loads its own index, mapping and model; the delta shows what is not shared
+    profiler.phase("retriever", load_retriever)
+    profile_requests(profiler, args.requests)
+
+    report = profiler.report()
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,30 @@
 
 import os
 import sys
+import time
+import asyncio
 sys.path.append('.')
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import json
 
 from rag.retriever import create_retriever
 from rag.schemas import RetrievalHit
+from simple_metrics import (
+    REQUEST_SECONDS,
+    format_server_timing,
+    render_metrics,
+    start_request_timings,
+    time_stage,
+)
+from simple_profiler import create_profiler
+from simple_retrieval_cache import RetrievalCache, compute_index_version
+from simple_scheduler import AdmissionRejected, create_admission_controller, is_emergent_query
+from simple_usage import usage_ledger
 
 # Create FastAPI app
 app = FastAPI(
@@ -30,32 +44,183 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-endpoint concurrency caps and bounded queues
+admission = create_admission_controller()
+
+# Opt-in slow-request profiler (enabled via PROFILE_SLOW_MS)
+profiler = create_profiler()
+
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    """Record request latency, add a Server-Timing header and profile slow requests."""
+    start_time = time.perf_counter()
+    timings = start_request_timings()
+    recording = profiler.start()
+    status = 500
+    response = None
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        duration = time.perf_counter() - start_time
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        REQUEST_SECONDS.observe(duration, method=request.method, path=path, status=status)
+        if response is not None:
+            response.headers["Server-Timing"] = format_server_timing(timings, duration)
+        if recording is not None:
+            try:
+                # Writing the profile blocks; keep it off the event loop
+                profile_path = await asyncio.to_thread(
+                    profiler.finish, recording, request.method, path, status, duration, timings
+                )
+                if profile_path:
+                    print(f"Slow request profile written to {profile_path}")
+            except OSError as e:
+                print(f"Error writing request profile: {e}")
+
+# Index files
+INDEX_PATH = "data/processed/faiss.index"
+MAPPING_PATH = "data/processed/mapping.json"
+
 # Global retriever
 retriever = None
+reload_task = None
+reload_pending = False
+
+# How long the index files must stay unchanged before a reload reads them
+INDEX_RELOAD_SETTLE_S = float(os.getenv("INDEX_RELOAD_SETTLE_S", "2"))
+
+def reload_on_index_change(version: str):
+    """Reload the retriever in the background when the index files change."""
+    global reload_task, reload_pending
+    # Before the first load finishes, that load picks up the new files itself
+    if retriever is None:
+        return
+    if reload_task is not None and not reload_task.done():
+        # A rebuild writes faiss.index and mapping.json separately; reload once more afterwards
+        reload_pending = True
+        return
+    reload_task = asyncio.create_task(reload_retriever(version))
+
+# Result cache in front of retriever.retrieve, invalidated when the index files change
+retrieval_cache = RetrievalCache(
+    index_paths=[INDEX_PATH, MAPPING_PATH],
+    max_entries=int(os.getenv("RETRIEVE_CACHE_SIZE", "1024")),
+    on_change=reload_on_index_change
+)
+
+# Queries run once after loading to prime the tokenizer and model kernels
+WARMUP_QUERIES = ["chest pain", "fever and cough", "headache and neck stiffness"]
+
+# Load state of each startup component, reported by the health probes
+STARTED_AT = time.time()
+components = {
+    "retriever": {"state": "pending", "duration_s": None, "error": None},
+    "warmup": {"state": "pending", "duration_s": None, "error": None},
+}
+warmup_task = None
 
 class RetrieveRequest(BaseModel):
     query: str
     top_k: Optional[int] = 8
+    use_reranker: Optional[bool] = False
 
 class RetrieveResponse(BaseModel):
     query: str
     hits: List[dict]
     total_hits: int
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize the retriever on startup."""
+def load_retriever():
+    """Load the FAISS index, chunk mapping and embedding model."""
     global retriever
+    retriever = create_retriever(
+        index_path=INDEX_PATH,
+        mapping_path=MAPPING_PATH
+    )
+
+async def wait_for_stable_index() -> str:
+    """Wait until the index files have not changed for INDEX_RELOAD_SETTLE_S seconds."""
+    version = compute_index_version([INDEX_PATH, MAPPING_PATH])
+    while True:
+        await asyncio.sleep(INDEX_RELOAD_SETTLE_S)
+        current = compute_index_version([INDEX_PATH, MAPPING_PATH])
+        if current == version:
+            return version
+        version = current
+
+async def reload_retriever(version: str):
+    """Swap in a retriever for the rebuilt index; the old one serves until it is ready."""
+    global retriever, reload_pending
+    print(f"Index changed (version {version}), reloading retriever...")
+    while True:
+        reload_pending = False
+        version = await wait_for_stable_index()
+        try:
+            new_retriever = await asyncio.to_thread(
+                create_retriever,
+                index_path=INDEX_PATH,
+                mapping_path=MAPPING_PATH
+            )
+        except Exception as e:
+            # E.g. the index is still being written; the next change retries
+            print(f"Error reloading retriever: {e}")
+        else:
+            retriever = new_retriever
+            # Drop results the old retriever cached while the new one was loading
+            retrieval_cache.clear()
+            print(f"Retriever reloaded (index version {version})!")
+        # Files changed while loading, whether or not a request noticed it
+        if compute_index_version([INDEX_PATH, MAPPING_PATH]) != version:
+            reload_pending = True
+        if not reload_pending:
+            return
+
+def run_warmup_queries():
+    """Run a few throwaway queries so the first real request is not cold."""
+    for query in WARMUP_QUERIES:
+        retriever.retrieve(query=query, top_k=1, use_reranker=False)
+
+async def run_component(name: str, func) -> bool:
+    """Run a blocking startup step in a worker thread and record its state."""
+    component = components[name]
+    component["state"] = "loading"
+    start_time = time.time()
     try:
-        print("Loading retriever...")
-        retriever = create_retriever(
-            index_path="data/processed/faiss.index",
-            mapping_path="data/processed/mapping.json"
-        )
-        print("Retriever loaded successfully!")
+        await asyncio.to_thread(func)
+        component["state"] = "ready"
+        return True
     except Exception as e:
-        print(f"Error loading retriever: {e}")
-        raise
+        component["state"] = "failed"
+        component["error"] = str(e)
+        print(f"Error during {name} startup: {e}")
+        return False
+    finally:
+        component["duration_s"] = round(time.time() - start_time, 3)
+
+async def warm_up():
+    """Load the retriever and warm it up without blocking server startup."""
+    print("Loading retriever...")
+    if not await run_component("retriever", load_retriever):
+        components["warmup"]["state"] = "skipped"
+        return
+    print("Retriever loaded successfully!")
+    if await run_component("warmup", run_warmup_queries):
+        print("Warm-up queries completed!")
+
+def is_ready() -> bool:
+    """Whether the server can take retrieval traffic."""
+    return (
+        components["retriever"]["state"] == "ready"
+        and components["warmup"]["state"] in ("ready", "failed")
+    )
+
+@app.on_event("startup")
+async def startup_event():
+    """Start loading the retriever in the background."""
+    global warmup_task
+    warmup_task = asyncio.create_task(warm_up())
 
 @app.get("/health")
 async def health_check():
@@ -66,43 +231,105 @@ async def health_check():
         "retriever_loaded": retriever is not None
     }
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests."""
+    return {
+        "status": "alive",
+        "uptime_s": round(time.time() - STARTED_AT, 3)
+    }
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the retriever is loaded and warmed up."""
+    ready = is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "components": components,
+            "admission": admission.stats()
+        }
+    )
+
 @app.post("/retrieve", response_model=RetrieveResponse)
 async def retrieve_documents(request: RetrieveRequest):
     """Retrieve relevant documents for a query."""
     if retriever is None:
-        raise HTTPException(status_code=500, detail="Retriever not loaded")
+        raise HTTPException(status_code=503, detail="Retriever not loaded yet")
     
-    try:
-        # Retrieve documents
-        hits = retriever.retrieve(
+    # Serve repeat queries without touching the retriever or the admission queue
+    cache_key = retrieval_cache.make_key(request.query, request.top_k, bool(request.use_reranker))
+    cached_hits = retrieval_cache.get(cache_key)
+    if cached_hits is not None:
+        return RetrieveResponse(
             query=request.query,
-            top_k=request.top_k,
-            use_reranker=False
+            hits=cached_hits,
+            total_hits=len(cached_hits)
         )
+    
+    try:
+        async with admission.admit("retrieve", priority=is_emergent_query(request.query)):
+            # Retrieve documents
+            with time_stage("retrieval"):
+                hits = await asyncio.to_thread(
+                    retriever.retrieve,
+                    query=request.query,
+                    top_k=request.top_k,
+                    use_reranker=bool(request.use_reranker)
+                )
         
-        # Convert hits to dict format
-        hits_dict = []
-        for hit in hits:
-            hits_dict.append({
-                "chunk_id": hit.chunk_id,
-                "score": hit.score,
-                "text": hit.text[:200] + "..." if len(hit.text) > 200 else hit.text,
-                "metadata": {
-                    "section": hit.metadata.section,
-                    "page_start": hit.metadata.page_start,
-                    "page_end": hit.metadata.page_end
-                }
-            })
+            # Convert hits to dict format
+            with time_stage("serialization"):
+                hits_dict = []
+                for hit in hits:
+                    hits_dict.append({
+                        "chunk_id": hit.chunk_id,
+                        "score": hit.score,
+                        "text": hit.text[:200] + "..." if len(hit.text) > 200 else hit.text,
+                        "metadata": {
+                            "section": hit.metadata.section,
+                            "page_start": hit.metadata.page_start,
+                            "page_end": hit.metadata.page_end
+                        }
+                    })
+            
+                response = RetrieveResponse(
+                    query=request.query,
+                    hits=hits_dict,
+                    total_hits=len(hits_dict)
+                )
         
-        return RetrieveResponse(
-            query=request.query,
-            hits=hits_dict,
-            total_hits=len(hits_dict)
-        )
+            retrieval_cache.put(cache_key, hits_dict)
+            return response
         
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during retrieval: {str(e)}")
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit-rate statistics of the retrieval result cache."""
+    return {"retrieve": retrieval_cache.stats()}
+
+@app.get("/llm/usage")
+async def llm_usage(recent: int = 0):
+    """Per-agent LLM token and latency aggregates, optionally with the most recent calls."""
+    summary = usage_ledger.summary()
+    if recent > 0:
+        summary["recent"] = usage_ledger.recent(recent)
+    return summary
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics for this process."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -110,7 +337,11 @@ async def root():
         "message": "Doctor Bot API",
         "version": "0.1.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "liveness": "/health/live",
+        "readiness": "/health/ready",
+        "metrics": "/metrics",
+        "llm_usage": "/llm/usage"
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Token-budgeted context packing for the triage prompt.
+
+Chunks are built with sentence overlap, so neighbouring hits repeat text.
+The packer merges adjacent or overlapping hits from the same section,
+drops sentences already included, and fills a token budget in score
+order. Every sentence remembers the chunks it came from, so a passage
+cites only the chunks whose text survived packing.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+# Same sentence boundary rule as SimpleChunker.split_text
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+CHUNK_NUMBER = re.compile(r"(\d+)$")
+
+# Smallest leftover budget worth filling with a truncated passage
+MIN_PARTIAL_TOKENS = 40
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, matching the chunker's fallback estimate."""
+    return int(len(text.split()) * 1.3)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_SPLIT.split(text) if s.strip()]
+
+
+def normalize_sentence(sentence: str) -> str:
+    return " ".join(sentence.lower().split())
+
+
+def hit_field(hit: Any, name: str, default: Any = None) -> Any:
+    """Read a field from a RetrievalHit object or a hit dict."""
+    if isinstance(hit, dict):
+        return hit.get(name, default)
+    return getattr(hit, name, default)
+
+
+def hit_meta(hit: Any, name: str, default: Any = None) -> Any:
+    metadata = hit_field(hit, "metadata")
+    if metadata is None:
+        return default
+    return hit_field(metadata, name, default)
+
+
+def chunk_number(chunk_id: str) -> Optional[int]:
+    match = CHUNK_NUMBER.search(chunk_id or "")
+    return int(match.group(1)) if match else None
+
+
+@dataclass
+class Passage:
+    """One or more merged hits from the same section."""
+
+    chunk_ids: List[str]
+    section: str
+    page_start: Optional[int]
+    page_end: Optional[int]
+    score: float
+    sentences: List[str] = field(default_factory=list)
+    # Chunk IDs each sentence appeared in, parallel to ``sentences``
+    sources: List[List[str]] = field(default_factory=list)
+    tokens: int = 0
+
+    def keep(self, indices: List[int]) -> List[str]:
+        """Keep only the given sentences; returns the chunk IDs no longer cited."""
+        self.sentences = [self.sentences[i] for i in indices]
+        self.sources = [self.sources[i] for i in indices]
+        cited = {chunk_id for ids in self.sources for chunk_id in ids}
+        removed = [chunk_id for chunk_id in self.chunk_ids if chunk_id not in cited]
+        self.chunk_ids = [chunk_id for chunk_id in self.chunk_ids if chunk_id in cited]
+        return removed
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.sentences)
+
+    def render(self) -> str:
+        pages = ""
+        if self.page_start is not None and self.page_end not in (None, self.page_start):
+            pages = f" (pp. {self.page_start}-{self.page_end})"
+        elif self.page_start is not None:
+            pages = f" (p. {self.page_start})"
+        return f"[{', '.join(self.chunk_ids)}] {self.section}{pages}\n{self.text}"
+
+
+@dataclass
+class PackedContext:
+    """Result of packing: prompt text plus what was kept and dropped."""
+
+    text: str
+    passages: List[Passage]
+    tokens: int
+    budget: int
+    dropped_chunk_ids: List[str]
+
+    @property
+    def chunk_ids(self) -> List[str]:
+        return [chunk_id for passage in self.passages for chunk_id in passage.chunk_ids]
+
+
+def merge_hits(hits: List[Any]) -> List[Passage]:
+    """Group adjacent or overlapping hits of the same section into passages."""
+    ordered = sorted(
+        hits,
+        key=lambda hit: (hit_meta(hit, "section", "") or "", chunk_number(hit_field(hit, "chunk_id", "")) or 0),
+    )
+    passages: List[Passage] = []
+    last_number: Optional[int] = None
+    for hit in ordered:
+        chunk_id = hit_field(hit, "chunk_id", "")
+        section = hit_meta(hit, "section", "") or ""
+        number = chunk_number(chunk_id)
+        sentences = split_sentences(hit_field(hit, "text", "") or "")
+        score = float(hit_field(hit, "score", 0.0) or 0.0)
+
+        current = passages[-1] if passages else None
+        if current is not None and current.section == section:
+            adjacent = number is not None and last_number is not None and number - last_number == 1
+            seen = {normalize_sentence(s): i for i, s in enumerate(current.sentences)}
+            overlapping = any(normalize_sentence(s) in seen for s in sentences)
+            if adjacent or overlapping:
+                current.chunk_ids.append(chunk_id)
+                for sentence in sentences:
+                    index = seen.get(normalize_sentence(sentence))
+                    if index is None:
+                        current.sentences.append(sentence)
+                        current.sources.append([chunk_id])
+                    elif chunk_id not in current.sources[index]:
+                        current.sources[index].append(chunk_id)
+                current.score = max(current.score, score)
+                page_end = hit_meta(hit, "page_end")
+                if page_end is not None and (current.page_end is None or page_end > current.page_end):
+                    current.page_end = page_end
+                last_number = number
+                continue
+
+        passages.append(Passage(
+            chunk_ids=[chunk_id],
+            section=section,
+            page_start=hit_meta(hit, "page_start"),
+            page_end=hit_meta(hit, "page_end"),
+            score=score,
+            sentences=list(sentences),
+            sources=[[chunk_id] for _ in sentences],
+        ))
+        last_number = number
+    return passages
+
+
+def pack_context(hits: List[Any], token_budget: Optional[int] = None,
+                 count_tokens: Callable[[str], int] = estimate_tokens) -> PackedContext:
+    """Merge, deduplicate and pack hits into at most ``token_budget`` tokens.
+
+    ``count_tokens`` can be swapped for a real tokenizer count, e.g.
+    ``SimpleChunker().count_tokens``.
+    """
+    if token_budget is None:
+        token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+
+    passages = sorted(merge_hits(hits), key=lambda passage: passage.score, reverse=True)
+    seen: set = set()
+    packed: List[Passage] = []
+    dropped: List[str] = []
+    used = 0
+
+    for passage in passages:
+        # Drop sentences another, higher-scoring passage already contributed
+        fresh = [i for i, sentence in enumerate(passage.sentences) if normalize_sentence(sentence) not in seen]
+        if not fresh:
+            dropped.extend(passage.chunk_ids)
+            continue
+
+        header_tokens = count_tokens(" ".join(passage.chunk_ids) + " " + passage.section)
+        remaining = token_budget - used - header_tokens
+        kept = []
+        tokens = 0
+        for i in fresh:
+            sentence_tokens = count_tokens(passage.sentences[i])
+            if tokens + sentence_tokens > remaining:
+                break
+            kept.append(i)
+            tokens += sentence_tokens
+
+        whole = len(kept) == len(fresh)
+        if not kept or (not whole and tokens < MIN_PARTIAL_TOKENS):
+            dropped.extend(passage.chunk_ids)
+            continue
+
+        # Chunks whose sentences were all cut or deduplicated are no longer cited
+        dropped.extend(passage.keep(kept))
+        passage.tokens = tokens + count_tokens(" ".join(passage.chunk_ids) + " " + passage.section)
+        used += passage.tokens
+        seen.update(normalize_sentence(s) for s in passage.sentences)
+        packed.append(passage)
+
+    text = "\n\n".join(passage.render() for passage in packed)
+    return PackedContext(text=text, passages=packed, tokens=used, budget=token_budget, dropped_chunk_ids=dropped)
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Content-addressed, SQLite-backed cache for LLM responses.
+
+``AsyncLLMManager`` and ``ProviderRouter`` consult it for every
+``generate_response``/``generate_structured`` call of an opted-in agent,
+and ``cached_client`` wraps blocking clients exposing the same methods
+(such as ``llm.providers.get_llm_client()``). Entries are keyed on
+provider, model, prompt, input variables and output schema, expire after
+a TTL and are evicted least-recently-used beyond a maximum entry count.
+"""
+
+import os
+import asyncio
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from simple_metrics import CACHE_HITS, CACHE_MISSES
+from simple_usage import cache_scope, usage_ledger
+
+# Agents cached unless LLM_CACHE_AGENTS says otherwise
+DEFAULT_CACHED_AGENTS = "followup,triage,judge"
+
+
+def describe_client(client: Any) -> Tuple[str, str]:
+    """Best-effort provider and model names of an LLM client."""
+    provider = (
+        getattr(client, "provider_name", None)
+        or getattr(client, "provider", None)
+        or type(client).__name__
+    )
+    model = getattr(client, "model_name", None) or getattr(client, "model", None) or ""
+    return str(provider), str(model)
+
+
+def schema_fingerprint(output_schema: Any) -> str:
+    """Stable description of an output schema (pydantic model or plain type)."""
+    if hasattr(output_schema, "model_json_schema"):
+        return json.dumps(output_schema.model_json_schema(), sort_keys=True)
+    return getattr(output_schema, "__name__", repr(output_schema))
+
+
+def make_cache_key(provider: str, model: str, kind: str, prompt: str,
+                   input_vars: Optional[Dict[str, Any]] = None, schema: str = "") -> str:
+    """Hash everything that can change an LLM response."""
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "kind": kind,
+            "prompt": prompt,
+            "input_vars": input_vars or {},
+            "schema": schema,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def response_key(provider: str, model: str, prompt: str, kwargs: Dict[str, Any]) -> str:
+    return make_cache_key(provider, model, "response", prompt, kwargs)
+
+
+def structured_key(provider: str, model: str, system_prompt: str, input_vars: Dict[str, Any],
+                   output_schema: Any) -> str:
+    return make_cache_key(provider, model, "structured", system_prompt, input_vars,
+                          schema_fingerprint(output_schema))
+
+
+def encode_result(result: Any) -> str:
+    data = result.model_dump(mode="json") if hasattr(result, "model_dump") else result
+    return json.dumps(data, default=str)
+
+
+def decode_result(cached: str, output_schema: Any = None) -> Any:
+    data = json.loads(cached)
+    if hasattr(output_schema, "model_validate"):
+        return output_schema.model_validate(data)
+    return data
+
+
+class LLMResponseCache:
+    """SQLite store with TTL expiry and LRU eviction."""
+
+    def __init__(self, path: str = "data/cache/llm_cache.sqlite", ttl_s: float = 7 * 24 * 3600,
+                 max_entries: int = 10000):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.agent_stats: Dict[str, Dict[str, int]] = {}
+        self.writes_since_evict = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " agent TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    @contextmanager
+    def connect(self):
+        """Open a connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, agent: str, hit: bool) -> None:
+        with self.lock:
+            stats = self.agent_stats.setdefault(agent, {"hits": 0, "misses": 0})
+            stats["hits" if hit else "misses"] += 1
+        if hit:
+            CACHE_HITS.inc(cache=f"llm_{agent}")
+        else:
+            CACHE_MISSES.inc(cache=f"llm_{agent}")
+
+    def get(self, key: str, agent: str) -> Optional[str]:
+        """Return a cached value, or None if missing or expired."""
+        now = time.time()
+        with self.lock, self.connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_s:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self.record(agent, row is not None)
+        return row[0] if row is not None else None
+
+    def put(self, key: str, agent: str, value: str) -> None:
+        now = time.time()
+        with self.lock, self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, agent, value, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, agent, value, now, now),
+            )
+            self.writes_since_evict += 1
+            if self.writes_since_evict >= 100:
+                self.writes_since_evict = 0
+                self.evict(conn)
+
+    def evict(self, conn: Optional[sqlite3.Connection] = None) -> None:
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        if conn is None:
+            with self.lock, self.connect() as conn:
+                self.evict(conn)
+            return
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_s,))
+        conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        with self.lock, self.connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            agents = {}
+            for agent, counts in self.agent_stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                agents[agent] = dict(counts, hit_rate=round(counts["hits"] / lookups, 4) if lookups else 0.0)
+        with self.connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"path": self.path, "entries": entries, "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s, "agents": agents}
+
+
+class CachedLLMClient:
+    """Drop-in wrapper that serves repeated LLM calls from an LLMResponseCache."""
+
+    def __init__(self, client: Any, cache: LLMResponseCache, agent: str, enabled: bool = True):
+        self.client = client
+        self.cache = cache
+        self.agent = agent
+        self.enabled = enabled
+        self.provider, self.model = describe_client(client)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def call_client(self, method: str, *args, **kwargs) -> Any:
+        """Call the wrapped client on a cache miss, recording the call in the usage ledger."""
+        start_time = time.perf_counter()
+        try:
+            result = getattr(self.client, method)(*args, **kwargs)
+        except Exception:
+            usage_ledger.record(self.provider, self.model, time.perf_counter() - start_time,
+                                agent=self.agent, cache="miss", ok=False)
+            raise
+        usage_ledger.record(self.provider, self.model, time.perf_counter() - start_time,
+                            agent=self.agent, cache="miss")
+        return result
+
+    def record_hit(self, start_time: float) -> None:
+        usage_ledger.record(self.provider, self.model, time.perf_counter() - start_time,
+                            agent=self.agent, cache="hit")
+
+    def generate_response(self, prompt: str, **kwargs) -> str:
+        if not self.enabled:
+            return self.client.generate_response(prompt, **kwargs)
+
+        start_time = time.perf_counter()
+        key = response_key(self.provider, self.model, prompt, kwargs)
+        cached = self.cache.get(key, self.agent)
+        if cached is not None:
+            self.record_hit(start_time)
+            return decode_result(cached)
+
+        response = self.call_client("generate_response", prompt, **kwargs)
+        self.cache.put(key, self.agent, encode_result(response))
+        return response
+
+    def generate_structured(self, system_prompt: str, input_vars: Dict[str, Any], output_schema: Any,
+                            **kwargs) -> Any:
+        if not self.enabled:
+            return self.client.generate_structured(system_prompt, input_vars, output_schema, **kwargs)
+
+        start_time = time.perf_counter()
+        key = structured_key(self.provider, self.model, system_prompt, dict(input_vars, **kwargs), output_schema)
+        cached = self.cache.get(key, self.agent)
+        if cached is not None:
+            self.record_hit(start_time)
+            return decode_result(cached, output_schema)
+
+        result = self.call_client("generate_structured", system_prompt, input_vars, output_schema, **kwargs)
+        self.cache.put(key, self.agent, encode_result(result))
+        return result
+
+
+# Process-wide cache, created on first use
+_shared_cache: Optional[LLMResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the shared cache configured from LLM_CACHE_* environment variables."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = LLMResponseCache(
+                path=os.getenv("LLM_CACHE_PATH", "data/cache/llm_cache.sqlite"),
+                ttl_s=float(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600))),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+            )
+        return _shared_cache
+
+
+def is_agent_cached(agent: str) -> bool:
+    """Whether an agent opted in via LLM_CACHE_ENABLED and LLM_CACHE_AGENTS."""
+    if os.getenv("LLM_CACHE_ENABLED", "false").lower() != "true":
+        return False
+    agents = os.getenv("LLM_CACHE_AGENTS", DEFAULT_CACHED_AGENTS)
+    return agent in [name.strip() for name in agents.split(",") if name.strip()]
+
+
+def cached_client(client: Any, agent: str) -> Any:
+    """Wrap an LLM client for one agent, or return it unchanged if caching is off."""
+    if not is_agent_cached(agent):
+        return client
+    return CachedLLMClient(client, get_llm_cache(), agent)
+
+
+def first_provider(llm: Any) -> Any:
+    """The provider an AsyncLLMManager or ProviderRouter asks first."""
+    return llm.routes[0].provider if hasattr(llm, "routes") else llm.primary
+
+
+def call_key(llm: Any, method: str, args: Tuple) -> Optional[str]:
+    """Cache key of an async manager or router call, or None if the method is not cached.
+
+    Keys use the first provider's names, so an answer served by a
+    fallback is stored under the provider that was asked.
+    """
+    provider, model = describe_client(first_provider(llm))
+    if method == "generate_response":
+        prompt, system_prompt = args
+        return response_key(provider, model, prompt, {"system_prompt": system_prompt} if system_prompt else {})
+    if method == "generate_structured":
+        system_prompt, input_vars, output_schema = args
+        return structured_key(provider, model, system_prompt, input_vars, output_schema)
+    return None
+
+
+async def cached_llm_call(llm: Any, method: str, args: Tuple, agent: Optional[str],
+                          call: Callable[[], Awaitable[Any]],
+                          cache: Optional[LLMResponseCache] = None) -> Any:
+    """Serve an AsyncLLMManager/ProviderRouter call from the cache when its agent opted in."""
+    key = call_key(llm, method, args) if agent and is_agent_cached(agent) else None
+    if key is None:
+        return await call()
+
+    cache = cache or get_llm_cache()
+    output_schema = args[2] if method == "generate_structured" else None
+    start_time = time.perf_counter()
+    # SQLite I/O runs in a worker thread to keep the event loop free
+    cached = await asyncio.to_thread(cache.get, key, agent)
+    if cached is not None:
+        provider, model = describe_client(first_provider(llm))
+        usage_ledger.record(provider, model, time.perf_counter() - start_time, agent=agent, cache="hit")
+        return decode_result(cached, output_schema)
+
+    with cache_scope("miss"):
+        result = await call()
+    await asyncio.to_thread(cache.put, key, agent, encode_result(result))
+    return result
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""Async Gemini and Ollama providers on a shared, pooled httpx.AsyncClient.
+
+The blocking providers hold a worker for the whole LLM call. These talk
+to the REST APIs directly over one keep-alive connection pool (HTTP/2
+when the ``h2`` package is installed), so a single process can keep many
+LLM calls in flight.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from simple_llm_cache import cached_llm_call
+from simple_metrics import PROVIDER_FALLBACKS, time_stage
+from simple_stream_json import FieldValidator, IncrementalJSONParser
+from simple_usage import agent_scope, usage_ledger
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com"
+DEFAULT_GEMINI_MODEL = "gemini-1.5-flash"
+DEFAULT_OLLAMA_MODEL = "llama3.1:8b-instruct"
+
+# Status codes worth retrying
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class StreamEvent:
+    """A validated top-level field, or the final validated object."""
+
+    kind: str  # "field" or "result"
+    name: Optional[str]
+    value: Any
+
+
+@dataclass
+class Completion:
+    """Text of one LLM completion plus usage details."""
+
+    text: str
+    provider: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_http_client(max_connections: Optional[int] = None,
+                       max_keepalive_connections: Optional[int] = None,
+                       keepalive_expiry_s: Optional[float] = None,
+                       timeout_s: Optional[float] = None,
+                       http2: Optional[bool] = None) -> httpx.AsyncClient:
+    """Build a pooled AsyncClient, defaulting to LLM_HTTP_* environment variables."""
+    if max_connections is None:
+        max_connections = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "200"))
+    if max_keepalive_connections is None:
+        max_keepalive_connections = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "50"))
+    if keepalive_expiry_s is None:
+        keepalive_expiry_s = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_S", "30"))
+    if timeout_s is None:
+        timeout_s = float(os.getenv("LLM_HTTP_TIMEOUT_S", "60"))
+    if http2 is None:
+        http2 = os.getenv("LLM_HTTP2", "true").lower() == "true"
+
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_s,
+        ),
+        timeout=httpx.Timeout(timeout_s, connect=10.0),
+        http2=http2 and http2_available(),
+    )
+
+
+# Pool shared by every provider in the process
+_shared_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide pooled client, creating it on first use."""
+    global _shared_http_client
+    if _shared_http_client is None or _shared_http_client.is_closed:
+        _shared_http_client = create_http_client()
+    return _shared_http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared pool (call on application shutdown)."""
+    global _shared_http_client
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
+
+
+def build_structured_prompt(input_vars: Dict[str, Any], output_schema: Any) -> str:
+    """User prompt asking for JSON output for the given inputs."""
+    prompt = "Input:\n" + json.dumps(input_vars, indent=2, ensure_ascii=False, default=str)
+    if hasattr(output_schema, "model_json_schema"):
+        schema = json.dumps(output_schema.model_json_schema())
+        prompt += f"\n\nRespond with a single JSON object matching this JSON schema:\n{schema}"
+    else:
+        prompt += "\n\nRespond with a single JSON object."
+    return prompt
+
+
+def parse_structured(text: str, output_schema: Any) -> Any:
+    """Parse JSON from an LLM completion and validate it against the schema."""
+    text = text.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    start = text.find("{")
+    end = text.rfind("}")
+    if start != -1 and end > start:
+        text = text[start:end + 1]
+    data = json.loads(text)
+    if hasattr(output_schema, "model_validate"):
+        return output_schema.model_validate(data)
+    return data
+
+
+class AsyncProvider(ABC):
+    """Common retry handling and high-level calls for one LLM backend.
+
+    Backends implement ``complete`` and ``stream``.
+    """
+
+    provider_name = "base"
+
+    def __init__(self, model_name: str, http_client: Optional[httpx.AsyncClient] = None,
+                 max_retries: int = 2, temperature: float = 0.2):
+        self.model_name = model_name
+        self._http_client = http_client
+        self.max_retries = max_retries
+        self.temperature = temperature
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        return self._http_client or get_http_client()
+
+    async def post_json(self, url: str, payload: Dict[str, Any],
+                        headers: Optional[Dict[str, str]] = None):
+        """POST with retries on transport errors and retryable status codes."""
+        attempt = 0
+        while True:
+            try:
+                response = await self.http_client.post(url, json=payload, headers=headers)
+                if response.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response.json(), attempt
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+            attempt += 1
+            await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+    @abstractmethod
+    async def complete(self, prompt: str, system_prompt: Optional[str] = None,
+                       json_mode: bool = False) -> Completion:
+        """One full completion with its usage details."""
+
+    @abstractmethod
+    def stream(self, prompt: str, system_prompt: Optional[str] = None, json_mode: bool = False,
+               usage: Optional[Completion] = None) -> AsyncIterator[str]:
+        """Yield text deltas of a completion as they are generated.
+
+        Token counts reported by the provider are written to ``usage``.
+        """
+
+    async def recorded_complete(self, prompt: str, system_prompt: Optional[str] = None,
+                                json_mode: bool = False) -> Completion:
+        """complete() with its tokens, latency and retries written to the usage ledger."""
+        start_time = time.perf_counter()
+        try:
+            completion = await self.complete(prompt, system_prompt, json_mode)
+        except Exception:
+            usage_ledger.record(self.provider_name, self.model_name, time.perf_counter() - start_time, ok=False)
+            raise
+        usage_ledger.record(
+            completion.provider,
+            completion.model,
+            time.perf_counter() - start_time,
+            prompt_tokens=completion.prompt_tokens,
+            completion_tokens=completion.completion_tokens,
+            retries=completion.retries,
+        )
+        return completion
+
+    async def recorded_stream(self, prompt: str, system_prompt: Optional[str] = None,
+                              json_mode: bool = False, agent: Optional[str] = None) -> AsyncIterator[str]:
+        """stream() with its tokens and latency written to the usage ledger when it ends.
+
+        The agent is passed explicitly: a context variable set around an
+        async generator would leak into the consumer between deltas.
+        """
+        usage = Completion("", self.provider_name, self.model_name)
+        start_time = time.perf_counter()
+        ok = False
+        try:
+            async for delta in self.stream(prompt, system_prompt, json_mode, usage=usage):
+                yield delta
+            ok = True
+        finally:
+            usage_ledger.record(
+                self.provider_name,
+                self.model_name,
+                time.perf_counter() - start_time,
+                agent=agent,
+                prompt_tokens=usage.prompt_tokens if ok else None,
+                completion_tokens=usage.completion_tokens if ok else None,
+                ok=ok,
+            )
+
+    async def generate_response(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        completion = await self.recorded_complete(prompt, system_prompt)
+        return completion.text
+
+    async def generate_structured_stream(self, system_prompt: str, input_vars: Dict[str, Any],
+                                         output_schema: Any, agent: Optional[str] = None) -> AsyncIterator[StreamEvent]:
+        """Stream a structured output, emitting each top-level field once it is complete."""
+        prompt = build_structured_prompt(input_vars, output_schema)
+        parser = IncrementalJSONParser()
+        validator = FieldValidator(output_schema)
+        async for delta in self.recorded_stream(prompt, system_prompt, json_mode=True, agent=agent):
+            for name, value in parser.feed(delta):
+                yield StreamEvent("field", name, validator.validate_field(name, value))
+        yield StreamEvent("result", None, validator.validate_result(parser.result()))
+
+    async def generate_structured(self, system_prompt: str, input_vars: Dict[str, Any],
+                                  output_schema: Any) -> Any:
+        prompt = build_structured_prompt(input_vars, output_schema)
+        completion = await self.recorded_complete(prompt, system_prompt, json_mode=True)
+        return parse_structured(completion.text, output_schema)
+
+
+class AsyncGeminiProvider(AsyncProvider):
+    """Gemini generateContent REST API."""
+
+    provider_name = "gemini"
+
+    def __init__(self, api_key: str, model_name: str = DEFAULT_GEMINI_MODEL,
+                 base_url: str = GEMINI_BASE_URL, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+
+    async def complete(self, prompt: str, system_prompt: Optional[str] = None,
+                       json_mode: bool = False) -> Completion:
+        payload: Dict[str, Any] = {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": {"temperature": self.temperature},
+        }
+        if system_prompt:
+            payload["systemInstruction"] = {"parts": [{"text": system_prompt}]}
+        if json_mode:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+
+        url = f"{self.base_url}/v1beta/models/{self.model_name}:generateContent"
+        data, retries = await self.post_json(url, payload, headers={"x-goog-api-key": self.api_key})
+
+        candidates = data.get("candidates") or []
+        if not candidates:
+            raise ValueError(f"Gemini returned no candidates: {data.get('promptFeedback')}")
+        parts = candidates[0].get("content", {}).get("parts", [])
+        usage = data.get("usageMetadata", {})
+        return Completion(
+            text="".join(part.get("text", "") for part in parts),
+            provider=self.provider_name,
+            model=self.model_name,
+            prompt_tokens=usage.get("promptTokenCount", 0),
+            completion_tokens=usage.get("candidatesTokenCount", 0),
+            retries=retries,
+        )
+
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None, json_mode: bool = False,
+                     usage: Optional[Completion] = None) -> AsyncIterator[str]:
+        payload: Dict[str, Any] = {
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": {"temperature": self.temperature},
+        }
+        if system_prompt:
+            payload["systemInstruction"] = {"parts": [{"text": system_prompt}]}
+        if json_mode:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+
+        url = f"{self.base_url}/v1beta/models/{self.model_name}:streamGenerateContent"
+        async with self.http_client.stream(
+            "POST", url, params={"alt": "sse"}, json=payload, headers={"x-goog-api-key": self.api_key}
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = json.loads(line[len("data:"):])
+                # Each chunk carries the running totals; the last one is final
+                if usage is not None and data.get("usageMetadata"):
+                    usage.prompt_tokens = data["usageMetadata"].get("promptTokenCount", 0)
+                    usage.completion_tokens = data["usageMetadata"].get("candidatesTokenCount", 0)
+                for candidate in data.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+
+
+class AsyncOllamaProvider(AsyncProvider):
+    """Ollama /api/generate endpoint."""
+
+    provider_name = "ollama"
+
+    def __init__(self, base_url: str = "http://localhost:11434",
+                 model_name: str = DEFAULT_OLLAMA_MODEL, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    async def complete(self, prompt: str, system_prompt: Optional[str] = None,
+                       json_mode: bool = False) -> Completion:
+        payload: Dict[str, Any] = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": False,
+            "options": {"temperature": self.temperature},
+        }
+        if system_prompt:
+            payload["system"] = system_prompt
+        if json_mode:
+            payload["format"] = "json"
+
+        data, retries = await self.post_json(f"{self.base_url}/api/generate", payload)
+        return Completion(
+            text=data.get("response", ""),
+            provider=self.provider_name,
+            model=self.model_name,
+            prompt_tokens=data.get("prompt_eval_count", 0),
+            completion_tokens=data.get("eval_count", 0),
+            retries=retries,
+        )
+
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None, json_mode: bool = False,
+                     usage: Optional[Completion] = None) -> AsyncIterator[str]:
+        payload: Dict[str, Any] = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": True,
+            "options": {"temperature": self.temperature},
+        }
+        if system_prompt:
+            payload["system"] = system_prompt
+        if json_mode:
+            payload["format"] = "json"
+
+        async with self.http_client.stream("POST", f"{self.base_url}/api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    if usage is not None:
+                        usage.prompt_tokens = data.get("prompt_eval_count", 0)
+                        usage.completion_tokens = data.get("eval_count", 0)
+                    break
+
+
+class AsyncLLMManager:
+    """Primary provider with an optional fallback, mirroring create_llm_manager."""
+
+    def __init__(self, primary: AsyncProvider, fallback: Optional[AsyncProvider] = None):
+        self.primary = primary
+        self.fallback = fallback
+
+    async def call(self, method: str, *args, agent: Optional[str] = None) -> Any:
+        stage = f"llm_{agent}" if agent else "llm"
+        with time_stage(stage), agent_scope(agent):
+            return await cached_llm_call(self, method, args, agent, lambda: self.route(method, *args))
+
+    async def route(self, method: str, *args) -> Any:
+        try:
+            return await getattr(self.primary, method)(*args)
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            print(f"{self.primary.provider_name} failed ({e}), falling back to {self.fallback.provider_name}")
+            PROVIDER_FALLBACKS.inc(
+                from_provider=self.primary.provider_name,
+                to_provider=self.fallback.provider_name,
+            )
+            return await getattr(self.fallback, method)(*args)
+
+    async def generate_response(self, prompt: str, system_prompt: Optional[str] = None,
+                                agent: Optional[str] = None) -> str:
+        return await self.call("generate_response", prompt, system_prompt, agent=agent)
+
+    async def generate_structured(self, system_prompt: str, input_vars: Dict[str, Any],
+                                  output_schema: Any, agent: Optional[str] = None) -> Any:
+        return await self.call("generate_structured", system_prompt, input_vars, output_schema, agent=agent)
+
+    async def generate_structured_stream(self, system_prompt: str, input_vars: Dict[str, Any],
+                                         output_schema: Any, agent: Optional[str] = None) -> AsyncIterator[StreamEvent]:
+        """Stream fields from the primary; fall back only if it fails before the first field."""
+        emitted = False
+        try:
+            async for event in self.primary.generate_structured_stream(system_prompt, input_vars, output_schema,
+                                                                       agent=agent):
+                emitted = True
+                yield event
+            return
+        except Exception as e:
+            if emitted or self.fallback is None:
+                raise
+            print(f"{self.primary.provider_name} stream failed ({e}), falling back to {self.fallback.provider_name}")
+            PROVIDER_FALLBACKS.inc(
+                from_provider=self.primary.provider_name,
+                to_provider=self.fallback.provider_name,
+            )
+        async for event in self.fallback.generate_structured_stream(system_prompt, input_vars, output_schema,
+                                                                    agent=agent):
+            yield event
+
+
+def create_async_providers(gemini_api_key: Optional[str] = None,
+                           use_ollama_fallback: Optional[bool] = None,
+                           ollama_base_url: Optional[str] = None) -> List[AsyncProvider]:
+    """Providers in priority order from arguments or GEMINI_API_KEY / USE_OLLAMA_FALLBACK / OLLAMA_BASE_URL."""
+    gemini_api_key = gemini_api_key or os.getenv("GEMINI_API_KEY")
+    if use_ollama_fallback is None:
+        use_ollama_fallback = os.getenv("USE_OLLAMA_FALLBACK", "false").lower() == "true"
+    ollama_base_url = ollama_base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    gemini_base_url = os.getenv("GEMINI_BASE_URL", GEMINI_BASE_URL)
+
+    providers: List[AsyncProvider] = []
+    if gemini_api_key:
+        providers.append(AsyncGeminiProvider(gemini_api_key, base_url=gemini_base_url))
+    if use_ollama_fallback:
+        providers.append(AsyncOllamaProvider(base_url=ollama_base_url))
+    if not providers:
+        raise ValueError("GEMINI_API_KEY is not set and Ollama fallback is disabled")
+    return providers
+
+
+def create_async_llm_manager(gemini_api_key: Optional[str] = None,
+                             use_ollama_fallback: Optional[bool] = None,
+                             ollama_base_url: Optional[str] = None) -> AsyncLLMManager:
+    """Build the async manager: Gemini first, Ollama as fallback when enabled."""
+    providers = create_async_providers(gemini_api_key, use_ollama_fallback, ollama_base_url)
+    return AsyncLLMManager(providers[0], providers[1] if len(providers) > 1 else None)
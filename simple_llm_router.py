@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Latency-aware routing between LLM providers.
+
+Each provider gets a latency tracker and a circuit breaker. A call goes to
+the first provider whose breaker is closed; if it has not answered by its
+observed p95 latency, a hedged request is sent to the next provider and
+whichever answers first wins. Providers that keep failing are skipped
+until their breaker's cool-down has passed.
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from simple_llm_cache import cached_llm_call
+from simple_llm_providers import AsyncProvider, StreamEvent, create_async_providers
+from simple_metrics import PROVIDER_FALLBACKS, registry, time_stage
+from simple_usage import agent_scope
+
+HEDGED_REQUESTS = registry.counter(
+    "doctor_bot_llm_hedged_requests_total",
+    "Hedged requests sent to a backup provider after the primary passed its p95.",
+    ["from_provider", "to_provider"],
+)
+CIRCUIT_OPENED = registry.counter(
+    "doctor_bot_llm_circuit_opened_total",
+    "Times a provider's circuit breaker opened.",
+    ["provider"],
+)
+
+
+class LatencyTracker:
+    """Sliding window of call latencies.
+
+    Calls cancelled after losing a hedge are recorded with their elapsed
+    time as a lower bound; counting only completions would keep the
+    window to fast calls and shrink the hedge delay.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20, default_s: float = 5.0):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.default_s = default_s
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        """Observed latency percentile, or the default until enough samples exist."""
+        if len(self.samples) < self.min_samples:
+            return self.default_s
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one probe through after a cool-down."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout_s:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may be sent: closed, or half-open with no probe in flight."""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.probing)
+
+    def begin(self) -> None:
+        """Mark a call as started; in half-open state it becomes the probe."""
+        if self.state == "half_open":
+            self.probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True if this opened the breaker."""
+        self.failures += 1
+        was_open = self.opened_at is not None
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self.probing = False
+            return not was_open
+        return False
+
+
+class RoutedProvider:
+    """A provider with its latency tracker and circuit breaker."""
+
+    def __init__(self, provider: AsyncProvider, tracker: LatencyTracker, breaker: CircuitBreaker):
+        self.provider = provider
+        self.tracker = tracker
+        self.breaker = breaker
+
+    @property
+    def name(self) -> str:
+        return self.provider.provider_name
+
+    async def call(self, method: str, *args) -> Any:
+        self.breaker.begin()
+        start_time = time.perf_counter()
+        try:
+            result = await getattr(self.provider, method)(*args)
+        except asyncio.CancelledError:
+            # A losing hedge is neither a success nor a failure, but its
+            # elapsed time is a lower bound on this provider's latency
+            self.tracker.record(time.perf_counter() - start_time)
+            if self.breaker.probing:
+                self.breaker.probing = False
+            raise
+        except Exception:
+            if self.breaker.record_failure():
+                CIRCUIT_OPENED.inc(provider=self.name)
+                print(f"Circuit opened for {self.name}")
+            raise
+        self.tracker.record(time.perf_counter() - start_time)
+        self.breaker.record_success()
+        return result
+
+
+class ProviderRouter:
+    """Drop-in for AsyncLLMManager with hedging and circuit breaking."""
+
+    def __init__(self, providers: List[AsyncProvider], hedge: bool = True,
+                 hedge_percentile: float = 0.95, failure_threshold: int = 5,
+                 reset_timeout_s: float = 30.0, default_hedge_delay_s: float = 5.0):
+        self.routes = [
+            RoutedProvider(
+                provider,
+                LatencyTracker(default_s=default_hedge_delay_s),
+                CircuitBreaker(failure_threshold, reset_timeout_s),
+            )
+            for provider in providers
+        ]
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+
+    def available(self) -> List[RoutedProvider]:
+        return [route for route in self.routes if route.breaker.allow()]
+
+    async def call(self, method: str, *args, agent: Optional[str] = None) -> Any:
+        stage = f"llm_{agent}" if agent else "llm"
+        with time_stage(stage), agent_scope(agent):
+            return await cached_llm_call(self, method, args, agent, lambda: self.route(method, *args))
+
+    async def route(self, method: str, *args) -> Any:
+        candidates = self.available()
+        if not candidates:
+            raise RuntimeError("All LLM providers are unavailable (circuit open)")
+
+        primary = candidates[0]
+        pending: Dict[asyncio.Task, RoutedProvider] = {
+            asyncio.create_task(primary.call(method, *args)): primary
+        }
+        backups = candidates[1:]
+        last_error: Optional[Exception] = None
+
+        try:
+            while pending:
+                # Hedge only while the primary is the sole request in flight
+                timeout = None
+                if self.hedge and backups and len(pending) == 1 and primary in pending.values():
+                    timeout = primary.tracker.percentile(self.hedge_percentile)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    backup = backups.pop(0)
+                    HEDGED_REQUESTS.inc(from_provider=primary.name, to_provider=backup.name)
+                    pending[asyncio.create_task(backup.call(method, *args))] = backup
+                    continue
+
+                for task in done:
+                    route = pending.pop(task)
+                    if task.exception() is None:
+                        if route is not primary:
+                            PROVIDER_FALLBACKS.inc(from_provider=primary.name, to_provider=route.name)
+                        return task.result()
+                    last_error = task.exception()
+                    print(f"{route.name} failed: {last_error}")
+
+                # Everything in flight failed: fall back to the next provider
+                if not pending and backups:
+                    backup = backups.pop(0)
+                    pending[asyncio.create_task(backup.call(method, *args))] = backup
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error or RuntimeError("No LLM provider returned a result")
+
+    async def generate_response(self, prompt: str, system_prompt: Optional[str] = None,
+                                agent: Optional[str] = None) -> str:
+        return await self.call("generate_response", prompt, system_prompt, agent=agent)
+
+    async def generate_structured(self, system_prompt: str, input_vars: Dict[str, Any],
+                                  output_schema: Any, agent: Optional[str] = None) -> Any:
+        return await self.call("generate_structured", system_prompt, input_vars, output_schema, agent=agent)
+
+    async def generate_structured_stream(self, system_prompt: str, input_vars: Dict[str, Any],
+                                         output_schema: Any, agent: Optional[str] = None) -> AsyncIterator[StreamEvent]:
+        """Stream from the first provider whose circuit breaker allows it.
+
+        A stream cannot be hedged, so it goes to that provider only; its
+        outcome still counts towards the provider's breaker.
+        """
+        candidates = self.available()
+        if not candidates:
+            raise RuntimeError("All LLM providers are unavailable (circuit open)")
+        route = candidates[0]
+        route.breaker.begin()
+        try:
+            async for event in route.provider.generate_structured_stream(system_prompt, input_vars,
+                                                                         output_schema, agent=agent):
+                yield event
+        except Exception:
+            if route.breaker.record_failure():
+                CIRCUIT_OPENED.inc(provider=route.name)
+                print(f"Circuit opened for {route.name}")
+            raise
+        except BaseException:
+            # Consumer stopped early or was cancelled: neither success nor failure
+            route.breaker.probing = False
+            raise
+        route.breaker.record_success()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            route.name: {
+                "circuit": route.breaker.state,
+                "consecutive_failures": route.breaker.failures,
+                "p50_s": round(route.tracker.percentile(0.5), 4),
+                "p95_s": round(route.tracker.percentile(0.95), 4),
+                "samples": len(route.tracker.samples),
+            }
+            for route in self.routes
+        }
+
+
+def create_llm_router(gemini_api_key: Optional[str] = None,
+                      use_ollama_fallback: Optional[bool] = None,
+                      ollama_base_url: Optional[str] = None) -> ProviderRouter:
+    """Build a router over the configured providers using LLM_HEDGE* / LLM_CIRCUIT_* settings."""
+    return ProviderRouter(
+        create_async_providers(gemini_api_key, use_ollama_fallback, ollama_base_url),
+        hedge=os.getenv("LLM_HEDGE", "true").lower() == "true",
+        hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")),
+        failure_threshold=int(os.getenv("LLM_CIRCUIT_FAILURES", "5")),
+        reset_timeout_s=float(os.getenv("LLM_CIRCUIT_RESET_S", "30")),
+        default_hedge_delay_s=float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_S", "5")),
+    )
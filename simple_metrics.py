@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""In-process metrics in Prometheus text format."""
+
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond FAISS lookups to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Pipeline stages timed with time_stage()
+STAGES = (
+    "query_embedding",
+    "faiss_search",
+    "reranking",
+    "retrieval",
+    "llm_followup",
+    "llm_triage",
+    "llm_judge",
+    "serialization",
+)
+
+
+def format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Format a label set as {a="x",b="y"}."""
+    parts = [f'{name}="{escape_label(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    """Format a sample value, keeping integers compact."""
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Increment the counter for a label set."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        """Render samples in text format."""
+        with self.lock:
+            items = sorted(self.values.items())
+        return [
+            f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram:
+    """Cumulative histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Tuple[str, ...], Dict] = {}
+        self.lock = threading.Lock()
+
+    def init_labels(self, **labels) -> None:
+        """Pre-create a series so it is exported before its first observation."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self.lock:
+            self.series.setdefault(key, self.new_series())
+
+    def new_series(self) -> Dict:
+        return {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self.lock:
+            series = self.series.setdefault(key, self.new_series())
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> List[str]:
+        """Render bucket, sum and count samples in text format."""
+        lines = []
+        with self.lock:
+            items = sorted(
+                ((key, dict(series, counts=list(series["counts"])))
+                 for key, series in self.series.items()),
+                key=lambda item: item[0],
+            )
+        for key, series in items:
+            for bound, count in zip(self.buckets, series["counts"]):
+                labels = format_labels(self.labelnames, key, f'le="{format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {series['count']}")
+            labels = format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds all metrics of the process and renders them."""
+
+    def __init__(self):
+        self.metrics: List = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "doctor_bot_stage_duration_seconds",
+    "Time spent in each pipeline stage.",
+    ["stage"],
+)
+REQUEST_SECONDS = registry.histogram(
+    "doctor_bot_http_request_duration_seconds",
+    "End-to-end HTTP request latency.",
+    ["method", "path", "status"],
+)
+CACHE_HITS = registry.counter(
+    "doctor_bot_cache_hits_total",
+    "Cache lookups served from a cache.",
+    ["cache"],
+)
+CACHE_MISSES = registry.counter(
+    "doctor_bot_cache_misses_total",
+    "Cache lookups that fell through to the backing computation.",
+    ["cache"],
+)
+PROVIDER_FALLBACKS = registry.counter(
+    "doctor_bot_llm_provider_fallbacks_total",
+    "LLM calls answered by a fallback provider.",
+    ["from_provider", "to_provider"],
+)
+ERRORS = registry.counter(
+    "doctor_bot_errors_total",
+    "Errors raised inside a pipeline stage.",
+    ["stage"],
+)
+
+for stage in STAGES:
+    STAGE_SECONDS.init_labels(stage=stage)
+
+# Stage timings of the request being handled, for the Server-Timing header
+request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    """Start collecting stage timings for the current request."""
+    timings: List[Tuple[str, float]] = []
+    request_timings.set(timings)
+    return timings
+
+
+def format_server_timing(timings: List[Tuple[str, float]], total_s: float) -> str:
+    """Format stage timings as a Server-Timing header value, durations in ms."""
+    totals: Dict[str, float] = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()]
+    entries.append(f"total;dur={total_s * 1000:.1f}")
+    return ", ".join(entries)
+
+
+@contextmanager
+def time_stage(stage: str):
+    """Time a block as one pipeline stage and count it as an error if it raises."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start_time
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def render_metrics() -> str:
+    """Render all process metrics."""
+    return registry.render()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""DAG-based stage orchestration for the /triage flow.
+
+Stages declare their dependencies and start as soon as those finish, so
+independent work (retrieval and follow-up generation, the individual judge
+checks) runs concurrently and end-to-end latency tracks the critical path
+instead of the sum of all stages.
+"""
+
+import json
+import asyncio
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from simple_metrics import time_stage
+from simple_prejudge import merge_qa_items, prejudge
+from simple_scheduler import AdmissionController, is_emergent_query
+from simple_semantic_cache import SemanticCache
+from simple_sessions import SessionStore, session_create_stage
+
+# Judge checks that can be evaluated independently of each other
+JUDGE_CHECKS = ("grounding", "consistency", "safety", "completeness", "format")
+
+# A stage returns an awaitable, or is an async generator of StreamEvent-like
+# objects (kind, name, value): "field" events are published while the stage
+# runs and the "result" event's value becomes the stage result
+# Stage metrics are prefixed so a stage's wall time (including queueing for
+# providers) is not summed with the llm_<agent> time its LLM call records
+STAGE_METRIC_PREFIX = "stage_"
+
+StageFunc = Callable[[Dict[str, Any]], Any]
+EventSink = Callable[[Dict[str, Any]], None]
+# Maps a finished stage's result to (field, value) pairs to publish
+FieldExtractor = Callable[[Any], Iterable[Tuple[str, Any]]]
+
+# Admission lane that caps concurrent triage LLM stages across requests
+LLM_LANE = "triage"
+
+# Triage note fields in the order the UI renders them while streaming
+NOTE_STREAM_FIELDS = (
+    "severity_flags", "possible_conditions", "tests_to_discuss", "disease_course",
+    "lifestyle_plan", "followup_schedule", "disclaimers", "patient_query", "followups_asked",
+)
+
+
+@dataclass
+class Stage:
+    """One unit of work; receives the results of all finished stages."""
+
+    name: str
+    func: StageFunc
+    deps: List[str] = field(default_factory=list)
+    optional: bool = False
+    lane: Optional[str] = None
+
+
+class StageFailed(Exception):
+    """Raised when a required stage fails."""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def jsonable(value: Any) -> Any:
+    """Convert pydantic models (also inside lists and dicts) to plain data for events."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, (list, tuple)):
+        return [jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {key: jsonable(item) for key, item in value.items()}
+    return value
+
+
+class StageGraph:
+    """A set of stages run concurrently in dependency order.
+
+    With ``admission``, a stage added with a ``lane`` holds a slot in that
+    admission lane while it runs (queries with red-flag symptoms queue with
+    priority); a full queue fails the stage with AdmissionRejected.
+    """
+
+    def __init__(self, admission: Optional[AdmissionController] = None):
+        self.stages: Dict[str, Stage] = {}
+        self.admission = admission
+
+    def add(self, name: str, func: StageFunc, deps: Sequence[str] = (), optional: bool = False,
+            lane: Optional[str] = None) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        self.stages[name] = Stage(name, func, list(deps), optional, lane)
+        return self
+
+    def admit(self, lane: Optional[str], results: Dict[str, Any]) -> Any:
+        """Async context manager holding a slot in ``lane`` (a no-op without admission)."""
+        if self.admission is None or lane is None:
+            return nullcontext()
+        return self.admission.admit(lane, priority=is_emergent_query(str(results.get("query") or "")))
+
+    def order(self) -> List[str]:
+        """Topological order of the stages; raises on missing or cyclic dependencies."""
+        ordered: List[str] = []
+        visiting = set()
+
+        def visit(name: str) -> None:
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle at stage '{name}'")
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    async def run(self, inputs: Optional[Dict[str, Any]] = None,
+                  on_event: Optional[EventSink] = None) -> Dict[str, Any]:
+        """Run every stage and return results by stage name (plus the inputs).
+
+        Durations are recorded under ``results["timings"]`` in seconds and
+        exported as ``stage_<name>`` stage metrics. A
+        failing optional stage yields None; a failing required stage cancels
+        the rest and raises StageFailed. ``on_event`` receives a
+        ``stage_start`` and a ``stage_end`` event (with the stage's
+        ``result``) for every stage, and a ``field`` event for every field
+        a streaming stage yields.
+        """
+        results: Dict[str, Any] = dict(inputs or {})
+        timings: Dict[str, float] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def call(stage: Stage) -> Any:
+            output = stage.func(results)
+            if not hasattr(output, "__aiter__"):
+                return await output
+            result = None
+            async for event in output:
+                if event.kind == "result":
+                    result = event.value
+                elif on_event:
+                    on_event({"event": "field", "stage": stage.name, "field": event.name,
+                              "value": jsonable(event.value)})
+            return result
+
+        async def run_stage(stage: Stage) -> Any:
+            if stage.deps:
+                await asyncio.gather(*(tasks[dep] for dep in stage.deps))
+            start_time = time.perf_counter()
+            if on_event:
+                on_event({"event": "stage_start", "stage": stage.name})
+            error: Optional[Exception] = None
+            try:
+                with time_stage(STAGE_METRIC_PREFIX + stage.name):
+                    async with self.admit(stage.lane, results):
+                        result = await call(stage)
+            except Exception as e:
+                error, result = e, None
+            timings[stage.name] = time.perf_counter() - start_time
+            if on_event:
+                on_event({"event": "stage_end", "stage": stage.name, "ok": error is None,
+                          "duration_ms": round(timings[stage.name] * 1000, 1), "result": result})
+            if error is not None:
+                if not stage.optional:
+                    raise StageFailed(stage.name, error) from error
+                print(f"Optional stage '{stage.name}' failed: {error}")
+            results[stage.name] = result
+            return result
+
+        for name in self.order():
+            tasks[name] = asyncio.create_task(run_stage(self.stages[name]))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        results["timings"] = timings
+        return results
+
+    async def stream(self, inputs: Optional[Dict[str, Any]] = None,
+                     publish: Optional[Dict[str, FieldExtractor]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Run the graph, yielding events as stages start and finish.
+
+        Besides ``stage_start``/``stage_end``, streaming stages yield their
+        ``field`` events while they run, and every other stage named in
+        ``publish`` yields one ``field`` event per (field, value) pair its
+        extractor returns, as soon as that stage finishes. The last event
+        is ``done`` (with the full results under ``results``) or ``error``.
+        """
+        publish = publish or {}
+        streamed = set()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def on_event(event: Dict[str, Any]) -> None:
+            queue.put_nowait(event)
+
+        task = asyncio.create_task(self.run(inputs, on_event))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                result = event.pop("result", None)
+                yield event
+                stage = event.get("stage")
+                if event["event"] == "field":
+                    streamed.add(stage)
+                elif event["event"] == "stage_end" and event["ok"] and stage in publish and stage not in streamed:
+                    for name, value in publish[stage](result):
+                        yield {"event": "field", "stage": stage, "field": name, "value": value}
+            try:
+                results = task.result()
+            except StageFailed as e:
+                yield {"event": "error", "stage": e.stage, "detail": str(e.error)}
+                return
+            yield {
+                "event": "done",
+                "timings_ms": {name: round(seconds * 1000, 1) for name, seconds in results["timings"].items()},
+                "results": results,
+            }
+        finally:
+            task.cancel()
+
+
+def note_fields(note: Any) -> List[Tuple[str, Any]]:
+    """Publish a triage note (dict or pydantic model) field by field."""
+    if hasattr(note, "model_dump"):
+        note = note.model_dump()
+    elif hasattr(note, "dict"):
+        note = note.dict()
+    if not isinstance(note, dict):
+        return []
+    return [(name, note[name]) for name in NOTE_STREAM_FIELDS if note.get(name) is not None]
+
+
+def step_two_publish() -> Dict[str, FieldExtractor]:
+    """``publish`` mapping for streaming the second /triage call.
+
+    A streaming ``llm_triage`` stage publishes its own fields as the LLM
+    completes them; ``note_fields`` only covers a non-streaming one.
+    """
+    return {
+        "llm_triage": note_fields,
+        "judge_verdict": lambda verdict: [("judge_verdict", verdict)],
+    }
+
+
+async def ndjson_events(events: AsyncIterator[Dict[str, Any]],
+                        finalize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> AsyncIterator[str]:
+    """Encode events as newline-delimited JSON for a StreamingResponse.
+
+    The in-process ``results`` are dropped from the ``done`` event; with
+    ``finalize`` they are turned into the endpoint's usual response body
+    and sent first as a ``result`` event.
+    """
+    async for event in events:
+        if event["event"] == "done":
+            results = event.pop("results")
+            if finalize:
+                yield json.dumps({"event": "result", "response": finalize(results)}, default=str) + "\n"
+        yield json.dumps(event, default=str) + "\n"
+
+
+def combine_judge_checks(qa_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge per-check QA items into a verdict.
+
+    All checks passing (warnings allowed) approves the note; any failure asks
+    for revision, or rejects it when the average score is below 0.5.
+    """
+    scores = [item.get("score", 0.0) for item in qa_items]
+    overall_score = round(sum(scores) / len(scores), 3) if scores else 0.0
+    failed = [item for item in qa_items if item.get("status") == "fail"]
+    if not failed:
+        decision = "approve"
+    elif overall_score >= 0.5:
+        decision = "revise"
+    else:
+        decision = "reject"
+    return {"decision": decision, "overall_score": overall_score, "issues": qa_items}
+
+
+def build_step_one_graph(retrieve: StageFunc, generate_followups: StageFunc,
+                         embed_query: Optional[StageFunc] = None,
+                         followup_cache: Optional[SemanticCache] = None,
+                         sessions: Optional[SessionStore] = None,
+                         admission: Optional[AdmissionController] = None) -> StageGraph:
+    """First /triage call: follow-up generation runs alongside retrieval.
+
+    With ``followup_cache`` and ``embed_query`` the query is embedded once
+    (``retrieve`` can reuse ``results["query_embedding"]``), and follow-ups
+    for a query similar to a cached one are served without an LLM call.
+    Entries are scoped to ``results["session_id"]`` unless the cache is shared.
+    With ``sessions`` a final ``session`` stage stores the candidates and
+    questions and returns the ``session_id`` for step two. With
+    ``admission`` the follow-up LLM call holds a slot in the ``triage`` lane
+    (cache hits do not).
+    """
+    graph = StageGraph(admission)
+    if followup_cache is None or embed_query is None:
+        graph.add("retrieval", retrieve).add("llm_followup", generate_followups, lane=LLM_LANE)
+        if embed_query is not None and sessions is not None:
+            # Stored with the session so step two can re-rank by embedding
+            graph.add("query_embedding", embed_query)
+        return add_session_stage(graph, sessions)
+
+    async def cached_followups(results: Dict[str, Any]) -> Any:
+        query, embedding = results.get("query", ""), results["query_embedding"]
+        scope = results.get("session_id")
+        hit = followup_cache.get(query, embedding, scope)
+        if hit is not None:
+            return hit.value
+        async with graph.admit(LLM_LANE, results):
+            followups = await generate_followups(results)
+        followup_cache.put(query, embedding, followups, scope)
+        return followups
+
+    graph = (
+        graph
+        .add("query_embedding", embed_query)
+        .add("retrieval", retrieve, deps=["query_embedding"])
+        .add("llm_followup", cached_followups, deps=["query_embedding"])
+    )
+    return add_session_stage(graph, sessions)
+
+
+def add_session_stage(graph: StageGraph, sessions: Optional[SessionStore]) -> StageGraph:
+    if sessions is None:
+        return graph
+    deps = [name for name in ("query_embedding", "retrieval", "llm_followup") if name in graph.stages]
+    return graph.add("session", session_create_stage(sessions), deps=deps)
+
+
+def build_step_two_graph(retrieve: StageFunc, generate_note: StageFunc,
+                         judge_check: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                         checks: Sequence[str] = JUDGE_CHECKS,
+                         use_prejudge: bool = True,
+                         admission: Optional[AdmissionController] = None) -> StageGraph:
+    """Second /triage call: retrieval, then the note, then each judge check in parallel.
+
+    ``generate_note`` may stream: as an async generator forwarding
+    ``llm.generate_structured_stream(...)``, each note field is published
+    as soon as the LLM has written it.
+
+    ``judge_check(check, results)`` evaluates one check against
+    ``results["llm_triage"]`` and returns a QA item dict. With
+    ``use_prejudge`` the rule-based pre-judge runs first; checks it fully
+    decides skip their LLM call, and a forced reject skips the judge entirely.
+
+    With ``admission`` the note generation holds a slot in the ``triage``
+    lane; the judge checks are short and run without one.
+    """
+    graph = (
+        StageGraph(admission)
+        .add("retrieval", retrieve)
+        .add("llm_triage", generate_note, deps=["retrieval"], lane=LLM_LANE)
+    )
+    check_deps = ["llm_triage"]
+
+    if use_prejudge:
+        async def run_prejudge(results: Dict[str, Any]) -> Any:
+            return prejudge(results["llm_triage"], results["retrieval"] or [])
+
+        graph.add("prejudge", run_prejudge, deps=["llm_triage"])
+        check_deps = ["prejudge"]
+
+    def make_check(check: str) -> StageFunc:
+        async def run_check(results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            rules = results.get("prejudge")
+            if rules is None:
+                return await judge_check(check, results)
+            rule_item = rules.item(check)
+            if check not in rules.llm_checks:
+                return rule_item
+            return merge_qa_items(rule_item, await judge_check(check, results))
+        return run_check
+
+    check_stages = []
+    for check in checks:
+        stage_name = f"llm_judge_{check}"
+        graph.add(stage_name, make_check(check), deps=check_deps)
+        check_stages.append(stage_name)
+
+    async def verdict(results: Dict[str, Any]) -> Dict[str, Any]:
+        qa_items = [results[name] for name in check_stages if results[name] is not None]
+        combined = combine_judge_checks(qa_items)
+        rules = results.get("prejudge")
+        if rules is not None and rules.must_reject:
+            combined["decision"] = "reject"
+        return combined
+
+    graph.add("judge_verdict", verdict, deps=check_stages)
+    return graph
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Deterministic pre-judge for triage notes.
+
+Runs the mechanical parts of the LLM judge in microseconds: schema/format,
+required fields and disclaimers, citation IDs against the retrieved hits,
+and banned definitive-diagnosis language. It returns the same QA items as
+the judge (check, status, details, offending_fields, score) plus the checks
+that still need an LLM, or none at all when the rules already force a reject.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Top-level TriageNote fields and the type each must have
+REQUIRED_FIELDS = {
+    "patient_query": str,
+    "followups_asked": list,
+    "possible_conditions": list,
+    "severity_flags": dict,
+    "tests_to_discuss": list,
+    "disease_course": dict,
+    "lifestyle_plan": dict,
+    "followup_schedule": str,
+    "disclaimers": str,
+}
+
+# Fields that must not be left empty
+NON_EMPTY_FIELDS = ["patient_query", "possible_conditions", "severity_flags", "disclaimers"]
+
+# Fields holding the patient's own words; their language is not the model's
+PATIENT_FIELDS = {"patient_query", "followups_asked"}
+
+# Sections whose items cite retrieved chunks
+CITING_SECTIONS = ["possible_conditions", "tests_to_discuss"]
+
+# Definitive-diagnosis language the notes must never use
+BANNED_PHRASES = [
+    r"\byou (?:definitely|certainly) have\b",
+    r"\byou (?:are|have been) diagnosed with\b",
+    r"\b(?:the|your|a) diagnosis is\b",
+    r"\bconfirmed diagnosis\b",
+    r"\bdefinitely (?:is|has|have)\b",
+    r"\bthis is certainly\b",
+    r"\bthere is no doubt\b",
+]
+BANNED_PATTERN = re.compile("|".join(BANNED_PHRASES), re.IGNORECASE)
+
+# Checks the LLM judge still has to review when their rule-based part passes
+LLM_CHECKS = ("grounding", "consistency", "safety")
+
+# Failing any of these makes the note unusable, so the LLM judge is skipped
+REJECTING_CHECKS = {"format", "safety"}
+
+
+@dataclass
+class PreJudgeResult:
+    """Rule-based QA items and what is left for the LLM judge."""
+
+    items: List[Dict[str, Any]]
+    llm_checks: List[str] = field(default_factory=list)
+    must_reject: bool = False
+
+    def item(self, check: str) -> Optional[Dict[str, Any]]:
+        for item in self.items:
+            if item["check"] == check:
+                return item
+        return None
+
+
+def qa_item(check: str, offending_fields: List[str], details_ok: str, details_fail: str) -> Dict[str, Any]:
+    """Build a pass/fail QA item from a list of offending fields."""
+    if offending_fields:
+        return {
+            "check": check,
+            "status": "fail",
+            "details": f"{details_fail}: {', '.join(offending_fields)}",
+            "offending_fields": offending_fields,
+            "score": 0.0,
+        }
+    return {"check": check, "status": "pass", "details": details_ok, "offending_fields": [], "score": 1.0}
+
+
+def hit_ids(hits: Iterable[Any]) -> Set[str]:
+    """Chunk IDs of retrieval hits given as objects or dicts."""
+    ids = set()
+    for hit in hits:
+        chunk_id = hit.get("chunk_id") if isinstance(hit, dict) else getattr(hit, "chunk_id", None)
+        if chunk_id:
+            ids.add(chunk_id)
+    return ids
+
+
+def iter_text(value: Any, path: str):
+    """Yield (field path, text) for every string inside a note."""
+    if isinstance(value, str):
+        yield path, value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from iter_text(item, f"{path}.{key}" if path else key)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from iter_text(item, f"{path}[{i}]")
+
+
+def check_format(note: Dict[str, Any]) -> Dict[str, Any]:
+    offending = [
+        name for name, expected in REQUIRED_FIELDS.items()
+        if name in note and note[name] is not None and not isinstance(note[name], expected)
+    ]
+    offending += [name for name in REQUIRED_FIELDS if name not in note]
+    for section in CITING_SECTIONS:
+        items = note.get(section)
+        # A non-list section is already reported above; do not flag it item by item
+        if not isinstance(items, list):
+            continue
+        for i, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(item.get("support_chunk_ids", []), list):
+                offending.append(f"{section}[{i}]")
+    return qa_item("format", offending, "Note matches the TriageNote schema", "Schema violations")
+
+
+def check_completeness(note: Dict[str, Any]) -> Dict[str, Any]:
+    offending = [name for name in NON_EMPTY_FIELDS if not note.get(name)]
+    severity = note.get("severity_flags")
+    if isinstance(severity, dict) and not severity.get("severity"):
+        offending.append("severity_flags.severity")
+    return qa_item("completeness", offending, "All required fields are present", "Missing or empty fields")
+
+
+def check_citations(note: Dict[str, Any], retrieved_ids: Set[str]) -> Dict[str, Any]:
+    offending = []
+    for section in CITING_SECTIONS:
+        items = note.get(section)
+        for i, item in enumerate(items if isinstance(items, list) else []):
+            if not isinstance(item, dict):
+                continue
+            cited = item.get("support_chunk_ids") or []
+            if isinstance(cited, list) and any(chunk_id not in retrieved_ids for chunk_id in cited):
+                offending.append(f"{section}[{i}].support_chunk_ids")
+    return qa_item("grounding", offending, "All cited chunk IDs were retrieved", "Cited chunks not among retrieved hits")
+
+
+def check_safety(note: Dict[str, Any]) -> Dict[str, Any]:
+    offending = [
+        path
+        for name, value in note.items() if name not in PATIENT_FIELDS
+        for path, text in iter_text(value, name) if BANNED_PATTERN.search(text)
+    ]
+    if not note.get("disclaimers"):
+        offending.append("disclaimers")
+    severity = note.get("severity_flags")
+    if isinstance(severity, dict) and severity.get("severity") == "emergent" and not severity.get("emergency_action"):
+        offending.append("severity_flags.emergency_action")
+    return qa_item("safety", offending, "No definitive-diagnosis language; disclaimers present",
+                   "Safety rule violations")
+
+
+def prejudge(note: Any, hits: Iterable[Any]) -> PreJudgeResult:
+    """Run the rule-based checks on a note (dict or pydantic model) against retrieved hits."""
+    if hasattr(note, "model_dump"):
+        note = note.model_dump()
+    if not isinstance(note, dict):
+        item = qa_item("format", ["<root>"], "", "Note is not a JSON object")
+        return PreJudgeResult(items=[item], must_reject=True)
+
+    items = [
+        check_format(note),
+        check_completeness(note),
+        check_citations(note, hit_ids(hits)),
+        check_safety(note),
+    ]
+    result = PreJudgeResult(items=items)
+    result.must_reject = any(
+        item["status"] == "fail" and item["check"] in REJECTING_CHECKS for item in items
+    )
+    if not result.must_reject:
+        # Rule failures are final; passing rule checks still need the LLM's semantic review
+        result.llm_checks = [
+            check for check in LLM_CHECKS
+            if result.item(check) is None or result.item(check)["status"] == "pass"
+        ]
+    return result
+
+
+def merge_qa_items(rule_item: Optional[Dict[str, Any]], llm_item: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine the rule-based and LLM results of one check, keeping the worse of the two."""
+    if rule_item is None:
+        return llm_item
+    if llm_item is None:
+        return rule_item
+    rank = {"pass": 0, "warn": 1, "fail": 2}
+    worse = llm_item if rank.get(llm_item.get("status"), 2) >= rank.get(rule_item["status"], 2) else rule_item
+    return {
+        "check": rule_item["check"],
+        "status": worse.get("status"),
+        "details": f"{rule_item['details']}; {llm_item.get('details', '')}".strip("; "),
+        "offending_fields": sorted(set(rule_item["offending_fields"]) | set(llm_item.get("offending_fields", []))),
+        "score": min(rule_item["score"], llm_item.get("score", 0.0)),
+    }
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Opt-in sampling profiler for slow requests.
+
+Enabled by setting PROFILE_SLOW_MS. While any sampled request is in
+flight, one shared background thread records the stacks of the process's
+threads (the event loop and the worker threads blocking calls are
+offloaded to) every PROFILE_INTERVAL_MS into each in-flight request's
+recording; if a request ends up slower than the threshold, its folded
+stacks are written to PROFILE_DIR. Concurrent requests share those
+threads, so their frames can show up in each other's profiles.
+Profiles only hold stage names, timings and stack frames (file,
+function, line) - never request bodies, queries or locals.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def env_float(name: str, default: Optional[float]) -> Optional[float]:
+    """Read a float setting from the environment."""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return float(value)
+
+
+class Recording:
+    """Stack samples collected while one request was in flight."""
+
+    def __init__(self):
+        self.samples: Counter = Counter()
+
+
+class StackSampler:
+    """One background thread sampling all thread stacks while any request records.
+
+    The thread starts with the first recording and exits after the last one
+    detaches, so concurrent sampled requests cost a single sampler instead
+    of one thread each.
+    """
+
+    def __init__(self, interval_s: float, max_depth: int = 64):
+        self.interval_s = interval_s
+        self.max_depth = max_depth
+        self.recordings: Set[Recording] = set()
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+    def attach(self) -> Recording:
+        recording = Recording()
+        with self.lock:
+            self.recordings.add(recording)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+                self.thread.start()
+        return recording
+
+    def detach(self, recording: Recording) -> None:
+        with self.lock:
+            self.recordings.discard(recording)
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            time.sleep(self.interval_s)
+            with self.lock:
+                if not self.recordings:
+                    self.thread = None
+                    return
+                recordings = list(self.recordings)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [
+                self.fold(names.get(thread_id, str(thread_id)), frame)
+                for thread_id, frame in sys._current_frames().items()
+                if thread_id != own_id
+            ]
+            for recording in recordings:
+                recording.samples.update(stacks)
+
+    def fold(self, thread_name: str, frame) -> str:
+        """Collapse a stack into 'thread;outer;...;inner' frame labels."""
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            code = frame.f_code
+            labels.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        labels.append(thread_name)
+        return ";".join(reversed(labels))
+
+
+class SlowRequestProfiler:
+    """Decides which requests to sample and writes profiles of slow ones."""
+
+    def __init__(self, threshold_ms: Optional[float], output_dir: str = "profiles",
+                 interval_ms: float = 5.0, sample_rate: float = 1.0):
+        self.threshold_ms = threshold_ms
+        self.output_dir = output_dir
+        self.interval_s = interval_ms / 1000.0
+        self.sample_rate = sample_rate
+        self.sampler = StackSampler(self.interval_s)
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms is not None
+
+    def start(self) -> Optional[Recording]:
+        """Start recording stack samples, or return None if this request is not sampled."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        return self.sampler.attach()
+
+    def finish(self, recording: Optional[Recording], method: str, path: str, status: int,
+               duration_s: float, timings: List[Tuple[str, float]]) -> Optional[str]:
+        """Stop recording and write a profile if the request was slow."""
+        if recording is None:
+            return None
+        self.sampler.detach(recording)
+        duration_ms = duration_s * 1000
+        if duration_ms < self.threshold_ms or not recording.samples:
+            return None
+
+        stages: Dict[str, float] = {}
+        for stage, seconds in timings:
+            stages[stage] = round(stages.get(stage, 0.0) + seconds * 1000, 3)
+
+        profile = {
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "threshold_ms": self.threshold_ms,
+            "interval_ms": self.interval_s * 1000,
+            "stages_ms": stages,
+            "folded_stacks": [
+                f"{stack} {count}" for stack, count in recording.samples.most_common()
+            ],
+        }
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = path.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+        filename = f"{int(time.time() * 1000)}_{method.lower()}_{slug}.json"
+        output_path = os.path.join(self.output_dir, filename)
+        with open(output_path, "w") as f:
+            json.dump(profile, f, indent=2)
+        return output_path
+
+
+def create_profiler() -> SlowRequestProfiler:
+    """Build the profiler from PROFILE_* environment variables."""
+    return SlowRequestProfiler(
+        threshold_ms=env_float("PROFILE_SLOW_MS", None),
+        output_dir=os.getenv("PROFILE_DIR", "profiles"),
+        interval_ms=env_float("PROFILE_INTERVAL_MS", 5.0),
+        sample_rate=env_float("PROFILE_SAMPLE_RATE", 1.0),
+    )
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Bounded LRU cache for /retrieve results, versioned by the index files."""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from simple_metrics import CACHE_HITS, CACHE_MISSES
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivial variants share an entry."""
+    return " ".join(query.lower().split())
+
+
+def compute_index_version(paths: Sequence[str]) -> str:
+    """Fingerprint index files by path, size and modification time."""
+    digest = hashlib.sha1()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except OSError:
+            digest.update(f"{path}:missing;".encode())
+    return digest.hexdigest()[:12]
+
+
+class RetrievalCache:
+    """LRU cache of serialized retrieval hits, cleared when the index changes.
+
+    ``on_change(version)`` is called when the index files change, so the
+    owner can reload the retriever; it should call ``clear()`` once the new
+    retriever serves, dropping results the old one computed meanwhile.
+    """
+
+    def __init__(self, index_paths: Sequence[str], max_entries: int = 1024,
+                 version_check_interval_s: float = 1.0,
+                 on_change: Optional[Callable[[str], None]] = None):
+        self.index_paths = list(index_paths)
+        self.on_change = on_change
+        self.max_entries = max_entries
+        self.version_check_interval_s = version_check_interval_s
+        self.entries: "OrderedDict[Hashable, List[Dict[str, Any]]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.index_version = compute_index_version(self.index_paths)
+        self.last_version_check = time.monotonic()
+        # Bumped on every clear so results computed before it are not stored
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def refresh_version(self) -> str:
+        """Re-fingerprint the index at most once per check interval."""
+        now = time.monotonic()
+        if now - self.last_version_check < self.version_check_interval_s:
+            return self.index_version
+        self.last_version_check = now
+        version = compute_index_version(self.index_paths)
+        if version != self.index_version:
+            with self.lock:
+                self.index_version = version
+                self.invalidations += 1
+            self.clear()
+            print(f"Index changed (version {version}), retrieval cache cleared")
+            if self.on_change is not None:
+                self.on_change(version)
+        return self.index_version
+
+    def make_key(self, query: str, top_k: int, use_reranker: bool) -> Tuple:
+        self.refresh_version()
+        return (self.generation, normalize_query(query), top_k, use_reranker)
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        with self.lock:
+            hits = self.entries.get(key)
+            if hits is None:
+                self.misses += 1
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+        if hits is None:
+            CACHE_MISSES.inc(cache="retrieve")
+        else:
+            CACHE_HITS.inc(cache="retrieve")
+        return hits
+
+    def put(self, key: Tuple, hits: List[Dict[str, Any]]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            # Drop results computed before the cache was last cleared
+            if key[0] != self.generation:
+                return
+            self.entries[key] = hits
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "index_version": self.index_version,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
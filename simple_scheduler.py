@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Admission control with per-endpoint lanes and a priority queue."""
+
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from simple_metrics import registry
+
+ADMISSION_REJECTIONS = registry.counter(
+    "doctor_bot_admission_rejections_total",
+    "Requests rejected with 429 because a lane queue was full.",
+    ["lane"],
+)
+
+# Early signals that a triage session may be emergent and should jump the queue
+EMERGENT_KEYWORDS = [
+    "chest pain",
+    "shortness of breath",
+    "difficulty breathing",
+    "can't breathe",
+    "cannot breathe",
+    "unconscious",
+    "unresponsive",
+    "fainted",
+    "seizure",
+    "stroke",
+    "slurred speech",
+    "facial droop",
+    "severe bleeding",
+    "coughing blood",
+    "vomiting blood",
+    "suicidal",
+    "overdose",
+    "anaphylaxis",
+    "throat swelling",
+    "worst headache",
+    "neck stiffness",
+]
+
+
+def is_emergent_query(text: str) -> bool:
+    """Whether free text mentions a red-flag symptom."""
+    text = text.lower()
+    return any(keyword in text for keyword in EMERGENT_KEYWORDS)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a lane's queue is full."""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"Too many concurrent {lane} requests")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class Lane:
+    """Concurrency cap plus bounded normal and priority wait queues."""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.priority_waiters: Deque[asyncio.Future] = deque()
+        # Moving average of time a slot is held, used for Retry-After
+        self.avg_service_s = 1.0
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a queue slot frees up."""
+        backlog = len(self.waiters) + len(self.priority_waiters) + self.active
+        return max(1, math.ceil(self.avg_service_s * backlog / self.max_concurrency))
+
+    async def acquire(self, priority: bool = False) -> None:
+        if self.active < self.max_concurrency and not self.waiters and not self.priority_waiters:
+            self.active += 1
+            return
+
+        queue = self.priority_waiters if priority else self.waiters
+        if len(queue) >= self.max_queue:
+            ADMISSION_REJECTIONS.inc(lane=self.name)
+            raise AdmissionRejected(self.name, self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in queue:
+                queue.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # The slot was handed to us just before cancellation; pass it on
+                self.release()
+            raise
+
+    def release(self, held_s: Optional[float] = None) -> None:
+        if held_s is not None:
+            self.avg_service_s = 0.8 * self.avg_service_s + 0.2 * held_s
+        for queue in (self.priority_waiters, self.waiters):
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    # Hand the slot over directly; active count is unchanged
+                    waiter.set_result(None)
+                    return
+        self.active -= 1
+
+
+class AdmissionController:
+    """Holds one lane per endpoint class."""
+
+    def __init__(self, lanes: Dict[str, Lane]):
+        self.lanes = lanes
+
+    @asynccontextmanager
+    async def admit(self, lane: str, priority: bool = False):
+        """Hold a slot in a lane for the duration of the block."""
+        selected = self.lanes[lane]
+        await selected.acquire(priority)
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            selected.release(time.perf_counter() - start_time)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {
+            name: {
+                "active": lane.active,
+                "max_concurrency": lane.max_concurrency,
+                "queued": len(lane.waiters),
+                "queued_priority": len(lane.priority_waiters),
+                "max_queue": lane.max_queue,
+            }
+            for name, lane in self.lanes.items()
+        }
+
+
+def create_admission_controller() -> AdmissionController:
+    """Build lanes from *_MAX_CONCURRENCY / *_MAX_QUEUE environment variables."""
+    return AdmissionController({
+        "retrieve": Lane(
+            "retrieve",
+            int(os.getenv("RETRIEVE_MAX_CONCURRENCY", "8")),
+            int(os.getenv("RETRIEVE_MAX_QUEUE", "64")),
+        ),
+        "triage": Lane(
+            "triage",
+            int(os.getenv("TRIAGE_MAX_CONCURRENCY", "4")),
+            int(os.getenv("TRIAGE_MAX_QUEUE", "16")),
+        ),
+    })
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Semantic cache for follow-up question sets.
+
+Symptom presentations cluster heavily, so the follow-up questions generated
+for "fever and cough" also fit "cough with fever for 2 days". The cache
+keeps the query embeddings already computed for retrieval in a small FAISS
+inner-product index; a new query whose cosine similarity to a cached one
+passes the threshold is served the stored questions instead of calling the
+LLM. Entries are evicted least-recently-used.
+
+Entries keep a digest of the query, never its text. Reuse is limited to
+the scope (e.g. session ID) an entry was stored under; sharing questions
+across patients must be enabled explicitly with ``shared=True``.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from simple_metrics import CACHE_HITS, CACHE_MISSES
+from simple_scheduler import is_emergent_query
+from simple_sessions import query_digest
+
+
+@dataclass
+class SemanticEntry:
+    """The follow-up questions generated for a query (stored as a digest)."""
+
+    query_digest: str
+    value: Any
+    created_at: float
+    scope: Optional[str] = None
+
+
+@dataclass
+class SemanticHit:
+    """A lookup that matched a cached entry."""
+
+    value: Any
+    similarity: float
+    query_digest: str
+
+
+def normalize_embedding(embedding: Any) -> np.ndarray:
+    """Float32 row vector with unit L2 norm, so inner product is cosine similarity."""
+    vector = np.asarray(embedding, dtype="float32").reshape(1, -1)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return np.ascontiguousarray(vector)
+
+
+class SemanticCache:
+    """LRU cache of values keyed by query embedding, matched by cosine similarity."""
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 2048, ttl_s: float = 24 * 3600,
+                 name: str = "followup_semantic", shared: bool = False):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.shared = shared
+        self.name = name
+        self.index = None
+        self.dim: Optional[int] = None
+        self.entries: "OrderedDict[int, SemanticEntry]" = OrderedDict()
+        self.next_id = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def ensure_index(self, dim: int) -> None:
+        import faiss
+
+        if self.index is None:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+            self.dim = dim
+        elif dim != self.dim:
+            raise ValueError(f"Embedding dimension {dim} does not match cache dimension {self.dim}")
+
+    def remove(self, entry_id: int) -> None:
+        self.entries.pop(entry_id, None)
+        self.index.remove_ids(np.array([entry_id], dtype="int64"))
+
+    def bypass(self, query: str, scope: Optional[str]) -> bool:
+        # Red-flag presentations always get freshly generated questions, and
+        # without a scope an unshared cache has nothing it may reuse
+        return is_emergent_query(query) or (scope is None and not self.shared)
+
+    def get(self, query: str, embedding: Any, scope: Optional[str] = None) -> Optional[SemanticHit]:
+        """Return the most similar fresh cached value of ``scope`` above the threshold."""
+        if self.bypass(query, scope):
+            with self.lock:
+                self.bypassed += 1
+            return None
+
+        vector = normalize_embedding(embedding)
+        hit = None
+        with self.lock:
+            if self.entries:
+                self.ensure_index(vector.shape[1])
+                # Every entry above the threshold, so an expired or out-of-scope
+                # nearest neighbour falls through to the next candidate
+                # (range_search keeps scores strictly above the radius; allow for rounding)
+                _, scores, ids = self.index.range_search(vector, self.threshold - 1e-6)
+                now = time.time()
+                for similarity, entry_id in sorted(zip(scores.tolist(), ids.tolist()), reverse=True):
+                    entry = self.entries.get(entry_id)
+                    if entry is None:
+                        continue
+                    if now - entry.created_at > self.ttl_s:
+                        self.remove(entry_id)
+                        continue
+                    if not self.shared and entry.scope != scope:
+                        continue
+                    self.entries.move_to_end(entry_id)
+                    hit = SemanticHit(entry.value, similarity, entry.query_digest)
+                    break
+            if hit is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if hit is None:
+            CACHE_MISSES.inc(cache=self.name)
+        else:
+            CACHE_HITS.inc(cache=self.name)
+        return hit
+
+    def put(self, query: str, embedding: Any, value: Any, scope: Optional[str] = None) -> None:
+        if self.bypass(query, scope):
+            return
+        vector = normalize_embedding(embedding)
+        with self.lock:
+            self.ensure_index(vector.shape[1])
+            entry_id = self.next_id
+            self.next_id += 1
+            self.index.add_with_ids(vector, np.array([entry_id], dtype="int64"))
+            self.entries[entry_id] = SemanticEntry(query_digest(query), value, time.time(), scope)
+            while len(self.entries) > self.max_entries:
+                self.remove(next(iter(self.entries)))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            if self.index is not None:
+                self.index.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "shared": self.shared,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def create_followup_cache() -> Optional[SemanticCache]:
+    """Build the follow-up cache from FOLLOWUP_CACHE_* settings (None when disabled)."""
+    if os.getenv("FOLLOWUP_CACHE_ENABLED", "false").lower() != "true":
+        return None
+    return SemanticCache(
+        threshold=float(os.getenv("FOLLOWUP_CACHE_THRESHOLD", "0.92")),
+        max_entries=int(os.getenv("FOLLOWUP_CACHE_MAX_ENTRIES", "2048")),
+        ttl_s=float(os.getenv("FOLLOWUP_CACHE_TTL_S", "86400")),
+        shared=os.getenv("FOLLOWUP_CACHE_SHARED", "false").lower() == "true",
+    )
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Server-side triage sessions that carry step-one work into step two.
+
+Step one of /triage embeds the query, retrieves a candidate set and
+generates follow-up questions. A session keeps those under a random ID so
+step two can re-rank the stored candidates with the patient's answers
+instead of running a new search.
+
+Sessions are PHI-minimal: they live only in memory, expire after a TTL,
+and store a digest of the query rather than its text. Follow-up answers
+are never stored.
+"""
+
+import os
+import copy
+import asyncio
+import time
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from simple_context_packer import hit_field
+from simple_retrieval_cache import normalize_query
+
+# Weight of the step-one retrieval score when re-ranking with answers
+DEFAULT_RERANK_ALPHA = 0.5
+
+
+def query_digest(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class TriageSession:
+    """Step-one state of one triage conversation."""
+
+    session_id: str
+    query_digest: str
+    hits: List[Any]
+    questions: List[Any]
+    query_embedding: Optional[List[float]] = None
+    created_at: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+
+
+class SessionStore:
+    """In-memory sessions with TTL expiry and a cap on live sessions."""
+
+    def __init__(self, ttl_s: float = 1800.0, max_sessions: int = 10000):
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[str, TriageSession]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.resumed = 0
+        self.expired = 0
+
+    def create(self, query: str, hits: Sequence[Any], questions: Sequence[Any],
+               query_embedding: Any = None) -> TriageSession:
+        embedding = None
+        if query_embedding is not None:
+            embedding = np.asarray(query_embedding, dtype="float32").ravel().tolist()
+        session = TriageSession(
+            session_id=secrets.token_urlsafe(16),
+            query_digest=query_digest(query),
+            hits=list(hits),
+            questions=list(questions),
+            query_embedding=embedding,
+        )
+        with self.lock:
+            self.purge_expired()
+            self.sessions[session.session_id] = session
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+            self.created += 1
+        return session
+
+    def get(self, session_id: str, query: Optional[str] = None) -> Optional[TriageSession]:
+        """Return a live session; None if unknown, expired, or for a different query."""
+        now = time.time()
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            if now - session.last_access > self.ttl_s:
+                del self.sessions[session_id]
+                self.expired += 1
+                return None
+            if query is not None and query_digest(query) != session.query_digest:
+                return None
+            session.last_access = now
+            self.sessions.move_to_end(session_id)
+            self.resumed += 1
+            return session
+
+    def delete(self, session_id: str) -> None:
+        with self.lock:
+            self.sessions.pop(session_id, None)
+
+    def purge_expired(self) -> None:
+        """Drop sessions idle longer than the TTL (caller holds the lock)."""
+        cutoff = time.time() - self.ttl_s
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.last_access >= cutoff:
+                break
+            del self.sessions[session_id]
+            self.expired += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            self.purge_expired()
+            return {
+                "active": len(self.sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_s": self.ttl_s,
+                "created": self.created,
+                "resumed": self.resumed,
+                "expired": self.expired,
+            }
+
+
+def answers_text(answers: Dict[str, str]) -> str:
+    """Question/answer pairs as one string for embedding or term matching."""
+    return " ".join(f"{question} {answer}" for question, answer in answers.items() if answer)
+
+
+def with_score(hit: Any, score: float) -> Any:
+    """Copy of a hit (dict, pydantic model or object) with a new score."""
+    if isinstance(hit, dict):
+        return dict(hit, score=score)
+    if hasattr(hit, "model_copy"):
+        return hit.model_copy(update={"score": score})
+    hit = copy.copy(hit)
+    hit.score = score
+    return hit
+
+
+def lexical_similarity(text: str, terms: set) -> float:
+    words = set(text.lower().split())
+    return len(words & terms) / len(terms) if terms else 0.0
+
+
+def rerank_with_answers(session: TriageSession, answers: Dict[str, str], top_k: int,
+                        embed_texts: Optional[Callable[[List[str]], Any]] = None,
+                        alpha: float = DEFAULT_RERANK_ALPHA) -> List[Any]:
+    """Re-score the session's candidates with the follow-up answers and keep ``top_k``.
+
+    With ``embed_texts`` (a batch encoder returning one vector per text, e.g.
+    the retriever's embedding model) the answers shift the stored query
+    embedding and candidates are scored by cosine similarity; without it,
+    by overlap with the answer terms. The new score is blended with the
+    step-one score by ``alpha``.
+    """
+    hits = session.hits
+    extra = answers_text(answers)
+    if not hits or not extra:
+        return hits[:top_k]
+
+    texts = [hit_field(hit, "text", "") or "" for hit in hits]
+    if embed_texts is not None and session.query_embedding is not None:
+        vectors = np.asarray(embed_texts([extra] + texts), dtype="float32")
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        query = np.asarray(session.query_embedding, dtype="float32")
+        query = query / (np.linalg.norm(query) + 1e-12) + vectors[0]
+        query /= np.linalg.norm(query) + 1e-12
+        similarities = (vectors[1:] @ query).tolist()
+    else:
+        terms = {word for word in extra.lower().split() if len(word) > 3}
+        similarities = [lexical_similarity(text, terms) for text in texts]
+
+    scored = [
+        with_score(hit, alpha * float(hit_field(hit, "score", 0.0) or 0.0) + (1 - alpha) * similarity)
+        for hit, similarity in zip(hits, similarities)
+    ]
+    scored.sort(key=lambda hit: hit_field(hit, "score", 0.0), reverse=True)
+    return scored[:top_k]
+
+
+def create_session_store() -> SessionStore:
+    """Session store configured from TRIAGE_SESSION_TTL_S / TRIAGE_SESSION_MAX."""
+    return SessionStore(
+        ttl_s=float(os.getenv("TRIAGE_SESSION_TTL_S", "1800")),
+        max_sessions=int(os.getenv("TRIAGE_SESSION_MAX", "10000")),
+    )
+
+
+def candidate_count(top_k: int) -> int:
+    """How many hits step one keeps in the session for step two to re-rank."""
+    return top_k * int(os.getenv("TRIAGE_SESSION_CANDIDATES_FACTOR", "3"))
+
+
+def session_create_stage(store: SessionStore) -> Callable[[Dict[str, Any]], Awaitable[str]]:
+    """Step-one stage for build_step_one_graph that stores the step-one work.
+
+    Keeps ``results["retrieval"]`` (retrieve ``candidate_count(top_k)`` hits
+    so step two has candidates to re-rank), the ``llm_followup`` questions
+    and ``results["query_embedding"]`` if present; returns the session ID.
+    """
+    async def run(results: Dict[str, Any]) -> str:
+        followups = results.get("llm_followup")
+        questions = getattr(followups, "questions", followups) or []
+        session = store.create(
+            results.get("query", ""), results.get("retrieval") or [], questions,
+            results.get("query_embedding"),
+        )
+        return session.session_id
+    return run
+
+
+def session_retrieve_stage(store: SessionStore,
+                           retrieve: Callable[[Dict[str, Any]], Awaitable[List[Any]]],
+                           embed_texts: Optional[Callable[[List[str]], Any]] = None
+                           ) -> Callable[[Dict[str, Any]], Awaitable[List[Any]]]:
+    """Step-two retrieval stage for build_step_two_graph.
+
+    Re-ranks the candidates of ``results["session_id"]`` with
+    ``results["followup_answers"]``; falls back to ``retrieve`` when there is
+    no live session for the query.
+    """
+    async def run(results: Dict[str, Any]) -> List[Any]:
+        session_id = results.get("session_id")
+        session = store.get(session_id, results.get("query")) if session_id else None
+        if session is None:
+            return await retrieve(results)
+        answers = results.get("followup_answers") or {}
+        top_k = int(results.get("top_k") or 8)
+        if embed_texts is None:
+            return rerank_with_answers(session, answers, top_k)
+        # The encoder is synchronous and CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(rerank_with_answers, session, answers, top_k, embed_texts)
+    return run
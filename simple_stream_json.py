@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Incremental JSON parser for streamed structured LLM output.
+
+Feeds on text deltas as they arrive and emits each top-level field of the
+JSON object (``possible_conditions``, ``severity_flags``, ...) as soon as
+its value is complete, optionally validating it against the field's type
+in a pydantic schema. Consumers can act on early fields before the model
+has finished generating the rest.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class StreamParseError(ValueError):
+    """Raised when the stream is not a well-formed JSON object."""
+
+
+class IncrementalJSONParser:
+    """Emits (key, value) pairs of a top-level JSON object as they complete."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.started = False
+        self.finished = False
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        # Offsets of the key and value currently being read at depth 1
+        self.key: Optional[str] = None
+        self.key_start: Optional[int] = None
+        self.value_start: Optional[int] = None
+        self.fields: Dict[str, Any] = {}
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Consume more text; return fields completed by it."""
+        self.buffer += text
+        completed: List[Tuple[str, Any]] = []
+        while self.pos < len(self.buffer) and not self.finished:
+            char = self.buffer[self.pos]
+            if not self.started:
+                # Skip any preamble such as a ```json fence
+                if char == "{":
+                    self.started = True
+                    self.depth = 1
+                self.pos += 1
+                continue
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.key is None and self.value_start is None:
+                        self.key = json.loads(self.buffer[self.key_start:self.pos + 1])
+                self.pos += 1
+                continue
+
+            if char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.key is None and self.value_start is None:
+                    self.key_start = self.pos
+            elif char == ":" and self.depth == 1 and self.value_start is None:
+                self.value_start = self.pos + 1
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.finish_field(completed)
+                    self.finished = True
+            elif char == "," and self.depth == 1:
+                self.finish_field(completed)
+            self.pos += 1
+        return completed
+
+    def finish_field(self, completed: List[Tuple[str, Any]]) -> None:
+        if self.key is None or self.value_start is None:
+            return
+        raw = self.buffer[self.value_start:self.pos].strip()
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise StreamParseError(f"Invalid value for field '{self.key}': {e}") from e
+        self.fields[self.key] = value
+        completed.append((self.key, value))
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+
+    def result(self) -> Dict[str, Any]:
+        """The complete object; raises if the stream ended early."""
+        if not self.finished:
+            raise StreamParseError("Stream ended before the JSON object was complete")
+        return dict(self.fields)
+
+
+class FieldValidator:
+    """Validates individual fields against a pydantic model's field types."""
+
+    def __init__(self, output_schema: Any):
+        self.output_schema = output_schema
+        self.adapters: Dict[str, Any] = {}
+        fields = getattr(output_schema, "model_fields", None)
+        if fields:
+            from pydantic import TypeAdapter
+            for name, info in fields.items():
+                self.adapters[info.alias or name] = TypeAdapter(info.annotation)
+
+    def validate_field(self, name: str, value: Any) -> Any:
+        adapter = self.adapters.get(name)
+        return adapter.validate_python(value) if adapter is not None else value
+
+    def validate_result(self, data: Dict[str, Any]) -> Any:
+        if hasattr(self.output_schema, "model_validate"):
+            return self.output_schema.model_validate(data)
+        return data
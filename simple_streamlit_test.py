@@ -4,94 +4,92 @@ Simple Streamlit test to debug the issue
 """
 
 import streamlit as st
-import requests
 import json
 
+from doctor_bot_client import APIError, DoctorBotClient
+
+API_BASE_URL = "http://127.0.0.1:8000"
+
+@st.cache_resource
+def get_client() -> DoctorBotClient:
+    """One pooled client shared across reruns."""
+    return DoctorBotClient(API_BASE_URL)
+
 st.title("🏥 Doctor Bot - Simple Test")
 st.markdown("Testing the basic functionality")
 
 # Test API connection
 if st.button("Test API Connection"):
     try:
-        response = requests.get("http://127.0.0.1:8000/health", timeout=10)
-        if response.status_code == 200:
-            st.success("✅ API is working!")
-            st.json(response.json())
-        else:
-            st.error(f"❌ API returned status {response.status_code}")
+        health = get_client().health()
+        st.success("✅ API is working!")
+        st.json(health.model_dump())
+    except APIError as e:
+        st.error(f"❌ API returned status {e.status_code}")
     except Exception as e:
         st.error(f"❌ API Error: {e}")
 
 # Test triage call
 if st.button("Test Triage Call"):
     try:
-        response = requests.post(
-            "http://127.0.0.1:8000/triage",
-            json={"query": "fever and headache"},
-            timeout=30
-        )
-        if response.status_code == 200:
-            data = response.json()
-            st.success("✅ Triage call successful!")
-            st.write("Response keys:", list(data.keys()))
-            st.write("Next action:", data.get('next_action'))
-            
-            if 'followup_questions' in data:
-                st.write("Follow-up questions:")
-                for i, q in enumerate(data['followup_questions'], 1):
-                    st.write(f"{i}. {q.get('text', 'N/A')}")
-        else:
-            st.error(f"❌ Triage call returned status {response.status_code}")
+        data = get_client().triage("fever and headache")
+        st.success("✅ Triage call successful!")
+        st.write("Response keys:", list(data.model_dump().keys()))
+        st.write("Next action:", data.next_action)
+        
+        if data.followup_questions:
+            st.write("Follow-up questions:")
+            for i, q in enumerate(data.followup_questions, 1):
+                st.write(f"{i}. {q.text or 'N/A'}")
+    except APIError as e:
+        st.error(f"❌ Triage call returned status {e.status_code}")
     except Exception as e:
         st.error(f"❌ Triage Error: {e}")
 
+def run_full_triage():
+    """Both /triage steps over the pooled client, passing the session along."""
+    client = get_client()
+    # First call
+    try:
+        data1 = client.triage("fever and headache")
+    except APIError as e:
+        st.error(f"❌ First call returned status {e.status_code}")
+        return
+    st.write("Step 1 - Follow-up questions generated")
+    
+    # Second call with answers
+    try:
+        data2 = client.triage(
+            "fever and headache",
+            followup_answers={
+                "headache_location": "severe throbbing pain in temples",
+                "fever_duration": "2 days continuous"
+            },
+            session_id=data1.session_id
+        )
+    except APIError as e:
+        st.error(f"❌ Second call returned status {e.status_code}")
+        return
+    
+    st.success("✅ Full triage successful!")
+    st.write("Response keys:", list(data2.model_dump().keys()))
+    st.write("Next action:", data2.next_action)
+    
+    if data2.triage_note:
+        st.write("Triage note generated!")
+        triage_note = data2.triage_note
+        st.write("Patient query:", triage_note.get('patient_query'))
+        st.write("Possible conditions:", len(triage_note.get('possible_conditions', [])))
+    
+    if data2.judge_verdict:
+        st.write("Judge verdict generated!")
+        verdict = data2.judge_verdict
+        st.write("Decision:", verdict.get('decision'))
+        st.write("Overall score:", verdict.get('overall_score'))
+
 # Test full triage with answers
 if st.button("Test Full Triage"):
     try:
-        # First call
-        response1 = requests.post(
-            "http://127.0.0.1:8000/triage",
-            json={"query": "fever and headache"},
-            timeout=30
-        )
-        
-        if response1.status_code == 200:
-            data1 = response1.json()
-            st.write("Step 1 - Follow-up questions generated")
-            
-            # Second call with answers
-            response2 = requests.post(
-                "http://127.0.0.1:8000/triage",
-                json={
-                    "query": "fever and headache",
-                    "followup_answers": {
-                        "headache_location": "severe throbbing pain in temples",
-                        "fever_duration": "2 days continuous"
-                    }
-                },
-                timeout=30
-            )
-            
-            if response2.status_code == 200:
-                data2 = response2.json()
-                st.success("✅ Full triage successful!")
-                st.write("Response keys:", list(data2.keys()))
-                st.write("Next action:", data2.get('next_action'))
-                
-                if 'triage_note' in data2:
-                    st.write("Triage note generated!")
-                    triage_note = data2['triage_note']
-                    st.write("Patient query:", triage_note.get('patient_query'))
-                    st.write("Possible conditions:", len(triage_note.get('possible_conditions', [])))
-                
-                if 'judge_verdict' in data2:
-                    st.write("Judge verdict generated!")
-                    verdict = data2['judge_verdict']
-                    st.write("Decision:", verdict.get('decision'))
-                    st.write("Overall score:", verdict.get('overall_score'))
-            else:
-                st.error(f"❌ Second call returned status {response2.status_code}")
-        else:
-            st.error(f"❌ First call returned status {response1.status_code}")
+        run_full_triage()
     except Exception as e:
         st.error(f"❌ Full triage error: {e}")
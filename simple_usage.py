@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Per-call token and latency accounting for LLM agents.
+
+Every provider call appends one record (agent, provider, model, prompt and
+completion tokens, latency, retries, cache status) to a bounded in-memory
+ring buffer. Aggregates per agent show which prompt costs the most tokens
+and which provider is slowest. The agent of a call is taken from a context
+variable set by the LLM managers, so providers need no extra arguments.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+# Agent on whose behalf the current LLM call runs
+current_agent: ContextVar[Optional[str]] = ContextVar("current_agent", default=None)
+# Response cache status of the current LLM call: "hit", "miss" or "off"
+current_cache_status: ContextVar[str] = ContextVar("current_cache_status", default="off")
+
+
+@contextmanager
+def agent_scope(agent: Optional[str]) -> Iterator[None]:
+    """Attribute LLM calls made inside the block to ``agent``."""
+    token = current_agent.set(agent)
+    try:
+        yield
+    finally:
+        current_agent.reset(token)
+
+
+@contextmanager
+def cache_scope(status: str) -> Iterator[None]:
+    """Record LLM calls made inside the block with cache status ``status``."""
+    token = current_cache_status.set(status)
+    try:
+        yield
+    finally:
+        current_cache_status.reset(token)
+
+
+@dataclass
+class UsageRecord:
+    """One LLM call. Token counts are None when the provider did not report them."""
+
+    timestamp: float
+    agent: str
+    provider: str
+    model: str
+    latency_s: float
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    retries: int = 0
+    cache: str = "off"  # "hit", "miss" or "off"
+    ok: bool = True
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(records: List[UsageRecord]) -> Dict[str, Any]:
+    """Totals, averages and latency percentiles of a group of records."""
+    reported = [r for r in records if r.prompt_tokens is not None]
+    prompt_tokens = sum(r.prompt_tokens or 0 for r in reported)
+    completion_tokens = sum(r.completion_tokens or 0 for r in reported)
+    latencies = [r.latency_s for r in records]
+    cache_lookups = [r for r in records if r.cache != "off"]
+    cache_hits = sum(1 for r in cache_lookups if r.cache == "hit")
+    return {
+        "calls": len(records),
+        "errors": sum(1 for r in records if not r.ok),
+        "retries": sum(r.retries for r in records),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "avg_prompt_tokens": round(prompt_tokens / len(reported), 1) if reported else 0.0,
+        "avg_completion_tokens": round(completion_tokens / len(reported), 1) if reported else 0.0,
+        "latency_p50_s": round(percentile(latencies, 0.5), 4),
+        "latency_p95_s": round(percentile(latencies, 0.95), 4),
+        "cache_hit_rate": round(cache_hits / len(cache_lookups), 4) if cache_lookups else 0.0,
+    }
+
+
+class UsageLedger:
+    """Bounded ring buffer of UsageRecords with per-agent aggregates."""
+
+    def __init__(self, max_records: int = 10000):
+        self.records: Deque[UsageRecord] = deque(maxlen=max_records)
+        self.lock = threading.Lock()
+
+    def record(self, provider: str, model: str, latency_s: float, agent: Optional[str] = None,
+               prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+               retries: int = 0, cache: Optional[str] = None, ok: bool = True) -> UsageRecord:
+        entry = UsageRecord(
+            timestamp=time.time(),
+            agent=agent or current_agent.get() or "unknown",
+            provider=provider,
+            model=model,
+            latency_s=latency_s,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            retries=retries,
+            cache=cache or current_cache_status.get(),
+            ok=ok,
+        )
+        with self.lock:
+            self.records.append(entry)
+        return entry
+
+    def snapshot(self) -> List[UsageRecord]:
+        with self.lock:
+            return list(self.records)
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregates per agent, and per provider/model within each agent."""
+        by_agent: Dict[str, List[UsageRecord]] = {}
+        for entry in self.snapshot():
+            by_agent.setdefault(entry.agent, []).append(entry)
+
+        agents = {}
+        for agent, records in sorted(by_agent.items()):
+            by_provider: Dict[str, List[UsageRecord]] = {}
+            for entry in records:
+                by_provider.setdefault(f"{entry.provider}/{entry.model}", []).append(entry)
+            agents[agent] = dict(
+                summarize(records),
+                providers={name: summarize(group) for name, group in sorted(by_provider.items())},
+            )
+        return {"records": len(self.records), "max_records": self.records.maxlen, "agents": agents}
+
+    def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return [asdict(entry) for entry in self.snapshot()[-limit:]]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.records.clear()
+
+
+def format_usage_report(summary: Dict[str, Any]) -> str:
+    """Markdown table of per-agent usage, for evaluation reports."""
+    lines = [
+        "| Agent | Calls | Errors | Avg prompt tokens | Avg completion tokens | p50 (s) | p95 (s) | Cache hit rate |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for agent, stats in summary.get("agents", {}).items():
+        lines.append(
+            f"| {agent} | {stats['calls']} | {stats['errors']} | {stats['avg_prompt_tokens']} | "
+            f"{stats['avg_completion_tokens']} | {stats['latency_p50_s']} | {stats['latency_p95_s']} | "
+            f"{stats['cache_hit_rate']:.0%} |"
+        )
+    return "\n".join(lines)
+
+
+# Process-wide ledger
+usage_ledger = UsageLedger(max_records=int(os.getenv("LLM_USAGE_MAX_RECORDS", "10000")))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Pooled, cached API access shared by the Streamlit apps.
+
+Streamlit re-runs the whole script on every widget interaction. One
+``DoctorBotClient`` per API URL (per server process, via
+``st.cache_resource``) keeps connections alive across reruns, a healthy
+status is cached for a few seconds, the API's streaming support is read
+from its OpenAPI schema, and idempotent /retrieve results are cached per
+(api_url, query, top_k) so repeated clicks do not hit the backend again.
+Failed calls are never cached, so the UI notices as soon as the API comes
+back.
+"""
+
+import os
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import streamlit as st
+
+from doctor_bot_client import APIError, DoctorBotClient, DoctorBotError
+from doctor_bot_client.client import STREAM_PATH
+
+HEALTH_TTL_S = float(os.getenv("UI_HEALTH_TTL_S", "10"))
+RETRIEVE_TTL_S = float(os.getenv("UI_RETRIEVE_TTL_S", "600"))
+CAPABILITY_TTL_S = float(os.getenv("UI_CAPABILITY_TTL_S", "60"))
+
+
+@st.cache_resource
+def get_client(api_url: str) -> DoctorBotClient:
+    """One pooled client per API URL and Streamlit server process."""
+    return DoctorBotClient(api_url, stream_path=os.getenv("UI_TRIAGE_STREAM_PATH", STREAM_PATH))
+
+
+@st.cache_data(ttl=HEALTH_TTL_S, show_spinner=False)
+def _health(api_url: str) -> Dict[str, Any]:
+    return get_client(api_url).health().model_dump()
+
+
+def check_health(api_url: str) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+    """(status code, health payload); status is None when offline.
+
+    Only a healthy answer is cached (for HEALTH_TTL_S seconds): errors
+    raise inside the cached function, and Streamlit does not cache those.
+    """
+    try:
+        return 200, _health(api_url)
+    except APIError as e:
+        return e.status_code, None
+    except DoctorBotError:
+        return None, None
+
+
+def triage(api_url: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """One /triage call as a plain dict; raises DoctorBotError on failure."""
+    return get_client(api_url).triage(**data).model_dump()
+
+
+@st.cache_data(ttl=CAPABILITY_TTL_S, show_spinner=False)
+def _supports_streaming(api_url: str) -> bool:
+    return get_client(api_url).supports_streaming()
+
+
+def streaming_available(api_url: str) -> bool:
+    """Whether the API advertises the streaming triage endpoint; failed checks are not cached."""
+    try:
+        return _supports_streaming(api_url)
+    except DoctorBotError:
+        return False
+
+
+def stream_triage(api_url: str, data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Events from the streaming triage endpoint; raises StreamingUnavailable when it does not exist."""
+    return get_client(api_url).stream_triage(**data)
+
+
+@st.cache_data(ttl=RETRIEVE_TTL_S, max_entries=256, show_spinner=False)
+def cached_retrieve(api_url: str, query: str, top_k: int) -> Dict[str, Any]:
+    """Retrieval results per (api_url, query, top_k); errors raise and are not cached."""
+    return get_client(api_url).retrieve(query, top_k).model_dump()
@@ -2,7 +2,6 @@
 """Streamlit web interface for Doctor Bot."""
 
 import streamlit as st
-import requests
 import json
 import time
 from typing import List, Dict, Any
@@ -12,6 +11,9 @@ import os
 # Add current directory to path
 sys.path.append('.')
 
+from doctor_bot_client import DoctorBotError
+from streamlit_api import cached_retrieve, check_health, get_client
+
 # Configure page
 st.set_page_config(
     page_title="🏥 Doctor Bot - Clinical Screening Assistant",
@@ -24,24 +26,19 @@ st.set_page_config(
 API_BASE_URL = "http://127.0.0.1:8000"
 
 def check_server_status():
-    """Check if the API server is running."""
-    try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5)
-        return response.status_code == 200, response.json()
-    except:
-        return False, None
+    """Check if the API server is running (cached for a few seconds)."""
+    status, health = check_health(API_BASE_URL)
+    return status == 200, health
 
 def call_api(endpoint: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
-    """Make API call to backend."""
+    """Make API call to backend through the shared pooled client."""
     try:
+        if endpoint == "/retrieve" and data:
+            return cached_retrieve(API_BASE_URL, data["query"], data.get("top_k", 5))
         if data:
-            response = requests.post(f"{API_BASE_URL}{endpoint}", json=data, timeout=30)
-        else:
-            response = requests.get(f"{API_BASE_URL}{endpoint}", timeout=30)
-        
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+            return get_client(API_BASE_URL).request("POST", endpoint, data, idempotent=False)
+        return get_client(API_BASE_URL).request("GET", endpoint)
+    except DoctorBotError as e:
         st.error(f"API Error: {e}")
         return None
 
@@ -4,12 +4,14 @@ Streamlit UI for Doctor Bot with LLM-as-Judge Implementation
 """
 
 import streamlit as st
-import requests
 import json
 import time
 from typing import Dict, List, Optional
 import pandas as pd
 
+from doctor_bot_client import DoctorBotError, StreamingUnavailable
+from streamlit_api import check_health, stream_triage, streaming_available, triage
+
 # Configure page
 st.set_page_config(
     page_title="Doctor Bot - LLM-as-Judge Demo",
@@ -21,13 +23,11 @@ st.set_page_config(
 # API Configuration
 API_BASE_URL = "http://127.0.0.1:8000"
 
-def call_api(endpoint: str, data: Dict) -> Optional[Dict]:
-    """Call the API endpoint and return response."""
+def call_triage(api_url: str, data: Dict) -> Optional[Dict]:
+    """Call /triage through the pooled client and return the response."""
     try:
-        response = requests.post(f"{API_BASE_URL}{endpoint}", json=data, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return triage(api_url, data)
+    except DoctorBotError as e:
         st.error(f"API Error: {e}")
         return None
 
@@ -62,112 +62,363 @@ def display_qa_issues(issues: List[Dict]) -> None:
             if offending_fields:
                 st.write(f"**Offending Fields:** {', '.join(offending_fields)}")
 
+def display_conditions(conditions: List[Dict]) -> None:
+    st.subheader("🔬 Possible Conditions")
+    for i, condition in enumerate(conditions, 1):
+        with st.expander(f"Condition {i}: {condition.get('name', 'Unknown')}"):
+            st.write(f"**Rationale:** {condition.get('rationale', 'N/A')}")
+            st.write(f"**Source:** {condition.get('source', 'N/A')}")
+            support_chunks = condition.get('support_chunk_ids', [])
+            if support_chunks:
+                st.write(f"**Supporting Chunks:** {', '.join(support_chunks)}")
+
+def display_severity_flags(severity_flags: Dict) -> None:
+    st.subheader("🚨 Severity Assessment")
+    col1, col2 = st.columns(2)
+    with col1:
+        severity = severity_flags.get('severity', 'unknown')
+        if severity == "emergent":
+            st.error(f"**Severity:** {severity.upper()}")
+        elif severity == "urgent":
+            st.warning(f"**Severity:** {severity.upper()}")
+        else:
+            st.info(f"**Severity:** {severity.upper()}")
+    
+    with col2:
+        st.write(f"**Source:** {severity_flags.get('source', 'N/A')}")
+    
+    red_flags = severity_flags.get('red_flags', [])
+    if red_flags:
+        st.write("**Red Flags:**")
+        for flag in red_flags:
+            st.write(f"• {flag}")
+    
+    emergency_action = severity_flags.get('emergency_action')
+    if emergency_action:
+        st.error(f"**Emergency Action:** {emergency_action}")
+
+def display_tests(tests: List[Dict]) -> None:
+    st.subheader("🧪 Recommended Tests")
+    for i, test in enumerate(tests, 1):
+        with st.expander(f"Test {i}: {test.get('name', 'Unknown')}"):
+            st.write(f"**Why:** {test.get('why', 'N/A')}")
+            st.write(f"**Timing:** {test.get('timing', 'N/A')}")
+            st.write(f"**Source:** {test.get('source', 'N/A')}")
+            support_chunks = test.get('support_chunk_ids', [])
+            if support_chunks:
+                st.write(f"**Supporting Chunks:** {', '.join(support_chunks)}")
+
+def display_disease_course(disease_course: Dict) -> None:
+    st.subheader("📈 Expected Disease Course")
+    st.write(f"**Baseline Summary:** {disease_course.get('baseline_summary', 'N/A')}")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.write(f"**30 Days:** {disease_course.get('day_30', 'N/A')}")
+    with col2:
+        st.write(f"**60 Days:** {disease_course.get('day_60', 'N/A')}")
+    with col3:
+        st.write(f"**90 Days:** {disease_course.get('day_90', 'N/A')}")
+    
+    st.write(f"**Source:** {disease_course.get('source', 'N/A')}")
+
+def display_lifestyle_plan(lifestyle: Dict) -> None:
+    st.subheader("🏃‍♂️ Lifestyle Recommendations")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write(f"**Diet:** {lifestyle.get('diet', 'N/A')}")
+        st.write(f"**Activity:** {lifestyle.get('activity', 'N/A')}")
+        st.write(f"**Sleep:** {lifestyle.get('sleep', 'N/A')}")
+    with col2:
+        st.write(f"**Hydration:** {lifestyle.get('hydration', 'N/A')}")
+        st.write(f"**Home Remedies:** {lifestyle.get('home_remedies', 'N/A')}")
+    
+    st.write(f"**Source:** {lifestyle.get('source', 'N/A')}")
+
+def display_followup_schedule(followup_schedule: str) -> None:
+    st.subheader("📅 Follow-up Schedule")
+    st.write(followup_schedule)
+
+def display_disclaimers(disclaimers: str) -> None:
+    st.subheader("⚠️ Important Disclaimers")
+    st.warning(disclaimers)
+
+# Note fields in display order, each with its renderer
+NOTE_SECTIONS = [
+    ("patient_query", lambda value: st.write(f"**Patient Query:** {value}")),
+    ("followups_asked", lambda value: st.write(f"**Follow-ups Asked:** {', '.join(value)}")),
+    ("possible_conditions", display_conditions),
+    ("severity_flags", display_severity_flags),
+    ("tests_to_discuss", display_tests),
+    ("disease_course", display_disease_course),
+    ("lifestyle_plan", display_lifestyle_plan),
+    ("followup_schedule", display_followup_schedule),
+    ("disclaimers", display_disclaimers),
+]
+
+def display_note_field(name: str, value) -> None:
+    """Render one triage note field; empty values and unknown fields are skipped."""
+    for field_name, render in NOTE_SECTIONS:
+        if field_name == name and value:
+            render(value)
+
 def display_triage_note(note: Dict) -> None:
     """Display triage note in a formatted way."""
     st.subheader("📋 Triage Note")
-    
-    # Patient Query
     st.write(f"**Patient Query:** {note.get('patient_query', 'N/A')}")
+    for name, _ in NOTE_SECTIONS[1:]:
+        display_note_field(name, note.get(name))
+
+TRIAGE_DEFAULTS = {
+    "triage_stage": "input",  # input -> followups -> done
+    "patient_query": "",
+    "triage_top_k": 8,
+    "session_id": None,
+    "questions": [],
+    "triage_note": None,
+    "judge_verdict": None,
+    "triage_error": None,
+    "stage_timings": {},
+}
+
+def init_triage_state() -> None:
+    """Seed the triage state machine in session state on first run."""
+    for key, value in TRIAGE_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = value
+
+def reset_triage() -> None:
+    """Return to the input stage, dropping questions, answers and results."""
+    for key, value in TRIAGE_DEFAULTS.items():
+        st.session_state[key] = value
+    for key in [key for key in st.session_state if str(key).startswith("answer_")]:
+        del st.session_state[key]
+
+def finish_triage(response: Dict) -> None:
+    st.session_state.triage_note = response.get("triage_note")
+    st.session_state.judge_verdict = response.get("judge_verdict")
+    st.session_state.triage_stage = "done"
+
+def start_triage(api_url: str, patient_query: str, top_k: int) -> None:
+    """Step one: ask for follow-up questions. Runs once per Start click."""
+    st.session_state.triage_error = None
+    with st.spinner("Analyzing symptoms and generating follow-up questions..."):
+        response = call_triage(api_url, {
+            "query": patient_query,
+            "top_k": top_k
+        })
+    if not response:
+        st.session_state.triage_error = "Failed to communicate with API."
+        return
+
+    st.session_state.patient_query = patient_query
+    st.session_state.triage_top_k = top_k
+    st.session_state.session_id = response.get("session_id")
+    if response.get("next_action") == "ask_followups":
+        questions = response.get("followup_questions", [])
+        if not questions:
+            st.session_state.triage_error = "No follow-up questions were generated."
+            return
+        st.session_state.questions = questions
+        st.session_state.triage_stage = "followups"
+    elif response.get("next_action") == "return_triage":
+        finish_triage(response)
+    else:
+        st.session_state.triage_error = "Unexpected response from API."
+
+def submit_followups(api_url: str, answers: Dict[str, str], stream: bool = False) -> None:
+    """Step two: generate the triage note from the stored query and answers.
+
+    With ``stream`` the note is rendered field by field from the streaming
+    endpoint, falling back to the regular call when the API lacks it.
+    """
+    st.session_state.triage_error = None
+    payload = {
+        "query": st.session_state.patient_query,
+        "followup_answers": answers,
+        "top_k": st.session_state.triage_top_k
+    }
+    if st.session_state.session_id:
+        payload["session_id"] = st.session_state.session_id
+    response = None
+    if stream:
+        try:
+            response = stream_followups(api_url, payload)
+            if response is None:
+                return
+        except StreamingUnavailable:
+            stream = False
+    if not stream:
+        with st.spinner("Generating triage note and running quality assessment..."):
+            response = call_triage(api_url, payload)
+    if not response:
+        st.session_state.triage_error = "Failed to communicate with API."
+    elif response.get("next_action") == "return_triage":
+        finish_triage(response)
+    else:
+        st.session_state.triage_error = "Unexpected response from API."
+
+def display_judge_verdict(verdict: Optional[Dict]) -> None:
+    """Display the judge decision, issues and any revised note."""
+    if not verdict:
+        return
+    st.subheader("⚖️ Quality Assessment Results")
     
-    # Followups Asked
-    followups = note.get('followups_asked', [])
-    if followups:
-        st.write(f"**Follow-ups Asked:** {', '.join(followups)}")
+    decision = verdict.get("decision", "unknown")
+    overall_score = verdict.get("overall_score", 0.0)
     
-    # Possible Conditions
-    conditions = note.get('possible_conditions', [])
-    if conditions:
-        st.subheader("🔬 Possible Conditions")
-        for i, condition in enumerate(conditions, 1):
-            with st.expander(f"Condition {i}: {condition.get('name', 'Unknown')}"):
-                st.write(f"**Rationale:** {condition.get('rationale', 'N/A')}")
-                st.write(f"**Source:** {condition.get('source', 'N/A')}")
-                support_chunks = condition.get('support_chunk_ids', [])
-                if support_chunks:
-                    st.write(f"**Supporting Chunks:** {', '.join(support_chunks)}")
+    if decision == "approve":
+        st.success(f"✅ **APPROVED** - Overall Score: {overall_score:.2f}")
+    elif decision == "revise":
+        st.warning(f"⚠️ **REVISED** - Overall Score: {overall_score:.2f}")
+        st.info("The triage note has been automatically revised based on quality assessment.")
+    else:  # reject
+        st.error(f"❌ **REJECTED** - Overall Score: {overall_score:.2f}")
     
-    # Severity Flags
-    severity_flags = note.get('severity_flags', {})
-    if severity_flags:
-        st.subheader("🚨 Severity Assessment")
-        col1, col2 = st.columns(2)
-        with col1:
-            severity = severity_flags.get('severity', 'unknown')
-            if severity == "emergent":
-                st.error(f"**Severity:** {severity.upper()}")
-            elif severity == "urgent":
-                st.warning(f"**Severity:** {severity.upper()}")
-            else:
-                st.info(f"**Severity:** {severity.upper()}")
-        
-        with col2:
-            st.write(f"**Source:** {severity_flags.get('source', 'N/A')}")
-        
-        red_flags = severity_flags.get('red_flags', [])
-        if red_flags:
-            st.write("**Red Flags:**")
-            for flag in red_flags:
-                st.write(f"• {flag}")
-        
-        emergency_action = severity_flags.get('emergency_action')
-        if emergency_action:
-            st.error(f"**Emergency Action:** {emergency_action}")
+    # Display issues
+    issues = verdict.get("issues", [])
+    display_qa_issues(issues)
+    
+    # Show if note was revised
+    revised_note = verdict.get("revised_note")
+    if revised_note and decision == "revise":
+        st.subheader("📝 Revised Triage Note")
+        st.info("The following is the judge-revised version of the triage note:")
+        display_triage_note(revised_note)
+
+def display_stage_latency(placeholder, timings_ms: Dict[str, float]) -> None:
+    """Per-stage latency bar (milliseconds), in stage completion order."""
+    if timings_ms:
+        placeholder.bar_chart(pd.DataFrame({"latency (ms)": list(timings_ms.values())}, index=list(timings_ms)))
+
+def stream_followups(api_url: str, payload: Dict) -> Optional[Dict]:
+    """Step two over the streaming endpoint, rendering fields as they arrive.
+
+    Returns the /triage response (assembled from the field events when the
+    stream carries no ``result`` event), or None after recording an error.
+    Raises StreamingUnavailable so the caller can fall back to /triage.
+    """
+    status = st.empty()
+    latency = st.empty()
+    note_area = st.container()
+    verdict_area = st.container()
+    note, verdict, response, timings = {}, None, None, {}
+    start_time = time.time()
+    status.info("⏳ Starting triage pipeline...")
+    try:
+        for event in stream_triage(api_url, payload):
+            kind = event.get("event")
+            if kind == "stage_start":
+                status.info(f"⏳ Running {event['stage']}... ({time.time() - start_time:.1f}s)")
+            elif kind == "stage_end":
+                timings[event["stage"]] = event.get("duration_ms", 0.0)
+                display_stage_latency(latency, timings)
+            elif kind == "field" and event["field"] == "judge_verdict":
+                verdict = event["value"]
+                with verdict_area:
+                    display_judge_verdict(verdict)
+            elif kind == "field":
+                with note_area:
+                    if not note:
+                        st.subheader("📋 Triage Note")
+                        st.caption(f"First result after {time.time() - start_time:.1f}s")
+                    note[event["field"]] = event["value"]
+                    display_note_field(event["field"], event["value"])
+            elif kind == "result":
+                response = event.get("response")
+            elif kind == "error":
+                status.empty()
+                st.session_state.triage_error = f"Stage '{event.get('stage')}' failed: {event.get('detail')}"
+                return None
+            elif kind == "done":
+                timings = event.get("timings_ms") or timings
+    except StreamingUnavailable:
+        status.empty()
+        raise
+    except DoctorBotError as e:
+        status.empty()
+        st.session_state.triage_error = f"API Error: {e}"
+        return None
+    status.empty()
+    st.session_state.stage_timings = timings
+    return response or {"next_action": "return_triage", "triage_note": note or None, "judge_verdict": verdict}
+
+def render_triage_flow(api_url: str, top_k: int) -> None:
+    """Render the current triage stage.
+
+    Each API call happens only in the rerun triggered by its own button,
+    then the stage advances and the script reruns, so widget interactions
+    never repeat an LLM call.
+    """
+    init_triage_state()
+    stage = st.session_state.triage_stage
+    
+    # Step 1: Initial Query
+    st.subheader("Step 1: Patient Symptoms")
+    if stage == "input":
+        patient_query = st.text_area(
+            "Describe the patient's symptoms:",
+            value="fever 3 days, chills, cough, poor appetite",
+            height=100,
+            key="patient_query_input",
+            help="Enter the patient's initial symptom description"
+        )
+        if st.button("🚀 Start Triage Process", type="primary"):
+            if not patient_query.strip():
+                st.error("Please enter patient symptoms.")
+                return
+            start_triage(api_url, patient_query, top_k)
+            if st.session_state.triage_stage != "input":
+                st.rerun()
+        if st.session_state.triage_error:
+            st.error(st.session_state.triage_error)
+        return
     
-    # Test Recommendations
-    tests = note.get('tests_to_discuss', [])
-    if tests:
-        st.subheader("🧪 Recommended Tests")
-        for i, test in enumerate(tests, 1):
-            with st.expander(f"Test {i}: {test.get('name', 'Unknown')}"):
-                st.write(f"**Why:** {test.get('why', 'N/A')}")
-                st.write(f"**Timing:** {test.get('timing', 'N/A')}")
-                st.write(f"**Source:** {test.get('source', 'N/A')}")
-                support_chunks = test.get('support_chunk_ids', [])
-                if support_chunks:
-                    st.write(f"**Supporting Chunks:** {', '.join(support_chunks)}")
+    st.info(f"**Patient symptoms:** {st.session_state.patient_query}")
+    if st.button("🔄 Start New Triage"):
+        reset_triage()
+        st.rerun()
     
-    # Disease Course
-    disease_course = note.get('disease_course', {})
-    if disease_course:
-        st.subheader("📈 Expected Disease Course")
-        st.write(f"**Baseline Summary:** {disease_course.get('baseline_summary', 'N/A')}")
+    if stage == "followups":
+        st.success("✅ Follow-up questions generated!")
+        st.subheader("❓ Follow-up Questions")
+        st.markdown("Please answer these questions to help with the triage assessment:")
         
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.write(f"**30 Days:** {disease_course.get('day_30', 'N/A')}")
-        with col2:
-            st.write(f"**60 Days:** {disease_course.get('day_60', 'N/A')}")
-        with col3:
-            st.write(f"**90 Days:** {disease_course.get('day_90', 'N/A')}")
-        
-        st.write(f"**Source:** {disease_course.get('source', 'N/A')}")
-    
-    # Lifestyle Plan
-    lifestyle = note.get('lifestyle_plan', {})
-    if lifestyle:
-        st.subheader("🏃‍♂️ Lifestyle Recommendations")
-        col1, col2 = st.columns(2)
-        with col1:
-            st.write(f"**Diet:** {lifestyle.get('diet', 'N/A')}")
-            st.write(f"**Activity:** {lifestyle.get('activity', 'N/A')}")
-            st.write(f"**Sleep:** {lifestyle.get('sleep', 'N/A')}")
-        with col2:
-            st.write(f"**Hydration:** {lifestyle.get('hydration', 'N/A')}")
-            st.write(f"**Home Remedies:** {lifestyle.get('home_remedies', 'N/A')}")
+        with st.form("followup_answers"):
+            st.markdown("**Please provide answers to the following questions:**")
+            answers = {}
+            
+            for i, question in enumerate(st.session_state.questions):
+                answer = st.text_input(
+                    f"Q{i+1}: {question.get('text', '')}",
+                    key=f"answer_{i}",
+                    help=f"Question ID: {question.get('id', 'unknown')}"
+                )
+                if answer:
+                    answers[question.get('text', f'Q{i+1}')] = answer
+            
+            submitted = st.form_submit_button("📋 Generate Triage Note", type="primary")
         
-        st.write(f"**Source:** {lifestyle.get('source', 'N/A')}")
-    
-    # Follow-up Schedule
-    followup_schedule = note.get('followup_schedule', '')
-    if followup_schedule:
-        st.subheader("📅 Follow-up Schedule")
-        st.write(followup_schedule)
+        if submitted:
+            if not answers:
+                st.error("Please answer at least one question.")
+                return
+            stream = st.session_state.get("stream_results", False) and streaming_available(api_url)
+            submit_followups(api_url, answers, stream=stream)
+            if st.session_state.triage_stage == "done":
+                st.rerun()
+        if st.session_state.triage_error:
+            st.error(st.session_state.triage_error)
+        return
     
-    # Disclaimers
-    disclaimers = note.get('disclaimers', '')
-    if disclaimers:
-        st.subheader("⚠️ Important Disclaimers")
-        st.warning(disclaimers)
+    # stage == "done"
+    st.success("✅ Triage note generated and quality assessed!")
+    if st.session_state.stage_timings:
+        st.caption("⏱️ Per-stage latency")
+        display_stage_latency(st.empty(), st.session_state.stage_timings)
+    if st.session_state.triage_note:
+        display_triage_note(st.session_state.triage_note)
+    display_judge_verdict(st.session_state.judge_verdict)
 
 def main():
     """Main Streamlit application."""
@@ -179,16 +430,19 @@ def main():
         st.header("⚙️ Configuration")
         api_url = st.text_input("API URL", value=API_BASE_URL, help="Base URL for the Doctor Bot API")
         top_k = st.slider("Top K Retrieval", min_value=4, max_value=16, value=8, help="Number of top retrieval results")
+        can_stream = streaming_available(api_url)
+        st.checkbox("Stream results", value=can_stream, key="stream_results", disabled=not can_stream,
+                    help="Render the triage note stage by stage" if can_stream
+                    else "This API does not serve the streaming triage endpoint")
         
         st.header("📊 System Status")
         # Check API health
-        try:
-            health_response = requests.get(f"{api_url}/health", timeout=5)
-            if health_response.status_code == 200:
-                st.success("✅ API Online")
-            else:
-                st.error("❌ API Error")
-        except:
+        health_status, _ = check_health(api_url)
+        if health_status == 200:
+            st.success("✅ API Online")
+        elif health_status is not None:
+            st.error("❌ API Error")
+        else:
             st.error("❌ API Offline")
             st.info("Please start the API with: `uvicorn api.main:app --reload`")
     
@@ -199,109 +453,7 @@ def main():
         st.header("Clinical Triage Process")
         st.markdown("This demo shows the two-step triage process with LLM-as-Judge quality assurance.")
         
-        # Step 1: Initial Query
-        st.subheader("Step 1: Patient Symptoms")
-        patient_query = st.text_area(
-            "Describe the patient's symptoms:",
-            value="fever 3 days, chills, cough, poor appetite",
-            height=100,
-            help="Enter the patient's initial symptom description"
-        )
-        
-        if st.button("🚀 Start Triage Process", type="primary"):
-            if not patient_query.strip():
-                st.error("Please enter patient symptoms.")
-                return
-            
-            # Call API for initial triage (should return followup questions)
-            with st.spinner("Analyzing symptoms and generating follow-up questions..."):
-                response = call_api("/triage", {
-                    "query": patient_query,
-                    "top_k": top_k
-                })
-            
-            if response:
-                if response.get("next_action") == "ask_followups":
-                    st.success("✅ Follow-up questions generated!")
-                    
-                    # Display follow-up questions
-                    questions = response.get("followup_questions", [])
-                    if questions:
-                        st.subheader("❓ Follow-up Questions")
-                        st.markdown("Please answer these questions to help with the triage assessment:")
-                        
-                        # Store questions in session state
-                        st.session_state.questions = questions
-                        st.session_state.patient_query = patient_query
-                        
-                        # Create form for answers
-                        with st.form("followup_answers"):
-                            st.markdown("**Please provide answers to the following questions:**")
-                            answers = {}
-                            
-                            for i, question in enumerate(questions):
-                                answer = st.text_input(
-                                    f"Q{i+1}: {question.get('text', '')}",
-                                    key=f"answer_{i}",
-                                    help=f"Question ID: {question.get('id', 'unknown')}"
-                                )
-                                if answer:
-                                    answers[question.get('text', f'Q{i+1}')] = answer
-                            
-                            submitted = st.form_submit_button("📋 Generate Triage Note", type="primary")
-                            
-                            if submitted and answers:
-                                # Call API with answers
-                                with st.spinner("Generating triage note and running quality assessment..."):
-                                    triage_response = call_api("/triage", {
-                                        "query": patient_query,
-                                        "followup_answers": answers,
-                                        "top_k": top_k
-                                    })
-                                
-                                if triage_response:
-                                    if triage_response.get("next_action") == "return_triage":
-                                        st.success("✅ Triage note generated and quality assessed!")
-                                        
-                                        # Store results in session state
-                                        st.session_state.triage_note = triage_response.get("triage_note")
-                                        st.session_state.judge_verdict = triage_response.get("judge_verdict")
-                                        
-                                        # Display results
-                                        display_triage_note(st.session_state.triage_note)
-                                        
-                                        # Show judge verdict
-                                        verdict = st.session_state.judge_verdict
-                                        if verdict:
-                                            st.subheader("⚖️ Quality Assessment Results")
-                                            
-                                            decision = verdict.get("decision", "unknown")
-                                            overall_score = verdict.get("overall_score", 0.0)
-                                            
-                                            if decision == "approve":
-                                                st.success(f"✅ **APPROVED** - Overall Score: {overall_score:.2f}")
-                                            elif decision == "revise":
-                                                st.warning(f"⚠️ **REVISED** - Overall Score: {overall_score:.2f}")
-                                                st.info("The triage note has been automatically revised based on quality assessment.")
-                                            else:  # reject
-                                                st.error(f"❌ **REJECTED** - Overall Score: {overall_score:.2f}")
-                                            
-                                            # Display issues
-                                            issues = verdict.get("issues", [])
-                                            display_qa_issues(issues)
-                                            
-                                            # Show if note was revised
-                                            revised_note = verdict.get("revised_note")
-                                            if revised_note and decision == "revise":
-                                                st.subheader("📝 Revised Triage Note")
-                                                st.info("The following is the judge-revised version of the triage note:")
-                                                display_triage_note(revised_note)
-                    else:
-                        st.warning("No follow-up questions were generated.")
-                else:
-                    st.error("Unexpected response from API.")
-            else:
-                st.error("Failed to communicate with API.")
+        render_triage_flow(api_url, top_k)
     
     with tab2:
         st.header("Judge Analysis Details")
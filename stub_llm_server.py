@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Local stub that stands in for both Gemini and Ollama.
+
+Serves the Gemini ``generateContent`` and Ollama ``/api/generate`` endpoints
+with configurable latency (log-normal around a median) and error rates, and
+answers with canned outputs, so the async providers and the router can be
+exercised without API keys. A streamed response spends its sampled latency
+between the deltas instead of before the first one. Point GEMINI_BASE_URL and OLLAMA_BASE_URL at it:
+
+    python stub_llm_server.py --port 8900
+    GEMINI_BASE_URL=http://127.0.0.1:8900 OLLAMA_BASE_URL=http://127.0.0.1:8900 ...
+
+Structured requests are answered with the canned object whose key matches
+the schema title in the prompt (e.g. "TriageNote"); STUB_CANNED_PATH can
+point to a JSON file of {title: object} to override the defaults.
+"""
+
+import os
+import re
+import json
+import random
+import asyncio
+import argparse
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Default canned structured outputs keyed by output schema title
+DEFAULT_CANNED: Dict[str, Any] = {
+    "FollowupQuestions": {
+        "questions": [
+            {"id": "duration", "text": "How long have you had these symptoms?"},
+            {"id": "severity", "text": "How severe are the symptoms on a scale of 1-10?"},
+            {"id": "breathing", "text": "Do you have any shortness of breath?"},
+        ]
+    },
+    "TriageNote": {
+        "patient_query": "stub query",
+        "followups_asked": ["How long have you had these symptoms?"],
+        "possible_conditions": [
+            {"name": "Viral upper respiratory infection", "rationale": "Consistent with reported symptoms",
+             "source": "retrieved", "support_chunk_ids": []}
+        ],
+        "severity_flags": {"severity": "routine", "red_flags": [], "emergency_action": None, "source": "retrieved"},
+        "tests_to_discuss": [],
+        "disease_course": {"baseline_summary": "Usually self-limiting", "day_30": "Resolved",
+                           "day_60": "Resolved", "day_90": "Resolved", "source": "retrieved"},
+        "lifestyle_plan": {"diet": "Balanced", "activity": "Rest", "sleep": "8 hours",
+                           "hydration": "Plenty of fluids", "home_remedies": "Warm fluids", "source": "retrieved"},
+        "followup_schedule": "See a clinician if symptoms persist beyond 7 days",
+        "disclaimers": "Educational information only; not medical advice.",
+    },
+    "JudgeVerdict": {
+        "decision": "approve",
+        "overall_score": 0.9,
+        "issues": [
+            {"check": "grounding", "status": "pass", "details": "stub", "offending_fields": [], "score": 0.9}
+        ],
+    },
+    "QAItem": {"check": "consistency", "status": "pass", "details": "stub", "offending_fields": [], "score": 0.9},
+}
+
+DEFAULT_TEXT = "OK"
+
+
+@dataclass
+class StubProfile:
+    """Latency and failure behaviour of one stubbed provider."""
+
+    median_ms: float = 200.0
+    sigma: float = 0.5
+    error_rate: float = 0.0
+
+    def sample_delay_s(self, rng: random.Random) -> float:
+        return rng.lognormvariate(0.0, self.sigma) * self.median_ms / 1000.0
+
+
+def profile_from_env(provider: str) -> StubProfile:
+    """Read STUB_<PROVIDER>_LATENCY_MS / _SIGMA / _ERROR_RATE."""
+    prefix = f"STUB_{provider.upper()}_"
+    return StubProfile(
+        median_ms=float(os.getenv(prefix + "LATENCY_MS", "200")),
+        sigma=float(os.getenv(prefix + "SIGMA", "0.5")),
+        error_rate=float(os.getenv(prefix + "ERROR_RATE", "0")),
+    )
+
+
+def load_canned(path: Optional[str]) -> Dict[str, Any]:
+    canned = dict(DEFAULT_CANNED)
+    if path:
+        with open(path) as f:
+            canned.update(json.load(f))
+    return canned
+
+
+SCHEMA_MARKER = "JSON schema:"
+
+
+def schema_title(prompt: str) -> Optional[str]:
+    """Top-level title of the JSON schema embedded in the prompt.
+
+    Nested models under ``$defs`` carry their own titles, so the embedded
+    schema is parsed rather than taking the first title in the text. When it
+    cannot be parsed, the last title wins (pydantic emits ``$defs`` first).
+    """
+    start = prompt.find("{", prompt.rfind(SCHEMA_MARKER) + 1) if SCHEMA_MARKER in prompt else -1
+    if start != -1:
+        try:
+            schema, _ = json.JSONDecoder().raw_decode(prompt[start:])
+            if isinstance(schema, dict) and isinstance(schema.get("title"), str):
+                return schema["title"]
+        except ValueError:
+            pass
+    titles = re.findall(r'"title":\s*"([^"]+)"', prompt)
+    return titles[-1] if titles else None
+
+
+def pick_output(prompt: str, json_mode: bool, canned: Dict[str, Any]) -> str:
+    """Canned JSON for the schema named in the prompt, or plain text."""
+    if not json_mode:
+        return DEFAULT_TEXT
+    title = schema_title(prompt)
+    if title in canned:
+        return json.dumps(canned[title])
+    return json.dumps({"result": DEFAULT_TEXT})
+
+
+def count_tokens(text: str) -> int:
+    return len(text.split())
+
+
+def split_deltas(text: str, size: int = 24) -> List[str]:
+    """Cut a completion into stream deltas of roughly ``size`` characters."""
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def create_stub_app(gemini: Optional[StubProfile] = None, ollama: Optional[StubProfile] = None,
+                    canned: Optional[Dict[str, Any]] = None, seed: Optional[int] = None) -> FastAPI:
+    """Build the stub ASGI app (usable in-process or served with uvicorn)."""
+    profiles = {"gemini": gemini or StubProfile(), "ollama": ollama or StubProfile()}
+    outputs = canned if canned is not None else dict(DEFAULT_CANNED)
+    rng = random.Random(seed)
+    stats = {"gemini": {"requests": 0, "errors": 0}, "ollama": {"requests": 0, "errors": 0}}
+
+    app = FastAPI(title="LLM Stub", version="0.1.0")
+
+    def sample(provider: str) -> Tuple[Optional[JSONResponse], float]:
+        """(error response or None, latency in seconds) for one request."""
+        profile = profiles[provider]
+        stats[provider]["requests"] += 1
+        delay_s = profile.sample_delay_s(rng)
+        if rng.random() < profile.error_rate:
+            stats[provider]["errors"] += 1
+            return JSONResponse(status_code=503, content={"error": "stubbed failure"}), delay_s
+        return None, delay_s
+
+    async def simulate(provider: str) -> Optional[JSONResponse]:
+        error, delay_s = sample(provider)
+        await asyncio.sleep(delay_s)
+        return error
+
+    async def simulate_stream(provider: str, deltas: List[str]) -> Tuple[Optional[JSONResponse], float]:
+        """Like simulate, but a successful stream spends its latency between deltas.
+
+        Returns the error (after the full latency) or the pause before each delta.
+        """
+        error, delay_s = sample(provider)
+        if error is not None:
+            await asyncio.sleep(delay_s)
+            return error, 0.0
+        return None, delay_s / len(deltas)
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def gemini_generate(model: str, request: Request):
+        body = await request.json()
+        error = await simulate("gemini")
+        if error is not None:
+            return error
+        prompt = " ".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        json_mode = body.get("generationConfig", {}).get("responseMimeType") == "application/json"
+        text = pick_output(prompt, json_mode, outputs)
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": {
+                "promptTokenCount": count_tokens(prompt),
+                "candidatesTokenCount": count_tokens(text),
+            },
+        }
+
+    @app.post("/v1beta/models/{model}:streamGenerateContent")
+    async def gemini_stream(model: str, request: Request):
+        body = await request.json()
+        prompt = " ".join(
+            part.get("text", "")
+            for content in body.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        json_mode = body.get("generationConfig", {}).get("responseMimeType") == "application/json"
+        text = pick_output(prompt, json_mode, outputs)
+        deltas = split_deltas(text)
+        error, delay_s = await simulate_stream("gemini", deltas)
+        if error is not None:
+            return error
+
+        async def events():
+            for i, delta in enumerate(deltas):
+                await asyncio.sleep(delay_s)
+                chunk: Dict[str, Any] = {"candidates": [{"content": {"role": "model", "parts": [{"text": delta}]}}]}
+                if i == len(deltas) - 1:
+                    chunk["usageMetadata"] = {
+                        "promptTokenCount": count_tokens(prompt),
+                        "candidatesTokenCount": count_tokens(text),
+                    }
+                yield f"data: {json.dumps(chunk)}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/api/generate")
+    async def ollama_generate(request: Request):
+        body = await request.json()
+        prompt = body.get("prompt", "")
+        text = pick_output(prompt, body.get("format") == "json", outputs)
+        if body.get("stream", True):
+            deltas = split_deltas(text)
+            error, delay_s = await simulate_stream("ollama", deltas)
+            if error is not None:
+                return error
+
+            async def lines():
+                for delta in deltas:
+                    await asyncio.sleep(delay_s)
+                    yield json.dumps({"model": body.get("model", ""), "response": delta, "done": False}) + "\n"
+                yield json.dumps({"model": body.get("model", ""), "response": "", "done": True,
+                                  "prompt_eval_count": count_tokens(prompt),
+                                  "eval_count": count_tokens(text)}) + "\n"
+
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+        error = await simulate("ollama")
+        if error is not None:
+            return error
+        return {
+            "model": body.get("model", ""),
+            "response": text,
+            "done": True,
+            "prompt_eval_count": count_tokens(prompt),
+            "eval_count": count_tokens(text),
+        }
+
+    @app.get("/stats")
+    async def stub_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Gemini/Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_stub_app(
+        gemini=profile_from_env("gemini"),
+        ollama=profile_from_env("ollama"),
+        canned=load_canned(os.getenv("STUB_CANNED_PATH")),
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Pydantic models matching the canned structured outputs of stub_llm_server.
+
+Shared by the tests that ask the stub (or the providers in front of it) for
+structured output, so every test validates against the same schemas.
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class FollowupQuestion(BaseModel):
+    id: str
+    text: str
+
+
+class FollowupQuestions(BaseModel):
+    questions: List[FollowupQuestion]
+
+
+class Condition(BaseModel):
+    name: str
+    rationale: str
+    source: str
+    support_chunk_ids: List[str]
+
+
+class SeverityFlags(BaseModel):
+    severity: str
+    red_flags: List[str]
+    emergency_action: Optional[str]
+    source: str
+
+
+class RecommendedTest(BaseModel):
+    name: str
+    why: str
+    timing: str
+    source: str
+
+
+class DiseaseCourse(BaseModel):
+    baseline_summary: str
+    day_30: str
+    day_60: str
+    day_90: str
+    source: str
+
+
+class LifestylePlan(BaseModel):
+    diet: str
+    activity: str
+    sleep: str
+    hydration: str
+    home_remedies: str
+    source: str
+
+
+class TriageNote(BaseModel):
+    patient_query: str
+    followups_asked: List[str]
+    possible_conditions: List[Condition]
+    severity_flags: SeverityFlags
+    tests_to_discuss: List[RecommendedTest]
+    disease_course: DiseaseCourse
+    lifestyle_plan: LifestylePlan
+    followup_schedule: str
+    disclaimers: str
+
+
+class QAItem(BaseModel):
+    check: str
+    status: str
+    details: str
+    offending_fields: List[str]
+    score: float
+
+
+class JudgeVerdict(BaseModel):
+    decision: str
+    overall_score: float
+    issues: List[QAItem]
+
+
+SCHEMAS = [FollowupQuestions, TriageNote, JudgeVerdict, QAItem]
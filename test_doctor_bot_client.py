@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Tests for error handling and batching in doctor_bot_client."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from doctor_bot_client import APIError, AsyncDoctorBotClient, DoctorBotClient
+
+
+def retrieve_handler(request):
+    query = json.loads(request.content)["query"]
+    if query == "broken":
+        return httpx.Response(400, json={"detail": "bad query"})
+    return httpx.Response(200, json={"query": query, "hits": [], "total_hits": 0})
+
+
+def sync_client(handler, **kwargs):
+    return DoctorBotClient("http://api", http_client=httpx.Client(transport=httpx.MockTransport(handler)), **kwargs)
+
+
+def async_client(handler, **kwargs):
+    transport = httpx.MockTransport(handler)
+    return AsyncDoctorBotClient("http://api", http_client=httpx.AsyncClient(transport=transport), **kwargs)
+
+
+def test_non_json_success_body_raises_api_error():
+    client = sync_client(lambda request: httpx.Response(200, text="<html>proxy page</html>"))
+    with pytest.raises(APIError) as error:
+        client.health()
+    assert error.value.status_code == 200 and "proxy page" in str(error.value.detail)
+
+
+def test_async_non_json_success_body_raises_api_error():
+    async def run():
+        async with async_client(lambda request: httpx.Response(200, text="ok")) as client:
+            await client.health()
+
+    with pytest.raises(APIError):
+        asyncio.run(run())
+
+
+def test_retrieve_many_keeps_order_and_collects_errors():
+    async def run():
+        async with async_client(retrieve_handler) as client:
+            return await client.retrieve_many(["fever", "broken", "cough"], concurrency=2, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert results[0].query == "fever" and results[2].query == "cough"
+    assert isinstance(results[1], APIError) and results[1].status_code == 400
+
+
+def test_retrieve_many_limits_concurrency():
+    in_flight, peak = 0, 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return retrieve_handler(request)
+
+    async def run():
+        async with async_client(handler) as client:
+            return await client.retrieve_many([f"q{i}" for i in range(10)], concurrency=3)
+
+    assert len(asyncio.run(run())) == 10
+    assert peak == 3
+
+
+def test_retrieve_many_stops_remaining_calls_on_error():
+    sent = []
+
+    async def handler(request):
+        sent.append(json.loads(request.content)["query"])
+        await asyncio.sleep(0.01)
+        return retrieve_handler(request)
+
+    async def run():
+        async with async_client(handler, max_retries=0) as client:
+            await client.retrieve_many(["broken"] + [f"q{i}" for i in range(20)], concurrency=1)
+
+    with pytest.raises(APIError):
+        asyncio.run(run())
+    assert sent[0] == "broken" and len(sent) < 21
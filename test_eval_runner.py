@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Tests for checkpointing, resume and rate limiting in eval_runner."""
+
+import asyncio
+import json
+
+import pytest
+
+from eval_runner import (
+    EvalRunner,
+    RateLimitedProvider,
+    case_fingerprint,
+    load_checkpoint,
+    select_cases,
+)
+
+CASES = [{"id": "a", "query": "fever"}, {"id": "b", "query": "cough"}, {"query": "rash"}]
+
+
+def run(runner, cases, evaluate, **kwargs):
+    return asyncio.run(runner.run(cases, evaluate, **kwargs))
+
+
+def recorder(fail=()):
+    calls = []
+
+    async def evaluate(case):
+        calls.append(case["query"])
+        if case["query"] in fail:
+            raise RuntimeError("boom")
+        return {"answer": case["query"].upper()}
+    return evaluate, calls
+
+
+def test_select_cases():
+    checkpoint = {
+        "a": {"case_id": "a", "fingerprint": case_fingerprint(CASES[0]), "status": "ok"},
+        "b": {"case_id": "b", "fingerprint": case_fingerprint(CASES[1]), "status": "failed"},
+    }
+    # Cases without an ID are keyed by position
+    assert select_cases(CASES, checkpoint) == [(2, CASES[2])]
+    assert select_cases(CASES, checkpoint, rerun_failed=True) == [(1, CASES[1]), (2, CASES[2])]
+
+    edited = [dict(CASES[0], query="high fever")] + CASES[1:]
+    assert [index for index, _ in select_cases(edited, checkpoint)] == [0, 2]
+
+
+def test_checkpoint_and_resume(tmp_path):
+    path = str(tmp_path / "reports" / "checkpoint.jsonl")
+    evaluate, calls = recorder(fail={"cough"})
+    records = run(EvalRunner(path, concurrency=2), CASES, evaluate)
+    assert sorted(calls) == ["cough", "fever", "rash"]
+    assert records["a"]["result"] == {"answer": "FEVER"}
+    assert records["b"]["status"] == "failed" and "boom" in records["b"]["error"]
+    assert records["case_0002"]["status"] == "ok"
+
+    # A crash mid-write leaves a truncated line, which is ignored
+    with open(path, "a") as f:
+        f.write('{"case_id": "trunc')
+    assert set(load_checkpoint(path)) == {"a", "b", "case_0002"}
+
+    evaluate, calls = recorder()
+    records = run(EvalRunner(path), CASES, evaluate)
+    assert calls == []
+    assert records["b"]["status"] == "failed"
+
+    records = run(EvalRunner(path), CASES, evaluate, rerun_failed=True)
+    assert calls == ["cough"]
+    assert records["b"]["status"] == "ok"
+    # The latest record per case wins when the checkpoint is reloaded
+    assert load_checkpoint(path)["b"]["status"] == "ok"
+
+
+def test_records_are_limited_to_current_cases(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    evaluate, _ = recorder()
+    run(EvalRunner(path), CASES, evaluate)
+
+    records = run(EvalRunner(path), CASES[:1], evaluate)
+    assert list(records) == ["a"]
+    with open(path) as f:
+        assert {json.loads(line)["case_id"] for line in f} == {"a", "b", "case_0002"}
+
+
+class FakeBucket:
+    def __init__(self):
+        self.acquired = 0
+
+    async def acquire(self):
+        self.acquired += 1
+
+
+class FakeProvider:
+    provider_name = "fake"
+
+    async def generate_structured(self, *args, **kwargs):
+        return "note"
+
+    async def generate_structured_stream(self, *args, **kwargs):
+        for event in ("field", "result"):
+            yield event
+
+
+def test_rate_limited_provider_limits_streams():
+    bucket = FakeBucket()
+    provider = RateLimitedProvider(FakeProvider(), bucket)
+
+    async def main():
+        assert await provider.generate_structured("system", {}, None) == "note"
+        return [event async for event in provider.generate_structured_stream("system", {}, None)]
+
+    assert asyncio.run(main()) == ["field", "result"]
+    assert bucket.acquired == 2
+    assert provider.provider_name == "fake"
+
+
+@pytest.mark.parametrize("rerun_failed", [False, True])
+def test_unchanged_ok_cases_are_never_rerun(rerun_failed):
+    checkpoint = {"a": {"case_id": "a", "fingerprint": case_fingerprint(CASES[0]), "status": "ok"}}
+    assert select_cases(CASES[:1], checkpoint, rerun_failed=rerun_failed) == []
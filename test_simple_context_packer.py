@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Tests for merging, deduplication and budgeted packing in simple_context_packer."""
+
+from simple_context_packer import merge_hits, pack_context
+
+
+def hit(chunk_id, text, score=1.0, section="Fever", page=1):
+    return {"chunk_id": chunk_id, "text": text, "score": score,
+            "metadata": {"section": section, "page_start": page, "page_end": page}}
+
+
+def words(label, count=10):
+    return " ".join(f"{label}{i}" for i in range(count)) + "."
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_adjacent_and_overlapping_hits_merge_without_repeats():
+    hits = [
+        hit("chunk_000001", "One. Two."),
+        hit("chunk_000002", "Two. Three."),
+        hit("chunk_000009", "Nine.", section="Cough"),
+    ]
+    passages = merge_hits(hits)
+    assert [p.chunk_ids for p in passages] == [["chunk_000009"], ["chunk_000001", "chunk_000002"]]
+    assert passages[1].sentences == ["One.", "Two.", "Three."]
+    assert passages[1].sources == [["chunk_000001"], ["chunk_000001", "chunk_000002"], ["chunk_000002"]]
+
+
+def test_everything_fits_within_budget():
+    packed = pack_context([hit("chunk_000001", "One. Two."), hit("chunk_000002", "Two. Three.")],
+                          token_budget=100, count_tokens=count_words)
+    assert packed.chunk_ids == ["chunk_000001", "chunk_000002"]
+    assert packed.dropped_chunk_ids == []
+    assert packed.tokens <= packed.budget
+
+
+def test_truncated_passage_only_cites_chunks_it_kept():
+    hits = [hit("chunk_000001", f"{words('a', 30)} {words('b', 30)}"),
+            hit("chunk_000002", words("c", 30))]
+    packed = pack_context(hits, token_budget=70, count_tokens=count_words)
+    assert packed.chunk_ids == ["chunk_000001"]
+    assert packed.dropped_chunk_ids == ["chunk_000002"]
+    assert "c0" not in packed.text
+    assert "[chunk_000001] Fever" in packed.text
+
+
+def test_sentences_from_a_higher_scoring_passage_are_not_repeated():
+    hits = [hit("chunk_000001", "Shared. Own.", score=0.9),
+            hit("chunk_000005", "Shared.", score=0.5, section="Cough")]
+    packed = pack_context(hits, token_budget=100, count_tokens=count_words)
+    assert packed.text.count("Shared.") == 1
+    assert packed.dropped_chunk_ids == ["chunk_000005"]
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Tests for the SQLite LLM response cache and its use by the async LLM managers."""
+
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+import simple_llm_cache
+from simple_llm_cache import LLMResponseCache, make_cache_key
+from simple_llm_providers import AsyncLLMManager
+from simple_llm_router import ProviderRouter
+from simple_usage import usage_ledger
+
+
+class Answer(BaseModel):
+    text: str
+
+
+class FakeProvider:
+    provider_name = "fake"
+    model_name = "fake-1"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_response(self, prompt, system_prompt=None):
+        self.calls += 1
+        return f"answer {self.calls}"
+
+    async def generate_structured(self, system_prompt, input_vars, output_schema):
+        self.calls += 1
+        return output_schema(text=f"{input_vars['query']} {self.calls}")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), ttl_s=60)
+    monkeypatch.setattr(simple_llm_cache, "_shared_cache", cache)
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "true")
+    monkeypatch.setenv("LLM_CACHE_AGENTS", "triage")
+    usage_ledger.clear()
+    return cache
+
+
+def test_get_put_and_miss(cache):
+    key = make_cache_key("fake", "fake-1", "response", "hi")
+    assert cache.get(key, "triage") is None
+    cache.put(key, "triage", '"hello"')
+    assert cache.get(key, "triage") == '"hello"'
+    assert cache.stats()["agents"]["triage"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_expired_entry_is_a_miss(cache, monkeypatch):
+    cache.put("key", "triage", '"old"')
+    now = simple_llm_cache.time.time()
+    monkeypatch.setattr(simple_llm_cache.time, "time", lambda: now + 61)
+    assert cache.get("key", "triage") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.max_entries = 2
+    for key in ("a", "b", "c"):
+        cache.put(key, "triage", '"v"')
+    cache.get("a", "triage")
+    cache.evict()
+    assert cache.get("b", "triage") is None
+    assert cache.get("a", "triage") is not None
+
+
+@pytest.mark.parametrize("make_llm", [AsyncLLMManager, lambda provider: ProviderRouter([provider])])
+def test_managers_serve_repeated_calls_from_the_cache(cache, make_llm):
+    provider = FakeProvider()
+    llm = make_llm(provider)
+
+    async def run():
+        first = await llm.generate_structured("system", {"query": "fever"}, Answer, agent="triage")
+        second = await llm.generate_structured("system", {"query": "fever"}, Answer, agent="triage")
+        other = await llm.generate_structured("system", {"query": "cough"}, Answer, agent="triage")
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+    assert first == second == Answer(text="fever 1")
+    assert other == Answer(text="cough 2")
+    assert provider.calls == 2
+    assert [record.cache for record in usage_ledger.snapshot()] == ["hit"]
+
+
+def test_agents_not_opted_in_are_not_cached(cache):
+    provider = FakeProvider()
+    llm = AsyncLLMManager(provider)
+
+    async def run():
+        return [await llm.generate_response("hi", agent="judge") for _ in range(2)]
+
+    assert asyncio.run(run()) == ["answer 1", "answer 2"]
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Tests for streamed structured output and its usage accounting in simple_llm_providers."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from simple_llm_providers import AsyncGeminiProvider, AsyncProvider, AsyncOllamaProvider, AsyncLLMManager
+from simple_usage import usage_ledger
+from stub_llm_server import StubProfile, create_stub_app
+from stub_schemas import FollowupQuestions
+
+
+def stub_client() -> httpx.AsyncClient:
+    app = create_stub_app(gemini=StubProfile(median_ms=1), ollama=StubProfile(median_ms=1), seed=0)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://stub")
+
+
+async def collect(provider, agent):
+    events = []
+    async with stub_client() as client:
+        provider._http_client = client
+        manager = AsyncLLMManager(provider)
+        async for event in manager.generate_structured_stream("system", {"query": "fever"}, FollowupQuestions,
+                                                              agent=agent):
+            events.append(event)
+    return events
+
+
+def check_stream_records_usage(provider, agent):
+    usage_ledger.clear()
+    events = asyncio.run(collect(provider, agent))
+
+    assert [event.kind for event in events] == ["field", "result"]
+    assert events[0].name == "questions"
+    assert len(events[1].value.questions) == 3
+
+    records = usage_ledger.snapshot()
+    assert len(records) == 1
+    assert records[0].agent == agent
+    assert records[0].provider == provider.provider_name
+    assert records[0].ok
+    assert records[0].prompt_tokens > 0 and records[0].completion_tokens > 0
+
+
+def test_gemini_stream_records_usage_for_agent():
+    check_stream_records_usage(AsyncGeminiProvider("key", base_url="http://stub"), "followup")
+
+
+def test_ollama_stream_records_usage_for_agent():
+    check_stream_records_usage(AsyncOllamaProvider(base_url="http://stub"), "triage")
+
+
+def test_provider_base_requires_complete_and_stream():
+    class CompleteOnly(AsyncProvider):
+        async def complete(self, prompt, system_prompt=None, json_mode=False):
+            return None
+
+    for cls in (AsyncProvider, CompleteOnly):
+        with pytest.raises(TypeError):
+            cls("model")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Tests for hedging, latency tracking and circuit breaking in simple_llm_router."""
+
+import asyncio
+
+import pytest
+
+from simple_llm_router import CircuitBreaker, LatencyTracker, ProviderRouter
+
+
+class FakeProvider:
+    """Answers generate_response after a scripted delay, or raises."""
+
+    def __init__(self, name, delays, error=None):
+        self.provider_name = name
+        self.delays = delays
+        self.error = error
+        self.calls = 0
+
+    async def generate_response(self, prompt, system_prompt=None):
+        delay = self.delays() if callable(self.delays) else self.delays
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if self.error:
+            raise self.error
+        return f"{self.provider_name}:{prompt}"
+
+
+def test_latency_tracker_uses_default_until_enough_samples():
+    tracker = LatencyTracker(min_samples=3, default_s=1.5)
+    tracker.record(0.1)
+    tracker.record(0.2)
+    assert tracker.percentile(0.95) == 1.5
+    tracker.record(0.3)
+    assert tracker.percentile(0.5) == 0.2
+
+
+def test_breaker_opens_and_allows_one_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=0.0)
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    breaker.begin()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_fast_primary_is_not_hedged():
+    primary = FakeProvider("primary", 0.001)
+    backup = FakeProvider("backup", 0.001)
+    router = ProviderRouter([primary, backup], default_hedge_delay_s=1.0)
+    assert asyncio.run(router.generate_response("hi")) == "primary:hi"
+    assert backup.calls == 0
+
+
+def test_slow_primary_is_hedged_to_backup():
+    primary = FakeProvider("primary", 0.5)
+    backup = FakeProvider("backup", 0.001)
+    router = ProviderRouter([primary, backup], default_hedge_delay_s=0.01)
+    assert asyncio.run(router.generate_response("hi")) == "backup:hi"
+
+
+def test_failure_falls_back_and_opens_circuit():
+    primary = FakeProvider("primary", 0.0, error=RuntimeError("down"))
+    backup = FakeProvider("backup", 0.0)
+    router = ProviderRouter([primary, backup], failure_threshold=2, reset_timeout_s=60.0)
+
+    async def run():
+        return [await router.generate_response(str(i)) for i in range(3)]
+
+    assert asyncio.run(run()) == ["backup:0", "backup:1", "backup:2"]
+    # The third call skipped the open primary entirely
+    assert primary.calls == 2
+    assert router.stats()["primary"]["circuit"] == "open"
+
+
+def test_all_providers_failing_raises_last_error():
+    router = ProviderRouter([FakeProvider("a", 0.0, error=ValueError("a")),
+                             FakeProvider("b", 0.0, error=ValueError("b"))])
+    with pytest.raises(ValueError):
+        asyncio.run(router.generate_response("hi"))
+
+
+def test_cancelled_hedge_loser_is_recorded_as_lower_bound():
+    """Counting only completions would keep the window to fast calls and shrink the hedge delay."""
+    primary = FakeProvider("primary", 0.5)
+    backup = FakeProvider("backup", 0.02)
+    router = ProviderRouter([primary, backup], default_hedge_delay_s=0.01)
+    assert asyncio.run(router.generate_response("hi")) == "backup:hi"
+
+    samples = list(router.routes[0].tracker.samples)
+    assert len(samples) == 1
+    # Cancelled once the backup answered: hedge delay plus the backup's latency
+    assert 0.03 <= samples[0] < 0.5
+
+
+class FakeStreamProvider:
+    def __init__(self, name, fail=False):
+        self.provider_name = name
+        self.fail = fail
+        self.agents = []
+
+    async def generate_structured_stream(self, system_prompt, input_vars, output_schema, agent=None):
+        self.agents.append(agent)
+        yield ("field", "a")
+        if self.fail:
+            raise RuntimeError("stream broke")
+        yield ("result", "done")
+
+
+def test_stream_goes_to_first_available_provider_only():
+    primary, backup = FakeStreamProvider("primary"), FakeStreamProvider("backup")
+    router = ProviderRouter([primary, backup])
+
+    async def run():
+        return [event async for event in router.generate_structured_stream("s", {}, None, agent="triage")]
+
+    assert asyncio.run(run()) == [("field", "a"), ("result", "done")]
+    assert primary.agents == ["triage"] and backup.agents == []
+
+
+def test_stream_failures_open_the_breaker():
+    primary, backup = FakeStreamProvider("primary", fail=True), FakeStreamProvider("backup")
+    router = ProviderRouter([primary, backup], failure_threshold=1, reset_timeout_s=60.0)
+
+    async def run():
+        return [event async for event in router.generate_structured_stream("s", {}, None)]
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    # The open primary is skipped on the next stream
+    assert asyncio.run(run()) == [("field", "a"), ("result", "done")]
+    assert backup.agents == [None]
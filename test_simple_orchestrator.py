@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Tests for StageGraph scheduling, event streaming and the /triage graphs in simple_orchestrator."""
+
+import asyncio
+import json
+import time
+from collections import namedtuple
+
+import pytest
+
+from simple_scheduler import AdmissionController, AdmissionRejected, Lane
+
+from simple_orchestrator import (
+    StageFailed,
+    StageGraph,
+    build_step_one_graph,
+    build_step_two_graph,
+    combine_judge_checks,
+    ndjson_events,
+    step_two_publish,
+)
+
+Event = namedtuple("Event", "kind name value")
+
+NOTE = {"severity_flags": {"severity": "low"}, "possible_conditions": [], "disclaimers": "Not advice."}
+
+
+def collect(graph, inputs=None, publish=None):
+    async def run():
+        return [event async for event in graph.stream(inputs, publish)]
+    return asyncio.run(run())
+
+
+def sleeper(seconds, value=None):
+    async def stage(results):
+        await asyncio.sleep(seconds)
+        return value
+    return stage
+
+
+def test_order_and_invalid_graphs():
+    graph = StageGraph().add("c", sleeper(0), deps=["b"]).add("b", sleeper(0), deps=["a"]).add("a", sleeper(0))
+    assert graph.order() == ["a", "b", "c"]
+    with pytest.raises(ValueError):
+        StageGraph().add("a", sleeper(0), deps=["b"]).add("b", sleeper(0), deps=["a"]).order()
+    with pytest.raises(ValueError):
+        StageGraph().add("a", sleeper(0), deps=["missing"]).order()
+    with pytest.raises(ValueError):
+        StageGraph().add("a", sleeper(0)).add("a", sleeper(0))
+
+
+def test_independent_stages_run_concurrently_and_see_dependency_results():
+    async def combine(results):
+        return results["left"] + results["right"] + results["query"]
+
+    graph = (
+        StageGraph()
+        .add("left", sleeper(0.1, "L"))
+        .add("right", sleeper(0.1, "R"))
+        .add("combine", combine, deps=["left", "right"])
+    )
+    start_time = time.perf_counter()
+    results = asyncio.run(graph.run({"query": "Q"}))
+    assert time.perf_counter() - start_time < 0.18
+    assert results["combine"] == "LRQ"
+    assert set(results["timings"]) == {"left", "right", "combine"}
+
+
+def test_optional_failure_yields_none_and_required_failure_raises():
+    async def boom(results):
+        raise RuntimeError("down")
+
+    results = asyncio.run(StageGraph().add("extra", boom, optional=True).add("main", sleeper(0, 1)).run())
+    assert results["extra"] is None and results["main"] == 1
+
+    with pytest.raises(StageFailed) as error:
+        asyncio.run(StageGraph().add("main", boom).add("slow", sleeper(5)).run())
+    assert error.value.stage == "main"
+
+
+def test_stream_reports_a_failed_stage_as_error_event():
+    async def boom(results):
+        raise RuntimeError("down")
+
+    events = collect(StageGraph().add("llm_triage", boom))
+    assert events[-1] == {"event": "error", "stage": "llm_triage", "detail": "down"}
+
+
+def test_ndjson_sends_the_finalized_result_before_done():
+    async def run():
+        events = StageGraph().add("a", sleeper(0, 1)).stream()
+        return [json.loads(line) async for line in ndjson_events(events, lambda results: {"a": results["a"]})]
+
+    lines = asyncio.run(run())
+    assert [line["event"] for line in lines[-2:]] == ["result", "done"]
+    assert lines[-2]["response"] == {"a": 1} and "results" not in lines[-1]
+
+
+def test_combine_judge_checks():
+    passing = {"check": "format", "status": "pass", "score": 1.0}
+    warning = {"check": "safety", "status": "warn", "score": 0.8}
+    failing = {"check": "grounding", "status": "fail", "score": 0.0}
+    assert combine_judge_checks([passing, warning])["decision"] == "approve"
+    assert combine_judge_checks([passing, failing])["decision"] == "revise"
+    assert combine_judge_checks([failing, dict(failing, check="safety")])["decision"] == "reject"
+
+
+def test_prejudge_reject_overrides_the_judge():
+    note = {"disclaimers": "", "followup_schedule": "The diagnosis is flu."}
+    judged = []
+
+    async def judge(check, results):
+        judged.append(check)
+        return {"check": check, "status": "pass", "score": 1.0}
+
+    graph = build_step_two_graph(sleeper(0, []), sleeper(0, note), judge)
+    results = asyncio.run(graph.run())
+    assert judged == []
+    assert results["judge_verdict"]["decision"] == "reject"
+
+
+def test_streaming_stage_publishes_fields_before_it_finishes():
+    gate = asyncio.Event()
+
+    async def note(results):
+        yield Event("field", "severity_flags", NOTE["severity_flags"])
+        await gate.wait()
+        yield Event("field", "disclaimers", NOTE["disclaimers"])
+        yield Event("result", None, NOTE)
+
+    async def release(results):
+        gate.set()
+
+    graph = StageGraph().add("llm_triage", note).add("release", release)
+    events = collect(graph)
+    kinds = [(event["event"], event.get("stage"), event.get("field")) for event in events]
+    first_field = kinds.index(("field", "llm_triage", "severity_flags"))
+    assert first_field < kinds.index(("stage_end", "llm_triage", None))
+    assert events[-1]["event"] == "done"
+    assert events[-1]["results"]["llm_triage"] == NOTE
+
+
+def test_streamed_stage_is_not_republished_at_stage_end():
+    async def note(results):
+        for name in ("severity_flags", "disclaimers"):
+            yield Event("field", name, NOTE[name])
+        yield Event("result", None, NOTE)
+
+    async def judge(check, results):
+        return {"check": check, "status": "pass", "score": 1.0}
+
+    async def retrieve(results):
+        return []
+
+    graph = build_step_two_graph(retrieve, note, judge, checks=["safety"], use_prejudge=False)
+    fields = [event["field"] for event in collect(graph, publish=step_two_publish()) if event["event"] == "field"]
+    assert fields == ["severity_flags", "disclaimers", "judge_verdict"]
+
+
+def test_non_streaming_stage_is_published_when_it_finishes():
+    async def note(results):
+        return NOTE
+
+    graph = StageGraph().add("llm_triage", note)
+    fields = [event["field"] for event in collect(graph, publish=step_two_publish()) if event["event"] == "field"]
+    assert fields == ["severity_flags", "possible_conditions", "disclaimers"]
+
+
+def test_stage_metrics_do_not_collide_with_llm_timings():
+    from simple_metrics import start_request_timings, time_stage
+
+    async def note(results):
+        with time_stage("llm_triage"):
+            await asyncio.sleep(0)
+        return NOTE
+
+    async def run():
+        timings = start_request_timings()
+        await StageGraph().add("llm_triage", note).run()
+        return [name for name, _ in timings]
+
+    assert sorted(asyncio.run(run())) == ["llm_triage", "stage_llm_triage"]
+
+
+def test_llm_stages_hold_a_triage_lane_slot():
+    admission = AdmissionController({"triage": Lane("triage", max_concurrency=1, max_queue=1)})
+    running, peak = [0], [0]
+
+    async def followups(results):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.02)
+        running[0] -= 1
+        return []
+
+    async def run():
+        graph = build_step_one_graph(sleeper(0, []), followups, admission=admission)
+        return await asyncio.gather(*(graph.run({"query": "fever"}) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert peak[0] == 1
+    # One request runs, one waits in the queue, the third is rejected
+    failed = [result for result in results if isinstance(result, StageFailed)]
+    assert len(failed) == 1 and isinstance(failed[0].error, AdmissionRejected)
+    assert failed[0].stage == "llm_followup"
+    assert admission.stats()["triage"]["active"] == 0
+
+
+def test_only_the_note_stage_waits_for_the_triage_lane():
+    admission = AdmissionController({"triage": Lane("triage", max_concurrency=1, max_queue=0)})
+    retrieved = []
+
+    async def retrieve(results):
+        retrieved.append(results.get("query"))
+        return []
+
+    async def run():
+        # With the lane full and no queue, retrieval still runs but the note is rejected
+        async with admission.admit("triage"):
+            graph = build_step_two_graph(retrieve, sleeper(0, NOTE), None, admission=admission)
+            with pytest.raises(StageFailed) as failure:
+                await graph.run({"query": "fever"})
+        return failure.value
+
+    failure = asyncio.run(run())
+    assert failure.stage == "llm_triage" and isinstance(failure.error, AdmissionRejected)
+    assert retrieved == ["fever"]
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Tests for the rule-based triage note checks in simple_prejudge."""
+
+import copy
+
+from simple_prejudge import merge_qa_items, prejudge
+
+HITS = [{"chunk_id": "chunk_000001"}, {"chunk_id": "chunk_000002"}]
+
+NOTE = {
+    "patient_query": "fever 3 days, chills, cough",
+    "followups_asked": ["Any shortness of breath?"],
+    "possible_conditions": [
+        {"name": "Community-acquired pneumonia", "rationale": "Fever with cough may suggest pneumonia.",
+         "source": "Respiratory", "support_chunk_ids": ["chunk_000001"]},
+    ],
+    "severity_flags": {"severity": "moderate", "red_flags": [], "emergency_action": None, "source": "Triage"},
+    "tests_to_discuss": [
+        {"name": "Chest X-ray", "why": "Rule out consolidation", "timing": "Within 24h",
+         "source": "Respiratory", "support_chunk_ids": ["chunk_000002"]},
+    ],
+    "disease_course": {"baseline_summary": "Usually improves", "day_30": "", "day_60": "", "day_90": ""},
+    "lifestyle_plan": {"diet": "Fluids", "activity": "Rest"},
+    "followup_schedule": "Review in 48 hours",
+    "disclaimers": "This is not a diagnosis; see a clinician.",
+}
+
+
+def note_with(**changes):
+    note = copy.deepcopy(NOTE)
+    note.update(changes)
+    return note
+
+
+def statuses(result):
+    return {item["check"]: item["status"] for item in result.items}
+
+
+def test_clean_note_passes_and_leaves_semantic_checks_to_the_llm():
+    result = prejudge(NOTE, HITS)
+    assert set(statuses(result).values()) == {"pass"}
+    assert result.llm_checks == ["grounding", "consistency", "safety"]
+    assert not result.must_reject
+
+
+def test_uncited_chunk_fails_grounding_without_an_llm_call():
+    conditions = copy.deepcopy(NOTE["possible_conditions"])
+    conditions[0]["support_chunk_ids"] = ["chunk_999999"]
+    result = prejudge(note_with(possible_conditions=conditions), HITS)
+    grounding = result.item("grounding")
+    assert grounding["status"] == "fail"
+    assert grounding["offending_fields"] == ["possible_conditions[0].support_chunk_ids"]
+    assert "grounding" not in result.llm_checks
+    assert not result.must_reject
+
+
+def test_definitive_diagnosis_language_forces_reject():
+    result = prejudge(note_with(followup_schedule="Your diagnosis is pneumonia."), HITS)
+    assert result.item("safety")["offending_fields"] == ["followup_schedule"]
+    assert result.must_reject and result.llm_checks == []
+
+
+def test_emergent_note_needs_an_emergency_action():
+    severity = dict(NOTE["severity_flags"], severity="emergent")
+    result = prejudge(note_with(severity_flags=severity), HITS)
+    assert "severity_flags.emergency_action" in result.item("safety")["offending_fields"]
+
+
+def test_schema_violations_and_missing_fields():
+    note = note_with(possible_conditions="pneumonia")
+    del note["disclaimers"]
+    result = prejudge(note, HITS)
+    assert result.item("format")["offending_fields"] == ["possible_conditions", "disclaimers"]
+    assert result.item("completeness")["status"] == "fail"
+    assert result.must_reject
+
+
+def test_non_object_note_is_rejected():
+    result = prejudge("not json", HITS)
+    assert result.must_reject and statuses(result) == {"format": "fail"}
+
+
+def test_merge_keeps_the_worse_result():
+    rule = {"check": "safety", "status": "pass", "details": "Rules ok", "offending_fields": [], "score": 1.0}
+    llm = {"check": "safety", "status": "warn", "details": "Vague advice", "offending_fields": ["lifestyle_plan"],
+           "score": 0.6}
+    merged = merge_qa_items(rule, llm)
+    assert merged["status"] == "warn" and merged["score"] == 0.6
+    assert merged["offending_fields"] == ["lifestyle_plan"]
+    assert merged["details"] == "Rules ok; Vague advice"
+    assert merge_qa_items(None, llm) is llm and merge_qa_items(rule, None) is rule
+
+
+def test_patient_words_are_not_scanned_for_diagnosis_language():
+    note = note_with(patient_query="My GP said the diagnosis is migraine",
+                     followups_asked=["You definitely have a fever?"])
+    result = prejudge(note, HITS)
+    assert result.item("safety")["status"] == "pass"
+    assert not result.must_reject
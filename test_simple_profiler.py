@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Tests for the shared stack sampler in simple_profiler."""
+
+import json
+import threading
+import time
+
+from simple_profiler import SlowRequestProfiler
+
+
+def sampler_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "stack-sampler"]
+
+
+def wait_until(condition, timeout_s=2.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_concurrent_requests_share_one_sampler_thread(tmp_path):
+    profiler = SlowRequestProfiler(threshold_ms=0.0, output_dir=str(tmp_path), interval_ms=1.0)
+    first, second = profiler.start(), profiler.start()
+    assert len(sampler_threads()) == 1
+    assert wait_until(lambda: first.samples and second.samples)
+
+    path = profiler.finish(first, "POST", "/retrieve", 200, 0.5, [("retrieve", 0.4)])
+    with open(path) as f:
+        profile = json.load(f)
+    assert profile["stages_ms"] == {"retrieve": 400.0}
+    assert any(stack.startswith("MainThread;") for stack in profile["folded_stacks"])
+    assert len(sampler_threads()) == 1
+
+    profiler.finish(second, "POST", "/retrieve", 200, 0.5, [])
+    assert wait_until(lambda: not sampler_threads())
+    # A later request starts a new sampler
+    third = profiler.start()
+    assert len(sampler_threads()) == 1
+    profiler.finish(third, "GET", "/health", 200, 0.0, [])
+
+
+def test_fast_and_unsampled_requests_write_nothing(tmp_path):
+    profiler = SlowRequestProfiler(threshold_ms=1000.0, output_dir=str(tmp_path), interval_ms=1.0)
+    recording = profiler.start()
+    assert profiler.finish(recording, "GET", "/health", 200, 0.01, []) is None
+    assert SlowRequestProfiler(None).start() is None
+    assert SlowRequestProfiler(0.0, sample_rate=0.0).start() is None
+    assert not list(tmp_path.iterdir())
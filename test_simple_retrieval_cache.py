@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Tests for index versioning and invalidation in simple_retrieval_cache."""
+
+import os
+
+from simple_retrieval_cache import RetrievalCache
+
+
+def test_index_change_clears_cache_and_notifies(tmp_path):
+    index = tmp_path / "faiss.index"
+    index.write_text("v1")
+    changes = []
+    cache = RetrievalCache([str(index)], version_check_interval_s=0.0, on_change=changes.append)
+
+    key = cache.make_key("Chest  Pain", 8, False)
+    cache.put(key, [{"chunk_id": "chunk_000001"}])
+    assert cache.get(cache.make_key("chest pain", 8, False)) == [{"chunk_id": "chunk_000001"}]
+
+    index.write_text("v2 rebuilt")
+    os.utime(index, ns=(0, 10 ** 18))
+    assert cache.get(cache.make_key("chest pain", 8, False)) is None
+    assert changes == [cache.index_version]
+
+
+def test_results_computed_before_clear_are_not_stored(tmp_path):
+    cache = RetrievalCache([str(tmp_path / "missing.index")])
+    stale_key = cache.make_key("fever", 8, False)
+    # E.g. the retriever was swapped while this lookup was in flight
+    cache.clear()
+    cache.put(stale_key, [{"chunk_id": "old"}])
+    assert cache.get(cache.make_key("fever", 8, False)) is None
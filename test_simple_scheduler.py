@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Tests for lanes, priority queueing and rejection in simple_scheduler."""
+
+import asyncio
+
+import pytest
+
+from simple_scheduler import AdmissionController, AdmissionRejected, Lane, is_emergent_query
+
+
+def controller(max_concurrency=1, max_queue=2):
+    return AdmissionController({"triage": Lane("triage", max_concurrency, max_queue)})
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_emergent_queries():
+    assert is_emergent_query("Crushing CHEST PAIN since morning")
+    assert not is_emergent_query("mild runny nose")
+
+
+def test_concurrency_cap_and_priority_order():
+    async def run():
+        admission = controller(max_concurrency=1, max_queue=2)
+        release = asyncio.Event()
+        order = []
+
+        async def request(name, priority=False):
+            async with admission.admit("triage", priority):
+                order.append(name)
+                if name == "first":
+                    await release.wait()
+
+        tasks = [asyncio.create_task(request("first"))]
+        await settle()
+        tasks.append(asyncio.create_task(request("normal")))
+        await settle()
+        tasks.append(asyncio.create_task(request("urgent", priority=True)))
+        await settle()
+        assert admission.stats()["triage"] == {"active": 1, "max_concurrency": 1, "queued": 1,
+                                               "queued_priority": 1, "max_queue": 2}
+        release.set()
+        await asyncio.gather(*tasks)
+        assert admission.lanes["triage"].active == 0
+        return order
+
+    assert asyncio.run(run()) == ["first", "urgent", "normal"]
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def run():
+        admission = controller(max_concurrency=1, max_queue=1)
+        lane = admission.lanes["triage"]
+        await lane.acquire()
+        queued = asyncio.create_task(lane.acquire())
+        await settle()
+        with pytest.raises(AdmissionRejected) as error:
+            await lane.acquire()
+        # The priority queue is separate and still has room
+        urgent = asyncio.create_task(lane.acquire(priority=True))
+        await settle()
+        for _ in range(3):
+            lane.release()
+        await asyncio.gather(queued, urgent)
+        return error.value
+
+    error = asyncio.run(run())
+    assert error.lane == "triage" and error.retry_after >= 1
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        lane = Lane("triage", 1, 4)
+        await lane.acquire()
+        waiter = asyncio.create_task(lane.acquire())
+        await settle()
+        waiter.cancel()
+        await settle()
+        assert len(lane.waiters) == 0
+        lane.release()
+        return lane.active
+
+    assert asyncio.run(run()) == 0
+
+
+def test_slot_handed_to_a_cancelled_waiter_is_passed_on():
+    async def run():
+        lane = Lane("triage", 1, 4)
+        await lane.acquire()
+        first = asyncio.create_task(lane.acquire())
+        second = asyncio.create_task(lane.acquire())
+        await settle()
+        # Hand the slot to the first waiter, then cancel it before it resumes
+        lane.release()
+        first.cancel()
+        await asyncio.wait_for(second, timeout=1.0)
+        return lane.active
+
+    assert asyncio.run(run()) == 1
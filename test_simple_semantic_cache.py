@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Tests for the follow-up question cache in simple_semantic_cache."""
+
+import pytest
+
+import simple_semantic_cache
+from simple_semantic_cache import SemanticCache
+
+FEVER = [1.0, 0.0, 0.0]
+FEVER_LIKE = [0.95, 0.31, 0.0]  # cosine ~0.95 to FEVER
+RASH = [0.0, 0.0, 1.0]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(simple_semantic_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_similarity_threshold():
+    cache = SemanticCache(threshold=0.9)
+    cache.put("fever and cough", FEVER, ["How long?"], scope="s1")
+
+    hit = cache.get("cough with fever", FEVER_LIKE, scope="s1")
+    assert hit is not None and hit.value == ["How long?"]
+    assert hit.similarity == pytest.approx(0.95, abs=0.01)
+    assert cache.get("itchy rash", RASH, scope="s1") is None
+    assert SemanticCache(threshold=0.99).get("x", FEVER_LIKE, scope="s1") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_store_a_digest_not_the_query():
+    cache = SemanticCache()
+    cache.put("fever and cough", FEVER, ["How long?"], scope="s1")
+    entry = next(iter(cache.entries.values()))
+    assert "fever" not in entry.query_digest
+    assert "fever" not in cache.get("fever and cough", FEVER, scope="s1").query_digest
+
+
+def test_reuse_is_limited_to_the_scope_unless_shared():
+    cache = SemanticCache()
+    cache.put("fever and cough", FEVER, ["How long?"], scope="s1")
+    assert cache.get("fever and cough", FEVER, scope="s2") is None
+    # Without a scope an unshared cache neither stores nor serves
+    cache.put("itchy rash", RASH, ["Where?"])
+    assert len(cache.entries) == 1
+    assert cache.get("fever and cough", FEVER) is None
+    assert cache.stats()["bypassed"] == 1
+
+    shared = SemanticCache(shared=True)
+    shared.put("fever and cough", FEVER, ["How long?"], scope="s1")
+    assert shared.get("fever and cough", FEVER, scope="s2").value == ["How long?"]
+    assert shared.get("fever and cough", FEVER).value == ["How long?"]
+
+
+def test_emergent_queries_bypass_the_cache():
+    cache = SemanticCache(shared=True)
+    cache.put("crushing chest pain", RASH, ["Where?"])
+    assert not cache.entries
+    assert cache.get("crushing chest pain", RASH) is None
+    assert cache.stats()["bypassed"] == 1
+
+
+def test_expired_nearest_entry_falls_through_to_fresh_one(clock):
+    cache = SemanticCache(threshold=0.9, ttl_s=60)
+    cache.put("fever and cough", FEVER, ["old"], scope="s1")
+    clock[0] += 30
+    cache.put("cough with fever", FEVER_LIKE, ["fresh"], scope="s1")
+    clock[0] += 40
+
+    # The exact match has expired; the next candidate above the threshold is served
+    hit = cache.get("fever and cough", FEVER, scope="s1")
+    assert hit is not None and hit.value == ["fresh"]
+    assert len(cache.entries) == 1
+    clock[0] += 60
+    assert cache.get("fever and cough", FEVER, scope="s1") is None
+    assert not cache.entries
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticCache(max_entries=2, shared=True)
+    cache.put("fever", FEVER, ["fever"])
+    cache.put("cough", [0.0, 1.0, 0.0], ["cough"])
+    assert cache.get("fever", FEVER).value == ["fever"]
+    cache.put("rash", RASH, ["rash"])
+
+    assert cache.get("fever", FEVER).value == ["fever"]
+    assert cache.get("cough", [0.0, 1.0, 0.0]) is None
+    assert cache.get("rash", RASH).value == ["rash"]
+    assert cache.index.ntotal == 2
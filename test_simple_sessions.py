@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Tests for triage sessions in simple_sessions and the step-one session stage."""
+
+import asyncio
+import threading
+
+import pytest
+
+import simple_sessions
+from simple_orchestrator import build_step_one_graph
+from simple_sessions import SessionStore, rerank_with_answers, session_retrieve_stage
+
+HITS = [
+    {"text": "fever and chills with productive cough", "score": 0.9},
+    {"text": "chest pain radiating to the left arm with sweating", "score": 0.8},
+    {"text": "headache with neck stiffness and photophobia", "score": 0.7},
+]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(simple_sessions.time, "time", lambda: now[0])
+    return now
+
+
+def test_create_and_get_session():
+    store = SessionStore()
+    session = store.create("Fever 3 days", HITS, ["How long?"], query_embedding=[[1.0, 0.0]])
+
+    assert session.query_embedding == [1.0, 0.0]
+    assert "Fever" not in session.query_digest
+    assert store.get(session.session_id) is session
+    # Matched on the normalized query; another query does not resume it
+    assert store.get(session.session_id, "fever 3 days") is session
+    assert store.get(session.session_id, "chest pain") is None
+    assert store.get("unknown") is None
+    assert store.stats()["created"] == 1
+
+
+def test_sessions_expire_after_ttl(clock):
+    store = SessionStore(ttl_s=60)
+    session = store.create("fever", HITS, [])
+
+    clock[0] += 59
+    assert store.get(session.session_id) is session
+    # Access refreshes the TTL
+    clock[0] += 59
+    assert store.get(session.session_id) is session
+    clock[0] += 61
+    assert store.get(session.session_id) is None
+    stats = store.stats()
+    assert (stats["active"], stats["expired"]) == (0, 1)
+
+
+def test_oldest_session_is_evicted_at_capacity():
+    store = SessionStore(max_sessions=2)
+    first, second, third = (store.create(query, HITS, []) for query in ("a", "b", "c"))
+    assert store.get(first.session_id) is None
+    assert store.get(second.session_id) is second
+    assert store.get(third.session_id) is third
+
+
+def test_rerank_with_answer_terms():
+    session = SessionStore().create("pain", HITS, [])
+    answers = {"Where is the pain?": "chest, radiating to arm, sweating"}
+
+    ranked = rerank_with_answers(session, answers, top_k=2, alpha=0.0)
+    assert [hit["text"] for hit in ranked][0].startswith("chest pain")
+    assert len(ranked) == 2
+    # Stored hits are not modified
+    assert session.hits[0]["score"] == 0.9
+    # No answers keeps the step-one order
+    assert rerank_with_answers(session, {"q": ""}, top_k=3) == HITS
+
+
+def test_rerank_with_embeddings():
+    vectors = {"fever": [1.0, 0.0], "chest": [0.0, 1.0], "headache": [0.7, 0.7]}
+
+    def embed_texts(texts):
+        return [next(vector for word, vector in vectors.items() if word in text.lower()) for text in texts]
+
+    session = SessionStore().create("symptoms", HITS, [], query_embedding=[0.7, 0.7])
+    ranked = rerank_with_answers(session, {"Main symptom?": "chest tightness"}, top_k=3,
+                                 embed_texts=embed_texts, alpha=0.0)
+    assert ranked[0]["text"].startswith("chest pain")
+    assert ranked[-1]["text"].startswith("fever")
+
+
+def test_retrieve_stage_embeds_answers_off_the_event_loop():
+    store = SessionStore()
+    session = store.create("symptoms", HITS, [], query_embedding=[1.0, 0.0])
+    threads = []
+
+    def embed_texts(texts):
+        threads.append(threading.current_thread())
+        return [[1.0, 0.0]] * len(texts)
+
+    async def retrieve(results):
+        return ["fresh search"]
+
+    stage = session_retrieve_stage(store, retrieve, embed_texts)
+    results = {"session_id": session.session_id, "query": "symptoms",
+               "followup_answers": {"q": "a"}, "top_k": 2}
+    assert len(asyncio.run(stage(results))) == 2
+    assert threads and threads[0] is not threading.main_thread()
+    # Unknown session or a different query falls back to a new search
+    assert asyncio.run(stage(dict(results, session_id="gone"))) == ["fresh search"]
+    assert asyncio.run(stage(dict(results, query="other"))) == ["fresh search"]
+
+
+def test_step_one_graph_creates_session():
+    store = SessionStore()
+
+    async def retrieve(results):
+        return HITS
+
+    async def followups(results):
+        return ["How long?"]
+
+    async def embed_query(results):
+        return [1.0, 0.0]
+
+    graph = build_step_one_graph(retrieve, followups, embed_query, sessions=store)
+    results = asyncio.run(graph.run({"query": "fever"}))
+
+    session = store.get(results["session"], "fever")
+    assert session is not None
+    assert session.hits == HITS
+    assert session.questions == ["How long?"]
+    assert session.query_embedding == [1.0, 0.0]
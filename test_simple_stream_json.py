@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Tests for the incremental JSON parser and field validation in simple_stream_json."""
+
+import json
+from typing import List
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from simple_stream_json import FieldValidator, IncrementalJSONParser, StreamParseError
+
+DOCUMENT = {
+    "severity_flags": {"severity": "high", "red_flags": ["stiff neck", "rash"]},
+    "possible_conditions": [{"name": "Meningitis", "rationale": "fever, \"stiff\" neck}, [rash]"}],
+    "followup_schedule": "Same day",
+    "score": 0.75,
+    "escalate": True,
+    "notes": None,
+}
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    fields = []
+    for start in range(0, len(text), size):
+        fields.extend(parser.feed(text[start:start + size]))
+    return parser, fields
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, 10_000])
+def test_fields_are_emitted_in_order_for_any_chunking(size):
+    parser, fields = feed_in_chunks(json.dumps(DOCUMENT, indent=2), size)
+    assert fields == list(DOCUMENT.items())
+    assert parser.result() == DOCUMENT
+
+
+def test_field_is_emitted_as_soon_as_it_is_complete():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"severity": "high"') == []
+    assert parser.feed(', "tests": [1, ') == [("severity", "high")]
+    assert parser.feed('2]}') == [("tests", [1, 2])]
+
+
+def test_preamble_and_trailing_text_are_ignored():
+    parser, fields = feed_in_chunks('```json\n{"a": 1, "b": "x"}\n```', 4)
+    assert fields == [("a", 1), ("b", "x")]
+    assert parser.result() == {"a": 1, "b": "x"}
+
+
+def test_unicode_and_escapes_in_keys_and_values():
+    text = json.dumps({"k\"ey": "café \\ \n", "ok": "✓"}, ensure_ascii=False)
+    _, fields = feed_in_chunks(text, 2)
+    assert fields == [("k\"ey", "café \\ \n"), ("ok", "✓")]
+
+
+def test_truncated_stream_raises_on_result():
+    parser, fields = feed_in_chunks('{"a": 1, "b": [1, 2', 5)
+    assert fields == [("a", 1)]
+    with pytest.raises(StreamParseError):
+        parser.result()
+
+
+def test_invalid_value_raises():
+    with pytest.raises(StreamParseError):
+        IncrementalJSONParser().feed('{"a": tru, "b": 1}')
+
+
+class Condition(BaseModel):
+    name: str
+
+
+class Note(BaseModel):
+    severity: str
+    conditions: List[Condition]
+
+
+def test_field_validator_checks_individual_fields():
+    validator = FieldValidator(Note)
+    assert validator.validate_field("conditions", [{"name": "Flu"}]) == [Condition(name="Flu")]
+    assert validator.validate_field("unknown", 1) == 1
+    with pytest.raises(ValidationError):
+        validator.validate_field("conditions", [{"title": "Flu"}])
+    assert validator.validate_result({"severity": "low", "conditions": []}) == Note(severity="low", conditions=[])
+
+
+def test_field_validator_without_schema_passes_values_through():
+    validator = FieldValidator(None)
+    assert validator.validate_field("a", {"b": 1}) == {"b": 1}
+    assert validator.validate_result({"a": 1}) == {"a": 1}
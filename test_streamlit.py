@@ -5,12 +5,15 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+API_BASE_URL = "http://127.0.0.1:8000"
+
 def test_imports():
     """Test if all imports work."""
     try:
         import streamlit as st
-        import requests
+        import httpx
         import json
+        import doctor_bot_client
         import pandas as pd
         print("✅ All imports successful")
         return True
@@ -20,37 +23,32 @@ def test_imports():
 
 def test_api_connection():
     """Test API connection."""
+    from doctor_bot_client import APIError, DoctorBotClient
     try:
-        import requests
-        response = requests.get("http://127.0.0.1:8000/health", timeout=5)
-        if response.status_code == 200:
-            print("✅ API connection successful")
-            return True
-        else:
-            print(f"❌ API returned status {response.status_code}")
-            return False
+        with DoctorBotClient(API_BASE_URL, timeout_s=5) as client:
+            client.health()
+        print("✅ API connection successful")
+        return True
+    except APIError as e:
+        print(f"❌ API returned status {e.status_code}")
+        return False
     except Exception as e:
         print(f"❌ API connection failed: {e}")
         return False
 
 def test_triage_api():
     """Test triage API call."""
+    from doctor_bot_client import APIError, DoctorBotClient
     try:
-        import requests
-        response = requests.post(
-            "http://127.0.0.1:8000/triage",
-            json={"query": "fever and headache"},
-            timeout=10
-        )
-        if response.status_code == 200:
-            data = response.json()
-            print("✅ Triage API call successful")
-            print(f"  Response keys: {list(data.keys())}")
-            print(f"  Next action: {data.get('next_action')}")
-            return True
-        else:
-            print(f"❌ Triage API returned status {response.status_code}")
-            return False
+        with DoctorBotClient(API_BASE_URL, timeout_s=10) as client:
+            data = client.triage("fever and headache")
+        print("✅ Triage API call successful")
+        print(f"  Response keys: {list(data.model_dump().keys())}")
+        print(f"  Next action: {data.next_action}")
+        return True
+    except APIError as e:
+        print(f"❌ Triage API returned status {e.status_code}")
+        return False
     except Exception as e:
         print(f"❌ Triage API call failed: {e}")
         return False
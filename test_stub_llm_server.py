@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Tests for the canned-output selection and stream timing in stub_llm_server."""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from simple_llm_providers import build_structured_prompt
+from stub_llm_server import DEFAULT_CANNED, DEFAULT_TEXT, StubProfile, create_stub_app, pick_output, schema_title
+from stub_schemas import SCHEMAS, JudgeVerdict, TriageNote
+
+
+def test_every_canned_output_has_a_schema():
+    assert {schema.__name__ for schema in SCHEMAS} == set(DEFAULT_CANNED)
+
+
+def test_canned_output_validates_against_its_schema():
+    for schema in SCHEMAS:
+        prompt = build_structured_prompt({"query": "fever and cough"}, schema)
+        output = pick_output(prompt, True, DEFAULT_CANNED)
+        # Raises if the stub answered with a nested model instead
+        schema.model_validate(json.loads(output))
+
+
+def test_top_level_title_wins_over_defs():
+    prompt = build_structured_prompt({}, JudgeVerdict)
+    assert prompt.index('"QAItem"') < prompt.rindex('"JudgeVerdict"')
+    assert schema_title(prompt) == "JudgeVerdict"
+
+
+def test_unparseable_schema_falls_back_to_last_title():
+    prompt = 'schema: {"$defs": {"QAItem": {"title": "QAItem"}}, "title": "JudgeVerdict"'
+    assert schema_title(prompt) == "JudgeVerdict"
+
+
+def test_plain_text_and_unknown_schema():
+    assert pick_output("anything", False, DEFAULT_CANNED) == DEFAULT_TEXT
+    assert json.loads(pick_output('{"title": "Unknown"}', True, DEFAULT_CANNED)) == {"result": DEFAULT_TEXT}
+
+
+NOTE_PROMPT = build_structured_prompt({"query": "fever"}, TriageNote)
+
+
+@pytest.mark.parametrize("provider, path, body", [
+    ("gemini", "/v1beta/models/stub:streamGenerateContent",
+     {"contents": [{"parts": [{"text": NOTE_PROMPT}]}], "generationConfig": {"responseMimeType": "application/json"}}),
+    ("ollama", "/api/generate", {"prompt": NOTE_PROMPT, "format": "json", "stream": True}),
+])
+def test_stream_spends_one_latency_budget_across_deltas(provider, path, body):
+    profile = StubProfile(median_ms=300.0, sigma=0.0)
+    app = create_stub_app(**{provider: profile})
+
+    async def stream():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://stub") as client:
+            start_time = time.perf_counter()
+            async with client.stream("POST", path, json=body) as response:
+                chunks = [line async for line in response.aiter_lines() if line.strip()]
+            return chunks, time.perf_counter() - start_time
+
+    chunks, elapsed_s = asyncio.run(stream())
+    assert len(chunks) > 2
+    # The sampled latency is paid once, spread over the deltas, not once more up front
+    assert 0.3 <= elapsed_s < 0.5